@@ -0,0 +1,164 @@
+"""Schema upgrades for databases created by older versions.
+
+init_db() (create_all) only creates missing tables. Columns and indexes that
+were added to existing tables are applied here at every startup; each step
+checks first, so on an up-to-date database this only inspects the schema.
+The migrate_*.py scripts run the same steps by hand.
+"""
+
+from typing import List
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session as DbSession
+from .database import engine as default_engine
+from .models import Attendance, AttendanceEvent, Session as SessionModel
+
+# Later duplicates of an open check-in would violate the unique index.
+# They are closed with zero duration, the earliest check-in stays open.
+CLOSE_DUPLICATE_CHECKINS = """
+    UPDATE attendances
+    SET checked_out_at = checked_in_at
+    WHERE checked_out_at IS NULL
+      AND EXISTS (
+        SELECT 1 FROM attendances AS earlier
+        WHERE earlier.session_id = attendances.session_id
+          AND earlier.personnel_id = attendances.personnel_id
+          AND earlier.checked_out_at IS NULL
+          AND earlier.id < attendances.id
+      )
+"""
+
+SESSION_COUNTER_COLUMNS = ("total_attendees", "active_attendees", "person_seconds", "revision")
+
+
+def _timestamp_type(engine: Engine) -> str:
+    return "TIMESTAMP" if engine.dialect.name == "postgresql" else "DATETIME"
+
+
+def _columns(engine: Engine, table: str) -> set:
+    """Column names of a table, None if the table does not exist yet"""
+    inspector = inspect(engine)
+    if not inspector.has_table(table):
+        return None  # created with all columns by create_all
+    return {column["name"] for column in inspector.get_columns(table)}
+
+
+def add_client_keys(engine: Engine = default_engine) -> bool:
+    """attendance_events.client_key/client_timestamp and their unique index"""
+    table = AttendanceEvent.__table__
+    existing = _columns(engine, table.name)
+    if existing is None:
+        return False
+    missing = [name for name in ("client_key", "client_timestamp") if name not in existing]
+    if not missing:
+        return False
+    with engine.begin() as conn:
+        if "client_key" in missing:
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN client_key VARCHAR(64)"))
+        if "client_timestamp" in missing:
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN client_timestamp {_timestamp_type(engine)}"))
+        for index in table.indexes:
+            if index.name == "uq_attendance_events_client_key":
+                index.create(bind=conn, checkfirst=True)
+    return True
+
+
+def _repair_counters(engine: Engine):
+    from .services.session_counters import SessionCounters
+
+    db = DbSession(engine)
+    try:
+        SessionCounters.repair(db)
+    finally:
+        db.close()
+
+
+def add_session_counters(engine: Engine = default_engine) -> bool:
+    """Attendee counters and revision on sessions, filled from the attendances"""
+    table = SessionModel.__table__
+    existing = _columns(engine, table.name)
+    if existing is None:
+        return False
+    missing = [name for name in SESSION_COUNTER_COLUMNS if name not in existing]
+    if not missing:
+        return False
+    with engine.begin() as conn:
+        for column in missing:
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0"))
+
+    _repair_counters(engine)
+    return True
+
+
+def add_auto_end(engine: Engine = default_engine) -> bool:
+    """sessions.auto_end_at, set for sessions that are running"""
+    from .services.session_manager import SessionManager
+
+    table = SessionModel.__table__
+    existing = _columns(engine, table.name)
+    if existing is None or "auto_end_at" in existing:
+        return False
+    with engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN auto_end_at {_timestamp_type(engine)}"))
+
+    db = DbSession(engine)
+    try:
+        for session in db.query(SessionModel).filter(SessionModel.is_active == True).all():
+            session.auto_end_at = SessionManager.auto_end_deadline(session.event_type, session.started_at)
+            session.auto_end_scheduled = session.auto_end_at is not None
+        db.commit()
+    finally:
+        db.close()
+    return True
+
+
+def add_indexes(engine: Engine = default_engine) -> bool:
+    """Indexes of attendances, sessions and attendance_events.
+
+    uq_attendances_open_checkin (one open check-in per person and session)
+    is what check-in and toggle rely on, so duplicates that would block it
+    are closed first.
+    """
+    inspector = inspect(engine)
+    tables = [
+        table for table in (Attendance.__table__, SessionModel.__table__, AttendanceEvent.__table__)
+        if inspector.has_table(table.name)
+    ]
+    missing = []
+    for table in tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        missing += [
+            index for index in sorted(table.indexes, key=lambda i: i.name)
+            if index.name not in existing and {column.name for column in index.columns} <= columns
+        ]
+    if not missing:
+        return False
+    closed = 0
+    with engine.begin() as conn:
+        if any(index.name == "uq_attendances_open_checkin" for index in missing):
+            closed = conn.execute(text(CLOSE_DUPLICATE_CHECKINS)).rowcount
+        for index in missing:
+            index.create(bind=conn, checkfirst=True)
+        if engine.dialect.name == "postgresql":
+            for table in tables:
+                conn.execute(text(f"ANALYZE {table.name}"))
+        else:
+            conn.execute(text("ANALYZE"))
+
+    if closed and "active_attendees" in (_columns(engine, SessionModel.__tablename__) or ()):
+        _repair_counters(engine)
+    return True
+
+
+# In order: the indexes need the columns
+STEPS = (add_client_keys, add_session_counters, add_auto_end, add_indexes)
+
+
+def upgrade_database(engine: Engine = default_engine) -> List[str]:
+    """Apply all missing upgrades, returns the names of the applied steps"""
+    applied = []
+    for step in STEPS:
+        if step(engine):
+            applied.append(step.__name__)
+    return applied
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, JSON, Float
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, JSON, Float, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -75,9 +75,24 @@ class Session(Base):
     ended_at = Column(DateTime)
     is_active = Column(Boolean, default=True)
     auto_end_scheduled = Column(Boolean, default=False)
+    auto_end_at = Column(DateTime)  # Deadline of the auto end (None for Einsatz)
     created_by = Column(Integer, ForeignKey("admin_users.id"))
+    # Denormalized attendee counters, kept by SessionCounters
+    # (check/repair: check_session_counters.py)
+    total_attendees = Column(Integer, default=0, server_default="0", nullable=False)
+    active_attendees = Column(Integer, default=0, server_default="0", nullable=False)
+    person_seconds = Column(Integer, default=0, server_default="0", nullable=False)  # closed attendances only
+    # Bumped with every change of the attendances (cache key of ended sessions)
+    revision = Column(Integer, default=0, server_default="0", nullable=False)
     
     attendances = relationship("Attendance", back_populates="session")
+    
+    __table_args__ = (
+        # Listing order and date ranges of the statistics
+        Index("ix_sessions_started_at", "started_at"),
+        # Active sessions (kiosk, auto end)
+        Index("ix_sessions_active_started_at", "is_active", "started_at"),
+    )
 
 
 class Attendance(Base):
@@ -91,6 +106,91 @@ class Attendance(Base):
     
     session = relationship("Session", back_populates="attendances")
     personnel = relationship("Personnel", back_populates="attendances")
+    
+    __table_args__ = (
+        # One open check-in per person and session; also serves the lookups
+        # of open attendances (check-in, check-out, live roster)
+        Index(
+            "uq_attendances_open_checkin", "session_id", "personnel_id",
+            unique=True,
+            sqlite_where=text("checked_out_at IS NULL"),
+            postgresql_where=text("checked_out_at IS NULL")
+        ),
+        # All attendances of a session (details, exports, counts)
+        Index("ix_attendances_session_personnel", "session_id", "personnel_id"),
+        # History and statistics of a person
+        Index("ix_attendances_personnel_session", "personnel_id", "session_id"),
+    )
+
+
+class ArchivedSession(Base):
+    """Ended session of a closed year, moved out of the hot sessions table.
+
+    Keeps its original id, so links to the session keep working.
+    """
+    __tablename__ = "archived_sessions"
+    
+    id = Column(Integer, primary_key=True)
+    event_type = Column(String(50), nullable=False)
+    started_at = Column(DateTime, nullable=False)
+    ended_at = Column(DateTime)
+    created_by = Column(Integer)
+    total_attendees = Column(Integer, default=0, nullable=False)
+    person_seconds = Column(Integer, default=0, nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    attendances = relationship("ArchivedAttendance", back_populates="session")
+    
+    __table_args__ = (
+        Index("ix_archived_sessions_started_at", "started_at"),
+    )
+
+
+class ArchivedAttendance(Base):
+    """Attendance of an archived session (own ids, SQLite may reuse the hot ones)"""
+    __tablename__ = "archived_attendances"
+    
+    id = Column(Integer, primary_key=True)
+    session_id = Column(Integer, ForeignKey("archived_sessions.id"), nullable=False)
+    personnel_id = Column(Integer, ForeignKey("personnel.id"), nullable=False)
+    checked_in_at = Column(DateTime, nullable=False)
+    checked_out_at = Column(DateTime)
+    
+    session = relationship("ArchivedSession", back_populates="attendances")
+    personnel = relationship("Personnel")
+    
+    __table_args__ = (
+        Index("ix_archived_attendances_session_personnel", "session_id", "personnel_id"),
+        Index("ix_archived_attendances_personnel_session", "personnel_id", "session_id"),
+    )
+
+
+class AttendanceEvent(Base):
+    """Append-only log of attendance changes, the id is the feed cursor"""
+    __tablename__ = "attendance_events"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String(30), nullable=False)  # checkin, checkout, auto_checkout, session_deleted
+    session_id = Column(Integer, nullable=False)  # no FK - entries outlive deleted sessions
+    personnel_id = Column(Integer)
+    attendance_id = Column(Integer)
+    occurred_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    client_key = Column(String(64))  # idempotency key sent by the kiosk
+    client_timestamp = Column(DateTime)  # kiosk clock at the time of the action (UTC)
+    
+    __table_args__ = (
+        Index("ix_attendance_events_session_cursor", "session_id", "id"),
+        Index("uq_attendance_events_client_key", "client_key", unique=True),
+    )
+
+
+class ChangeCounter(Base):
+    """Monotonic version counters shared by all backend worker processes"""
+    __tablename__ = "change_counters"
+    
+    key = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
 
 class FireStation(Base):
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
@@ -7,6 +7,9 @@ from ..database import get_db
 from ..models import Announcement, AdminUser
 from ..utils.auth import get_current_user
 from ..utils.permissions import check_permission
+from ..utils.conditional import version_etag, minute_bucket, not_modified
+from ..services.change_tracker import ChangeTracker
+from ..services.kiosk_state import KioskState
 
 router = APIRouter(prefix="/api/announcements", tags=["announcements"])
 
@@ -27,40 +30,19 @@ class AnnouncementUpdate(BaseModel):
     target_groups: Optional[List[int]] = None
 
 @router.get("/active")
-async def get_active_announcements(db: Session = Depends(get_db)):
+async def get_active_announcements(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
     """Get all currently active announcements (no auth required for kiosk)"""
-    now = datetime.utcnow()
-    
-    # Define priority order for sorting
-    from sqlalchemy import case
-    priority_order = case(
-        (Announcement.priority == 'urgent', 1),
-        (Announcement.priority == 'high', 2),
-        (Announcement.priority == 'normal', 3),
-        else_=4
-    )
+    # Validity windows depend on the clock, so the tag also changes every minute
+    etag = version_etag(db, ChangeTracker.ANNOUNCEMENTS, minute_bucket())
+    cached = not_modified(request, response, etag)
+    if cached:
+        return cached
     
-    announcements = db.query(Announcement).filter(
-        Announcement.valid_from <= now,
-        (Announcement.valid_until == None) | (Announcement.valid_until >= now)
-    ).order_by(
-        priority_order,
-        Announcement.created_at.desc()
-    ).all()
-    
-    result = []
-    for ann in announcements:
-        result.append({
-            "id": ann.id,
-            "title": ann.title,
-            "content": ann.content,
-            "priority": ann.priority,
-            "valid_from": ann.valid_from,
-            "valid_until": ann.valid_until,
-            "created_at": ann.created_at
-        })
-    
-    return result
+    return KioskState.active_announcements(db)
 
 @router.get("")
 async def list_announcements(
@@ -131,6 +113,7 @@ async def create_announcement(
         created_by=current_user.id
     )
     db.add(new_announcement)
+    ChangeTracker.bump(db, ChangeTracker.ANNOUNCEMENTS)
     db.commit()
     db.refresh(new_announcement)
     
@@ -170,6 +153,7 @@ async def update_announcement(
     if announcement_update.target_groups is not None:
         announcement.target_groups = announcement_update.target_groups
     
+    ChangeTracker.bump(db, ChangeTracker.ANNOUNCEMENTS)
     db.commit()
     db.refresh(announcement)
     
@@ -196,6 +180,7 @@ async def delete_announcement(
         raise HTTPException(status_code=404, detail="Ankündigung nicht gefunden")
     
     db.delete(announcement)
+    ChangeTracker.bump(db, ChangeTracker.ANNOUNCEMENTS)
     db.commit()
     
     return {"message": "Ankündigung erfolgreich gelöscht"}
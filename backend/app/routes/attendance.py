@@ -1,30 +1,172 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from sqlalchemy.orm.attributes import set_committed_value
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
 from ..database import get_db
-from ..models import Attendance, Personnel, Session as SessionModel, DIENSTGRADE
+from ..models import Attendance, Session as SessionModel, DIENSTGRADE
 from ..services.qr_generator import QRGenerator
+from ..services.token_cache import TokenCache
+from ..services.event_broker import EventBroker
+from ..services.change_tracker import ChangeTracker
+from ..services.live_roster import LiveRoster, roster_entry
+from ..services.personnel_index import PersonnelIndex
+from ..services.attendance_feed import AttendanceFeed, CHECKIN, CHECKOUT
+from ..services.attendance_replay import AttendanceReplay, client_time
+from ..services.checkin_journal import CheckinJournal
+from ..services.session_counters import SessionCounters
+from ..utils.conditional import not_modified
 
 router = APIRouter(prefix="/api/attendance", tags=["attendance"])
 
 class CheckInRequest(BaseModel):
     session_id: int
     stammrollennummer: str
+    client_key: Optional[str] = Field(None, max_length=64)  # idempotency key
+    client_timestamp: Optional[datetime] = None  # kiosk clock, only recorded (booked at server time)
 
 class CheckOutRequest(BaseModel):
     session_id: int
     stammrollennummer: str
+    client_key: Optional[str] = Field(None, max_length=64)
+    client_timestamp: Optional[datetime] = None
+
+class BatchCheckInRequest(BaseModel):
+    session_id: int
+    stammrollennummern: List[str]
+
+class ReplayEntry(BaseModel):
+    client_key: str = Field(..., min_length=1, max_length=64)
+    client_timestamp: Optional[datetime] = None
+    action: str = "toggle"  # checkin, checkout or toggle
+    session_id: int
+    stammrollennummer: str
+
+class ReplayRequest(BaseModel):
+    entries: List[ReplayEntry]
 
 class ValidateTokenRequest(BaseModel):
     token: str
 
+def _previous_result(db: Session, client_key: Optional[str], personnel) -> Optional[dict]:
+    """Response for a request whose idempotency key was already processed"""
+    if not client_key:
+        return None
+    event = AttendanceFeed.by_client_keys(db, [client_key]).get(client_key)
+    if not event:
+        return None
+    if event.personnel_id != personnel.id or event.event_type not in (CHECKIN, CHECKOUT):
+        raise HTTPException(status_code=409, detail="Schlüssel wurde bereits für eine andere Buchung verwendet")
+    
+    checked_in = event.event_type == CHECKIN
+    return {
+        "action": event.event_type,
+        "message": "Erfolgreich eingecheckt" if checked_in else "Erfolgreich ausgecheckt",
+        "attendance_id": event.attendance_id,
+        "personnel": {
+            "id": personnel.id,
+            "vorname": personnel.vorname,
+            "nachname": personnel.nachname,
+            "dienstgrad": personnel.dienstgrad_name
+        },
+        "checked_in_at": event.occurred_at if checked_in else None,
+        "checked_out_at": None if checked_in else event.occurred_at,
+        "duplicate": True
+    }
+
+def _journal_response(record: dict, personnel, duplicate: bool = False) -> dict:
+    """Response for a booking acknowledged from the check-in journal"""
+    checked_in = record["action"] == "checkin"
+    response = {
+        "action": record["action"],
+        "message": "Erfolgreich eingecheckt" if checked_in else "Erfolgreich ausgecheckt",
+        "attendance_id": None,  # assigned when the journal is written to the database
+        "personnel": {
+            "id": personnel.id,
+            "vorname": personnel.vorname,
+            "nachname": personnel.nachname,
+            "dienstgrad": personnel.dienstgrad_name
+        },
+        "checked_in_at": record["occurred_at"] if checked_in else None,
+        "checked_out_at": None if checked_in else record["occurred_at"],
+        "journaled": True
+    }
+    if duplicate:
+        response["duplicate"] = True
+    return response
+
+def _journaled_booking(db: Session, request, action: str) -> dict:
+    """Validate a kiosk booking against the live roster and journal it.
+
+    Used instead of a database transaction per booking when the write-behind
+    journal is enabled (ATTENDANCE_JOURNAL).
+    """
+    session = LiveRoster.active_session(db, request.session_id)
+    if session is None:
+        exists = db.query(SessionModel.id).filter(SessionModel.id == request.session_id).first()
+        if not exists:
+            raise HTTPException(status_code=404, detail="Session nicht gefunden")
+        raise HTTPException(status_code=400, detail="Session ist nicht aktiv")
+    
+    # Deactivated members can still check out (toggle is resolved below)
+    personnel = PersonnelIndex.get(db, request.stammrollennummer, active_only=action == "checkin")
+    if not personnel:
+        raise HTTPException(status_code=404, detail="Personal nicht gefunden")
+    
+    # Retried request (e.g. after a timeout) - answer like the first time
+    journaled = CheckinJournal.find(request.client_key)
+    if journaled:
+        return _journal_response(journaled, personnel, duplicate=True)
+    previous = _previous_result(db, request.client_key, personnel)
+    if previous:
+        return previous
+    
+    current = session["personnel"].get(personnel.id)
+    if action == "toggle":
+        action = "checkout" if current else "checkin"
+        if action == "checkin" and not personnel.is_active:
+            raise HTTPException(status_code=404, detail="Personal nicht gefunden")
+    
+    if action == "checkin":
+        if current:
+            raise HTTPException(status_code=400, detail="Bereits eingecheckt")
+        moment = datetime.utcnow()
+        entry = roster_entry(Attendance(id=None, checked_in_at=moment), personnel)
+        record = CheckinJournal.append(
+            CHECKIN, request.session_id, personnel, moment, request.client_key, entry,
+            client_timestamp=request.client_timestamp
+        )
+        EventBroker.publish("checkin", {"session_id": request.session_id, **entry})
+    else:
+        if not current:
+            raise HTTPException(status_code=404, detail="Kein aktiver Check-in gefunden")
+        moment = datetime.utcnow()
+        record = CheckinJournal.append(
+            CHECKOUT, request.session_id, personnel, moment, request.client_key,
+            client_timestamp=request.client_timestamp
+        )
+        EventBroker.publish("checkout", {
+            "session_id": request.session_id,
+            "attendance_id": current["attendance_id"],
+            "personnel_id": personnel.id,
+            "stammrollennummer": personnel.stammrollennummer,
+            "checked_out_at": moment
+        })
+    
+    return _journal_response(record, personnel)
+
 @router.post("/checkin")
 async def check_in(
     request: CheckInRequest,
     db: Session = Depends(get_db)
 ):
     """Check in personnel to a session"""
+    if CheckinJournal.is_active():
+        return _journaled_booking(db, request, "checkin")
+    
     # Verify session exists and is active
     session = db.query(SessionModel).filter(SessionModel.id == request.session_id).first()
     if not session:
@@ -34,35 +176,44 @@ async def check_in(
         raise HTTPException(status_code=400, detail="Session ist nicht aktiv")
     
     # Verify personnel exists
-    personnel = db.query(Personnel).filter(
-        Personnel.stammrollennummer == request.stammrollennummer,
-        Personnel.is_active == True
-    ).first()
+    personnel = PersonnelIndex.get(db, request.stammrollennummer)
     
     if not personnel:
         raise HTTPException(status_code=404, detail="Personal nicht gefunden")
     
-    # Check if already checked in
-    existing = db.query(Attendance).filter(
-        Attendance.session_id == request.session_id,
-        Attendance.personnel_id == personnel.id,
-        Attendance.checked_out_at == None
-    ).first()
-    
-    if existing:
-        raise HTTPException(status_code=400, detail="Bereits eingecheckt")
+    # Retried request (e.g. after a timeout) - answer like the first time
+    previous = _previous_result(db, request.client_key, personnel)
+    if previous:
+        return previous
     
-    # Create attendance record
+    # Create attendance record - a second open check-in of the same person
+    # is rejected by the uq_attendances_open_checkin index
     attendance = Attendance(
         session_id=request.session_id,
         personnel_id=personnel.id,
         checked_in_at=datetime.utcnow()
     )
     db.add(attendance)
-    db.commit()
+    try:
+        db.flush()
+        AttendanceFeed.record(
+            db, CHECKIN, request.session_id, personnel.id, attendance.id, attendance.checked_in_at,
+            request.client_key, client_time(request.client_timestamp) if request.client_key else None
+        )
+        SessionCounters.checked_in(db, request.session_id)
+        roster_version = ChangeTracker.bump(db, ChangeTracker.ROSTER)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        previous = _previous_result(db, request.client_key, personnel)
+        if previous:
+            return previous
+        raise HTTPException(status_code=400, detail="Bereits eingecheckt")
     db.refresh(attendance)
     
-    dienstgrad_info = DIENSTGRADE.get(personnel.dienstgrad, (personnel.dienstgrad, 0))
+    entry = roster_entry(attendance, personnel)
+    LiveRoster.checked_in(roster_version, request.session_id, entry)
+    EventBroker.publish("checkin", {"session_id": request.session_id, **entry})
     
     return {
         "message": "Erfolgreich eingecheckt",
@@ -71,25 +222,131 @@ async def check_in(
             "id": personnel.id,
             "vorname": personnel.vorname,
             "nachname": personnel.nachname,
-            "dienstgrad": dienstgrad_info[0]
+            "dienstgrad": personnel.dienstgrad_name
         },
         "checked_in_at": attendance.checked_in_at
     }
 
+@router.post("/checkin/batch")
+async def batch_check_in(
+    request: BatchCheckInRequest,
+    db: Session = Depends(get_db)
+):
+    """Check in a whole crew at once (one transaction, result per person)"""
+    session = db.query(SessionModel).filter(SessionModel.id == request.session_id).first()
+    if not session:
+        raise HTTPException(status_code=404, detail="Session nicht gefunden")
+    
+    if not session.is_active:
+        raise HTTPException(status_code=400, detail="Session ist nicht aktiv")
+    
+    numbers = list(dict.fromkeys(n.strip() for n in request.stammrollennummern if n.strip()))
+    
+    personnel_by_number = PersonnelIndex.get_many(db, numbers)
+    
+    already_checked_in = set()
+    if personnel_by_number:
+        already_checked_in = {
+            row.personnel_id
+            for row in db.query(Attendance.personnel_id).filter(
+                Attendance.session_id == request.session_id,
+                Attendance.personnel_id.in_([p.id for p in personnel_by_number.values()]),
+                Attendance.checked_out_at == None
+            ).all()
+        }
+    
+    now = datetime.utcnow()
+    to_check_in = [
+        personnel_by_number[number] for number in numbers
+        if number in personnel_by_number and personnel_by_number[number].id not in already_checked_in
+    ]
+    
+    entries = []
+    if to_check_in:
+        # One multi-row INSERT instead of a flush per object
+        try:
+            attendance_ids = dict(
+                (row.personnel_id, row.id) for row in db.execute(
+                    insert(Attendance).returning(Attendance.personnel_id, Attendance.id),
+                    [{
+                        "session_id": request.session_id,
+                        "personnel_id": personnel.id,
+                        "checked_in_at": now
+                    } for personnel in to_check_in]
+                )
+            )
+        except IntegrityError:
+            # Someone of the crew checked in concurrently
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Gleichzeitiger Check-in, bitte erneut versuchen")
+        
+        entries = [
+            roster_entry(Attendance(id=attendance_ids[personnel.id], checked_in_at=now), personnel)
+            for personnel in to_check_in
+        ]
+        AttendanceFeed.record_many(db, [{
+            "event_type": CHECKIN,
+            "session_id": request.session_id,
+            "personnel_id": entry["personnel_id"],
+            "attendance_id": entry["attendance_id"],
+            "occurred_at": now
+        } for entry in entries])
+        SessionCounters.checked_in(db, request.session_id, len(entries))
+        roster_version = ChangeTracker.bump(db, ChangeTracker.ROSTER)
+        db.commit()
+        
+        LiveRoster.checked_in_many(roster_version, request.session_id, entries)
+        for entry in entries:
+            EventBroker.publish("checkin", {"session_id": request.session_id, **entry})
+    
+    checked_in = {entry["stammrollennummer"]: entry for entry in entries}
+    results = []
+    for number in numbers:
+        entry = checked_in.get(number)
+        if entry:
+            results.append({
+                "stammrollennummer": number,
+                "status": "checked_in",
+                "attendance_id": entry["attendance_id"],
+                "personnel": {
+                    "id": entry["personnel_id"],
+                    "vorname": entry["vorname"],
+                    "nachname": entry["nachname"],
+                    "dienstgrad": entry["dienstgrad_name"]
+                },
+                "checked_in_at": entry["checked_in_at"]
+            })
+        elif number in personnel_by_number:
+            results.append({"stammrollennummer": number, "status": "already_checked_in", "detail": "Bereits eingecheckt"})
+        else:
+            results.append({"stammrollennummer": number, "status": "not_found", "detail": "Personal nicht gefunden"})
+    
+    return {
+        "session_id": request.session_id,
+        "checked_in": len(entries),
+        "results": results
+    }
+
 @router.post("/checkout")
 async def check_out(
     request: CheckOutRequest,
     db: Session = Depends(get_db)
 ):
     """Check out personnel from a session"""
+    if CheckinJournal.is_active():
+        return _journaled_booking(db, request, "checkout")
+    
     # Verify personnel exists
-    personnel = db.query(Personnel).filter(
-        Personnel.stammrollennummer == request.stammrollennummer
-    ).first()
+    personnel = PersonnelIndex.get(db, request.stammrollennummer, active_only=False)
     
     if not personnel:
         raise HTTPException(status_code=404, detail="Personal nicht gefunden")
     
+    # Retried request (e.g. after a timeout) - answer like the first time
+    previous = _previous_result(db, request.client_key, personnel)
+    if previous:
+        return previous
+    
     # Find active attendance
     attendance = db.query(Attendance).filter(
         Attendance.session_id == request.session_id,
@@ -100,9 +357,42 @@ async def check_out(
     if not attendance:
         raise HTTPException(status_code=404, detail="Kein aktiver Check-in gefunden")
     
-    # Update checkout time
-    attendance.checked_out_at = datetime.utcnow()
-    db.commit()
+    # Update checkout time - only if no concurrent check-out closed it meanwhile
+    checked_out_at = datetime.utcnow()
+    closed = db.execute(
+        update(Attendance).where(
+            Attendance.id == attendance.id,
+            Attendance.checked_out_at == None
+        ).values(checked_out_at=checked_out_at).execution_options(synchronize_session=False)
+    ).rowcount
+    if not closed:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Kein aktiver Check-in gefunden")
+    set_committed_value(attendance, "checked_out_at", checked_out_at)
+    SessionCounters.checked_out(db, request.session_id, [(attendance.checked_in_at, checked_out_at)])
+    AttendanceFeed.record(
+        db, CHECKOUT, request.session_id, personnel.id, attendance.id, attendance.checked_out_at,
+        request.client_key, client_time(request.client_timestamp) if request.client_key else None
+    )
+    roster_version = ChangeTracker.bump(db, ChangeTracker.ROSTER)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Same key processed concurrently
+        db.rollback()
+        previous = _previous_result(db, request.client_key, personnel)
+        if previous:
+            return previous
+        raise
+    
+    LiveRoster.checked_out(roster_version, request.session_id, personnel.id)
+    EventBroker.publish("checkout", {
+        "session_id": request.session_id,
+        "attendance_id": attendance.id,
+        "personnel_id": personnel.id,
+        "stammrollennummer": personnel.stammrollennummer,
+        "checked_out_at": attendance.checked_out_at
+    })
     
     return {
         "message": "Erfolgreich ausgecheckt",
@@ -113,12 +403,190 @@ async def check_out(
         "checked_out_at": attendance.checked_out_at
     }
 
+def _toggle_attendance(db: Session, session_id: int, personnel_id: int, moment: datetime):
+    """Check in if there is no open attendance, otherwise check out.
+
+    Returns (attendance_id, checked_in_at, checked_out_at) of the affected row.
+    SQLite and PostgreSQL do this in one statement via an upsert on the
+    uq_attendances_open_checkin index. A check-out never lies before the
+    check-in (client clocks can be off).
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        
+        stmt = dialect_insert(Attendance).values(
+            session_id=session_id,
+            personnel_id=personnel_id,
+            checked_in_at=moment
+        ).on_conflict_do_update(
+            index_elements=[Attendance.session_id, Attendance.personnel_id],
+            index_where=Attendance.checked_out_at.is_(None),
+            set_={"checked_out_at": case(
+                (Attendance.checked_in_at > moment, Attendance.checked_in_at),
+                else_=moment
+            )}
+        ).returning(Attendance.id, Attendance.checked_in_at, Attendance.checked_out_at)
+        return tuple(db.execute(stmt).one())
+    
+    # Other databases: close an open attendance, otherwise create one
+    row = db.execute(
+        select(Attendance.id, Attendance.checked_in_at).where(
+            Attendance.session_id == session_id,
+            Attendance.personnel_id == personnel_id,
+            Attendance.checked_out_at == None
+        )
+    ).first()
+    if row:
+        checked_out_at = max(moment, row.checked_in_at)
+        result = db.execute(
+            update(Attendance).where(
+                Attendance.id == row.id,
+                Attendance.checked_out_at == None
+            ).values(checked_out_at=checked_out_at)
+        )
+        if result.rowcount:
+            return row.id, row.checked_in_at, checked_out_at
+    
+    attendance = Attendance(session_id=session_id, personnel_id=personnel_id, checked_in_at=moment)
+    db.add(attendance)
+    db.flush()
+    return attendance.id, moment, None
+
+@router.post("/toggle")
+async def toggle_attendance(
+    request: CheckInRequest,
+    db: Session = Depends(get_db)
+):
+    """Check in or check out, depending on the current state (kiosk keypad)"""
+    if CheckinJournal.is_active():
+        return _journaled_booking(db, request, "toggle")
+    
+    session = db.query(SessionModel).filter(SessionModel.id == request.session_id).first()
+    if not session:
+        raise HTTPException(status_code=404, detail="Session nicht gefunden")
+    
+    if not session.is_active:
+        raise HTTPException(status_code=400, detail="Session ist nicht aktiv")
+    
+    # Deactivated members can still check out, but not check in
+    personnel = PersonnelIndex.get(db, request.stammrollennummer, active_only=False)
+    if not personnel:
+        raise HTTPException(status_code=404, detail="Personal nicht gefunden")
+    
+    # Retried request (e.g. after a timeout) - answer like the first time
+    previous = _previous_result(db, request.client_key, personnel)
+    if previous:
+        return previous
+    
+    try:
+        attendance_id, checked_in_at, checked_out_at = _toggle_attendance(
+            db, request.session_id, personnel.id, datetime.utcnow()
+        )
+        checked_in = checked_out_at is None
+        if checked_in and not personnel.is_active:
+            db.rollback()
+            raise HTTPException(status_code=404, detail="Personal nicht gefunden")
+        AttendanceFeed.record(
+            db, CHECKIN if checked_in else CHECKOUT, request.session_id,
+            personnel.id, attendance_id, checked_in_at if checked_in else checked_out_at,
+            request.client_key, client_time(request.client_timestamp) if request.client_key else None
+        )
+        if checked_in:
+            SessionCounters.checked_in(db, request.session_id)
+        else:
+            SessionCounters.checked_out(db, request.session_id, [(checked_in_at, checked_out_at)])
+        roster_version = ChangeTracker.bump(db, ChangeTracker.ROSTER)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        previous = _previous_result(db, request.client_key, personnel)
+        if previous:
+            return previous
+        # Concurrent check-in of the same person on another kiosk
+        raise HTTPException(status_code=409, detail="Gleichzeitiger Check-in, bitte erneut versuchen")
+    
+    if checked_in:
+        entry = roster_entry(Attendance(id=attendance_id, checked_in_at=checked_in_at), personnel)
+        LiveRoster.checked_in(roster_version, request.session_id, entry)
+        EventBroker.publish("checkin", {"session_id": request.session_id, **entry})
+    else:
+        LiveRoster.checked_out(roster_version, request.session_id, personnel.id)
+        EventBroker.publish("checkout", {
+            "session_id": request.session_id,
+            "attendance_id": attendance_id,
+            "personnel_id": personnel.id,
+            "stammrollennummer": personnel.stammrollennummer,
+            "checked_out_at": checked_out_at
+        })
+    
+    return {
+        "action": "checkin" if checked_in else "checkout",
+        "message": "Erfolgreich eingecheckt" if checked_in else "Erfolgreich ausgecheckt",
+        "attendance_id": attendance_id,
+        "personnel": {
+            "id": personnel.id,
+            "vorname": personnel.vorname,
+            "nachname": personnel.nachname,
+            "dienstgrad": personnel.dienstgrad_name
+        },
+        "checked_in_at": checked_in_at,
+        "checked_out_at": checked_out_at
+    }
+
+@router.post("/replay")
+async def replay_attendance(
+    request: ReplayRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Apply check-ins/check-outs that a kiosk queued while offline.
+    
+    One transaction for the whole batch; entries whose client_key was already
+    processed are reported as duplicate, so a batch can safely be resent.
+    """
+    if len(request.entries) > AttendanceReplay.MAX_ENTRIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximal {AttendanceReplay.MAX_ENTRIES} Einträge pro Anfrage"
+        )
+    for entry in request.entries:
+        if entry.action not in ("checkin", "checkout", "toggle"):
+            raise HTTPException(status_code=400, detail=f"Ungültige Aktion: {entry.action}")
+    
+    try:
+        results = AttendanceReplay.apply(db, [entry.dict() for entry in request.entries])
+    except IntegrityError:
+        # Overlapped with a live check-in or another replay - resend later
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Gleichzeitige Buchung, bitte erneut senden")
+    
+    return {
+        "applied": sum(1 for r in results if r["status"] == "applied"),
+        "results": results
+    }
+
 @router.get("/session/{session_id}/active")
 async def get_active_attendees(
     session_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """Get all currently checked-in personnel for a session"""
+    etag = LiveRoster.etag(db, *CheckinJournal.etag_parts())
+    cached = not_modified(request, response, etag)
+    if cached:
+        return cached
+    
+    # Active sessions are served from the in-memory roster
+    attendees = LiveRoster.session_attendees(db, session_id)
+    if attendees is not None:
+        return attendees
+    
     attendances = db.query(Attendance).filter(
         Attendance.session_id == session_id,
         Attendance.checked_out_at == None
@@ -141,29 +609,62 @@ async def get_active_attendees(
     
     return result
 
+@router.get("/changes")
+async def get_attendance_changes(
+    since: Optional[int] = None,
+    limit: int = 100,
+    session_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Attendance change feed (checkin, checkout, auto_checkout, session_deleted).
+
+    Pass the returned next_cursor as `since` to get only newer changes; keep
+    paging while has_more is true. Without `since` no changes are returned,
+    only the current cursor to start following from.
+    """
+    if since is None:
+        head = AttendanceFeed.head(db)
+        return {"changes": [], "next_cursor": head, "has_more": False}
+    
+    return AttendanceFeed.changes(db, since, limit, session_id)
+
+def _reject_token(token: str, status_code: int, detail: str):
+    TokenCache.reject(token, status_code, detail)
+    raise HTTPException(status_code=status_code, detail=detail)
+
 @router.post("/validate-token")
 async def validate_qr_token(
     request: ValidateTokenRequest,
     db: Session = Depends(get_db)
 ):
     """Validate QR code token and return session info"""
+    # Reloads and repeated (or bogus) scans are answered from memory
+    rejected = TokenCache.rejected(request.token)
+    if rejected:
+        raise HTTPException(status_code=rejected[0], detail=rejected[1])
+    session_id = TokenCache.accepted(request.token)
+    if session_id:
+        return {"valid": True, "session_id": session_id}
+    
     payload = QRGenerator.validate_session_token(request.token)
     
     if not payload:
-        raise HTTPException(status_code=400, detail="Ungültiger oder abgelaufener QR-Code")
+        _reject_token(request.token, 400, "Ungültiger oder abgelaufener QR-Code")
     
     session_id = payload.get("session_id")
     if not session_id:
-        raise HTTPException(status_code=400, detail="Ungültiger QR-Code")
+        _reject_token(request.token, 400, "Ungültiger QR-Code")
     
     # Verify session exists and is active
     session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
     if not session:
-        raise HTTPException(status_code=404, detail="Session nicht gefunden")
+        _reject_token(request.token, 404, "Session nicht gefunden")
     
     if not session.is_active:
-        raise HTTPException(status_code=400, detail="Session ist nicht aktiv")
+        _reject_token(request.token, 400, "Session ist nicht aktiv")
     
+    TokenCache.accept(request.token, session_id, payload.get("exp"))
     return {
         "valid": True,
         "session_id": session_id
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from ..database import get_db
-from ..models import AdminUser
-from ..utils.auth import verify_password, create_access_token, get_current_user
+from ..models import AdminUser, PersonnelAdmin
+from ..utils.auth import (
+    verify_password_async, get_password_hash_async, create_access_token, get_current_user, Principal
+)
+from ..utils.login_throttle import LoginThrottle
+from ..services.change_tracker import ChangeTracker
 from datetime import datetime, timedelta
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
@@ -18,15 +22,27 @@ class TokenResponse(BaseModel):
     user: dict
 
 @router.post("/login", response_model=TokenResponse)
-async def login(request: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: LoginRequest, http_request: Request, db: Session = Depends(get_db)):
     """Login endpoint"""
+    account = f"admin:{request.username}"
+    LoginThrottle.check(http_request, account)
+    
     user = db.query(AdminUser).filter(AdminUser.username == request.username).first()
     
-    if not user or not verify_password(request.password, user.hashed_password):
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await verify_password_async(request.password, user.hashed_password)
+    if not valid:
+        LoginThrottle.failed(account)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Ungültiger Benutzername oder Passwort"
         )
+    LoginThrottle.succeeded(account)
+    
+    # Rehash when BCRYPT_ROUNDS changed
+    if new_hash:
+        user.hashed_password = new_hash
     
     # Update last login
     user.last_login = datetime.utcnow()
@@ -45,7 +61,7 @@ async def login(request: LoginRequest, db: Session = Depends(get_db)):
     }
 
 @router.get("/me")
-async def get_me(current_user: AdminUser = Depends(get_current_user)):
+async def get_me(current_user: Principal = Depends(get_current_user)):
     """Get current user info"""
     return {
         "id": current_user.id,
@@ -61,12 +77,22 @@ class ChangePasswordRequest(BaseModel):
 @router.post("/change-password")
 async def change_password(
     request: ChangePasswordRequest,
-    current_user: AdminUser = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Change current user's password"""
+    # The principal is a cached copy; load the account itself
+    model = PersonnelAdmin if current_user.is_personnel else AdminUser
+    user = db.query(model).filter(model.id == current_user.id).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Benutzer nicht gefunden"
+        )
+    
     # Verify current password
-    if not verify_password(request.current_password, current_user.hashed_password):
+    valid, _ = await verify_password_async(request.current_password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Aktuelles Passwort ist falsch"
@@ -80,8 +106,8 @@ async def change_password(
         )
     
     # Update password
-    from ..utils.auth import get_password_hash
-    current_user.hashed_password = get_password_hash(request.new_password)
+    user.hashed_password = await get_password_hash_async(request.new_password)
+    ChangeTracker.bump(db, ChangeTracker.USERS)
     db.commit()
     
     return {"status": "ok", "message": "Passwort erfolgreich geändert"}
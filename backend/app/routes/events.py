@@ -1,30 +1,104 @@
-from fastapi import APIRouter, Depends
-from typing import List
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import List, Optional
 import asyncio
 import json
-from datetime import datetime
+from datetime import datetime, timezone
+from ..database import get_db
+from ..services.event_broker import EventBroker
+from ..services.change_tracker import ChangeTracker
 
 router = APIRouter(prefix="/api", tags=["events"])
 
-# Simple timestamp-based refresh trigger
-last_refresh_time = datetime.now()
+# Keepalive interval for the push channel (proxies drop idle connections)
+STREAM_HEARTBEAT_SECONDS = 15
 
-@router.get("/events/last-refresh")
-async def get_last_refresh():
-    """Get timestamp of last refresh trigger"""
+def _refresh_info(version: int, updated_at: Optional[datetime]) -> dict:
+    """Refresh state as returned to kiosks (updated_at is stored as UTC)"""
+    updated_at = updated_at or datetime.utcnow()
     return {
-        "timestamp": last_refresh_time.isoformat(),
-        "unix_timestamp": last_refresh_time.timestamp()
+        "version": version,
+        "timestamp": updated_at.isoformat(),
+        "unix_timestamp": updated_at.replace(tzinfo=timezone.utc).timestamp()
     }
 
+def _publish_refresh(version: int, updated_at: Optional[datetime]):
+    EventBroker.publish("refresh", _refresh_info(version, updated_at))
+
+# Fires for refreshes triggered in this process and, via the change watcher,
+# for refreshes triggered in other worker processes
+ChangeTracker.on_change(ChangeTracker.KIOSK_REFRESH, _publish_refresh)
+
+def _publish_roster_resync(version: int, updated_at: Optional[datetime]):
+    # Bookings of other workers carry no delta here - clients reload the roster
+    EventBroker.publish("resync", {"version": version})
+
+ChangeTracker.on_remote_change(ChangeTracker.ROSTER, _publish_roster_resync)
+
+@router.get("/events/last-refresh")
+async def get_last_refresh(db: Session = Depends(get_db)):
+    """Get version and timestamp of last refresh trigger"""
+    version, updated_at = ChangeTracker.current(db, ChangeTracker.KIOSK_REFRESH)
+    return _refresh_info(version, updated_at)
+
 @router.post("/events/refresh-kiosk")
-async def trigger_kiosk_refresh():
+async def trigger_kiosk_refresh(db: Session = Depends(get_db)):
     """Trigger kiosk refresh (called from admin after changes)"""
-    global last_refresh_time
-    last_refresh_time = datetime.now()
+    ChangeTracker.bump(db, ChangeTracker.KIOSK_REFRESH)
+    db.commit()
+    
+    refresh = _refresh_info(*ChangeTracker.current(db, ChangeTracker.KIOSK_REFRESH))
     
     return {
         "status": "ok", 
         "message": "Kiosk refresh triggered",
-        "timestamp": last_refresh_time.isoformat()
+        "version": refresh["version"],
+        "timestamp": refresh["timestamp"]
     }
+
+@router.get("/events/stream")
+async def event_stream(
+    request: Request,
+    session_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Server-sent events for kiosks and the live dashboard.
+
+    Events: refresh, checkin, checkout, session_started, session_ended,
+    session_deleted and resync (client fell behind and should reload).
+    With session_id only events of that session (plus global ones) are sent.
+    """
+    hello = _refresh_info(*ChangeTracker.current(db, ChangeTracker.KIOSK_REFRESH))
+    db.close()
+    subscriber = EventBroker.subscribe(session_id)
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            yield EventBroker.format_message("hello", hello)
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    message = await asyncio.wait_for(subscriber.get(), timeout=STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                if subscriber.overflowed:
+                    subscriber.overflowed = False
+                    yield EventBroker.format_message("resync", {})
+                yield message
+        finally:
+            EventBroker.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
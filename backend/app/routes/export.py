@@ -2,10 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import Response
 from sqlalchemy.orm import Session
 from ..database import get_db
-from ..models import AdminUser
+from ..models import AdminUser, Session as SessionModel
 from ..utils.auth import get_current_user
 from ..utils.permissions import check_permission
 from ..services.pdf_generator import PDFGenerator
+from ..services.session_cache import SessionCache
 
 router = APIRouter(prefix="/api/export", tags=["export"])
 
@@ -19,10 +20,15 @@ async def export_session_pdf(
     """Export session as PDF"""
     check_permission(current_user, "reports:export")
     
-    pdf_bytes = PDFGenerator.generate_session_pdf(db, session_id)
-    
+    # PDFs of ended sessions are rendered once per revision (archived ones each time)
+    session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
+    cache_key = SessionCache.pdf_key(db, session) if session else None
+    pdf_bytes = SessionCache.get_pdf(cache_key)
     if not pdf_bytes:
-        raise HTTPException(status_code=404, detail="Session nicht gefunden")
+        pdf_bytes = PDFGenerator.generate_session_pdf(db, session_id)
+        if not pdf_bytes:
+            raise HTTPException(status_code=404, detail="Session nicht gefunden")
+        SessionCache.put_pdf(cache_key, pdf_bytes)
     
     return Response(
         content=pdf_bytes,
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.orm import Session
+from typing import Optional
+from ..database import get_db
+from ..services.kiosk_state import KioskState
+from ..utils.conditional import not_modified
+
+router = APIRouter(prefix="/api/kiosk", tags=["kiosk"])
+
+@router.get("/state")
+async def get_kiosk_state(
+    request: Request,
+    response: Response,
+    since: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Kiosk bootstrap: system settings, fire station, active sessions,
+    announcements and news in one response.
+
+    Pass the returned `version` as `since` to receive only the sections
+    that changed in the meantime (listed in `changed`).
+    """
+    tags = KioskState.section_tags(db)
+    etag = f'W/"kiosk-{KioskState.version_token(tags)}"'
+    cached = not_modified(request, response, etag)
+    if cached:
+        return cached
+    
+    return KioskState.get_state(db, since, tags)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
@@ -6,6 +6,9 @@ from datetime import datetime
 from ..database import get_db
 from ..models import News, AdminUser
 from ..utils.auth import get_current_user
+from ..utils.conditional import version_etag, minute_bucket, not_modified
+from ..services.change_tracker import ChangeTracker
+from ..services.kiosk_state import KioskState
 
 router = APIRouter(prefix="/api/news", tags=["news"])
 
@@ -24,33 +27,21 @@ class NewsUpdate(BaseModel):
 
 @router.get("")
 async def list_news(
+    request: Request,
+    response: Response,
     active_only: bool = True,
     skip: int = 0,
     limit: int = 50,
     db: Session = Depends(get_db)
 ):
     """List all news items"""
-    query = db.query(News)
+    # Expiry depends on the clock, so the tag also changes every minute
+    etag = version_etag(db, ChangeTracker.NEWS, minute_bucket())
+    cached = not_modified(request, response, etag)
+    if cached:
+        return cached
     
-    if active_only:
-        query = query.filter(News.is_active == True)
-        # Filter out expired news
-        query = query.filter(
-            (News.expires_at.is_(None)) | (News.expires_at > datetime.now())
-        )
-    
-    news_items = query.order_by(News.created_at.desc()).offset(skip).limit(limit).all()
-    
-    return [{
-        "id": n.id,
-        "title": n.title,
-        "content": n.content,
-        "priority": n.priority,
-        "is_active": n.is_active,
-        "created_at": n.created_at,
-        "expires_at": n.expires_at,
-        "created_by": n.created_by
-    } for n in news_items]
+    return KioskState.news(db, active_only, skip, limit)
 
 @router.get("/{news_id}")
 async def get_news(
@@ -89,6 +80,7 @@ async def create_news(
     )
     
     db.add(new_news)
+    ChangeTracker.bump(db, ChangeTracker.NEWS)
     db.commit()
     db.refresh(new_news)
     
@@ -125,6 +117,7 @@ async def update_news(
     if news_update.is_active is not None:
         news.is_active = news_update.is_active
     
+    ChangeTracker.bump(db, ChangeTracker.NEWS)
     db.commit()
     db.refresh(news)
     
@@ -150,6 +143,7 @@ async def delete_news(
         raise HTTPException(status_code=404, detail="News nicht gefunden")
     
     db.delete(news)
+    ChangeTracker.bump(db, ChangeTracker.NEWS)
     db.commit()
     
     return {"message": "News erfolgreich gelöscht"}
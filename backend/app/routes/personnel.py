@@ -6,6 +6,8 @@ from ..database import get_db
 from ..models import Personnel, AdminUser, DIENSTGRADE
 from ..utils.auth import get_current_user
 from ..utils.permissions import check_permission
+from ..services.change_tracker import ChangeTracker
+from ..services.personnel_index import PersonnelIndex
 
 router = APIRouter(prefix="/api/personnel", tags=["personnel"])
 
@@ -102,6 +104,7 @@ async def create_personnel(
     
     new_personnel = Personnel(**personnel.dict())
     db.add(new_personnel)
+    ChangeTracker.bump(db, ChangeTracker.PERSONNEL)
     db.commit()
     db.refresh(new_personnel)
     
@@ -139,6 +142,9 @@ async def update_personnel(
     for field, value in update_data.items():
         setattr(personnel, field, value)
     
+    # Names and ranks are shown in the live roster
+    ChangeTracker.bump(db, ChangeTracker.ROSTER)
+    ChangeTracker.bump(db, ChangeTracker.PERSONNEL)
     db.commit()
     return {"message": "Personal erfolgreich aktualisiert"}
 
@@ -159,11 +165,15 @@ async def delete_personnel(
     if permanent:
         # Permanent deletion - remove from database
         db.delete(personnel)
+        ChangeTracker.bump(db, ChangeTracker.ROSTER)
+        ChangeTracker.bump(db, ChangeTracker.PERSONNEL)
         db.commit()
         return {"message": "Personal permanent gelöscht"}
     else:
         # Soft delete - set is_active to False
         personnel.is_active = False
+        ChangeTracker.bump(db, ChangeTracker.ROSTER)
+        ChangeTracker.bump(db, ChangeTracker.PERSONNEL)
         db.commit()
         return {"message": "Personal erfolgreich deaktiviert"}
 
@@ -173,22 +183,18 @@ async def get_by_nummer(
     db: Session = Depends(get_db)
 ):
     """Get personnel by stammrollennummer"""
-    personnel = db.query(Personnel).filter(
-        Personnel.stammrollennummer == stammrollennummer,
-        Personnel.is_active == True
-    ).first()
+    personnel = PersonnelIndex.get(db, stammrollennummer)
     
     if not personnel:
         raise HTTPException(status_code=404, detail="Personal nicht gefunden")
     
-    dienstgrad_info = DIENSTGRADE.get(personnel.dienstgrad, (personnel.dienstgrad, 0))
     return {
         "id": personnel.id,
         "stammrollennummer": personnel.stammrollennummer,
         "vorname": personnel.vorname,
         "nachname": personnel.nachname,
         "dienstgrad": personnel.dienstgrad,
-        "dienstgrad_name": dienstgrad_info[0],
-        "dienstgrad_level": dienstgrad_info[1],
+        "dienstgrad_name": personnel.dienstgrad_name,
+        "dienstgrad_level": personnel.dienstgrad_level,
         "group_id": personnel.group_id
     }
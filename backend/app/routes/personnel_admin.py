@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
 from ..database import get_db
 from ..models import PersonnelAdmin, Personnel, AuditLog, AdminUser, DIENSTGRADE
-from ..utils.auth import verify_password, get_password_hash, create_access_token, get_current_user
+from ..utils.auth import verify_password_async, get_password_hash_async, create_access_token, get_current_user
+from ..utils.login_throttle import LoginThrottle
 from ..utils.permissions import check_permission
+from ..services.change_tracker import ChangeTracker
 
 router = APIRouter(prefix="/api/personnel-admin", tags=["personnel-admin"])
 
@@ -46,7 +48,7 @@ async def create_personnel_admin(
         raise HTTPException(status_code=400, detail="Personal hat bereits Admin-Zugriff")
     
     # Create admin access
-    hashed_pwd = get_password_hash(data.password)
+    hashed_pwd = await get_password_hash_async(data.password)
     admin = PersonnelAdmin(
         personnel_id=data.personnel_id,
         hashed_password=hashed_pwd,
@@ -73,9 +75,13 @@ async def create_personnel_admin(
 @router.post("/login")
 async def personnel_admin_login(
     login: PersonnelLoginRequest,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """Login for personnel with admin access"""
+    account = f"personnel:{login.stammrollennummer}"
+    LoginThrottle.check(request, account)
+    
     # Find personnel by stammrollennummer
     personnel = db.query(Personnel).filter(
         Personnel.stammrollennummer == login.stammrollennummer,
@@ -83,6 +89,7 @@ async def personnel_admin_login(
     ).first()
     
     if not personnel:
+        LoginThrottle.failed(account)
         raise HTTPException(status_code=401, detail="Ungültige Anmeldedaten")
     
     # Check if has admin access
@@ -92,11 +99,19 @@ async def personnel_admin_login(
     ).first()
     
     if not admin:
+        LoginThrottle.failed(account)
         raise HTTPException(status_code=401, detail="Kein Admin-Zugriff")
     
-    # Verify password
-    if not verify_password(login.password, admin.hashed_password):
+    # Verify password (off the event loop)
+    valid, new_hash = await verify_password_async(login.password, admin.hashed_password)
+    if not valid:
+        LoginThrottle.failed(account)
         raise HTTPException(status_code=401, detail="Ungültige Anmeldedaten")
+    LoginThrottle.succeeded(account)
+    
+    # Rehash when BCRYPT_ROUNDS changed
+    if new_hash:
+        admin.hashed_password = new_hash
     
     # Update last login
     admin.last_login = datetime.utcnow()
@@ -173,7 +188,7 @@ async def update_personnel_admin(
     
     changes = {}
     if data.password:
-        admin.hashed_password = get_password_hash(data.password)
+        admin.hashed_password = await get_password_hash_async(data.password)
         changes["password"] = "updated"
     
     if data.role is not None:
@@ -184,6 +199,8 @@ async def update_personnel_admin(
         changes["is_active"] = {"old": admin.is_active, "new": data.is_active}
         admin.is_active = data.is_active
     
+    # Logged-in sessions of this admin must see the change
+    ChangeTracker.bump(db, ChangeTracker.USERS)
     db.commit()
     
     # Log action
@@ -214,6 +231,7 @@ async def delete_personnel_admin(
     
     personnel_id = admin.personnel_id
     db.delete(admin)
+    ChangeTracker.bump(db, ChangeTracker.USERS)
     db.commit()
     
     # Log action
@@ -1,18 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Header, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import Response
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 from ..database import get_db
-from ..models import Session as SessionModel, Attendance, Personnel, AdminUser, MIN_RANG_EINSATZ_BEENDEN, DIENSTGRADE, SystemSettings
+from ..models import Session as SessionModel, Attendance, Personnel, AdminUser, ArchivedSession, ArchivedAttendance, MIN_RANG_EINSATZ_BEENDEN, DIENSTGRADE, SystemSettings
 from ..utils.auth import get_current_user, decode_token
 from ..utils.permissions import check_permission
 from ..services.session_manager import SessionManager
-from ..services.qr_generator import QRGenerator
+from ..services.qr_generator import QRGenerator, QR_FORMATS
+from ..services.event_broker import EventBroker
+from ..services.change_tracker import ChangeTracker
+from ..services.live_roster import LiveRoster
+from ..services.checkin_journal import CheckinJournal
+from ..services.personnel_index import PersonnelIndex
+from ..services.session_cache import SessionCache
+from ..services.session_timers import SessionTimers
+from ..services.token_cache import TokenCache
+from ..services.attendance_feed import AttendanceFeed, SESSION_DELETED
+from ..utils.conditional import not_modified
+from ..utils.pagination import encode_cursor, decode_cursor
 
 router = APIRouter(prefix="/api/sessions", tags=["sessions"])
 
+def _kiosk_base_url(db: Session) -> str:
+    """Base URL the check-in QR codes point to (system settings)"""
+    sys_settings = db.query(SystemSettings).first()
+    if sys_settings and sys_settings.kiosk_base_url:
+        return sys_settings.kiosk_base_url
+    return "http://localhost:5173"  # Default fallback
+
 class SessionCreate(BaseModel):
     event_type: str  # Einsatz, Übungsdienst, Arbeitsdienst-A/B/C
 
@@ -24,44 +44,108 @@ class SessionEndWithRank(BaseModel):
 
 @router.get("")
 async def list_sessions(
+    response: Response,
     active_only: bool = False,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """List all sessions"""
-    query = db.query(SessionModel)
+    """List sessions, newest first.
+
+    Pages are addressed by cursor (keyset on started_at, id): the X-Next-Cursor
+    header of a full page points to the next one. skip is still accepted for
+    older clients but gets slow on deep pages.
+    """
+    limit = max(1, min(limit, 500))
+    page = select(SessionModel.id)
     if active_only:
-        query = query.filter(SessionModel.is_active == True)
+        page = page.where(SessionModel.is_active == True)
+    if cursor:
+        try:
+            started_at, session_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Ungültiger Cursor")
+        page = page.where(tuple_(SessionModel.started_at, SessionModel.id) < (started_at, session_id))
+    elif skip:
+        page = page.offset(skip)
+    page = page.order_by(SessionModel.started_at.desc(), SessionModel.id.desc()).limit(limit)
     
-    sessions = query.order_by(SessionModel.started_at.desc()).offset(skip).limit(limit).all()
+    # Attendee counts are stored on the session (SessionCounters)
+    rows = db.execute(page.with_only_columns(
+        SessionModel.id,
+        SessionModel.event_type,
+        SessionModel.started_at,
+        SessionModel.ended_at,
+        SessionModel.is_active,
+        SessionModel.total_attendees,
+        SessionModel.active_attendees,
+        SessionModel.person_seconds
+    )).all()
     
+    now = datetime.now()
+    utc_now = datetime.utcnow()
     result = []
-    for s in sessions:
-        attendances = db.query(Attendance).filter(Attendance.session_id == s.id).all()
-        active_count = sum(1 for a in attendances if a.checked_out_at is None)
-        
+    for session_id, event_type, started_at, ended_at, is_active, total, active, person_seconds in rows:
         # Calculate duration
-        if s.is_active:
-            duration_seconds = int((datetime.now() - s.started_at).total_seconds())
-        elif s.ended_at:
-            duration_seconds = int((s.ended_at - s.started_at).total_seconds())
+        if is_active:
+            duration_seconds = int((now - started_at).total_seconds())
+            # Time of the people still checked in (from the live roster)
+            live = LiveRoster.active_session(db, session_id)
+            if live:
+                person_seconds += sum(
+                    max(0, int((utc_now - entry["checked_in_at"]).total_seconds()))
+                    for entry in live["personnel"].values()
+                )
+        elif ended_at:
+            duration_seconds = int((ended_at - started_at).total_seconds())
         else:
             duration_seconds = 0
         
         result.append({
-            "id": s.id,
-            "event_type": s.event_type,
-            "started_at": s.started_at,
-            "ended_at": s.ended_at,
-            "is_active": s.is_active,
-            "total_attendees": len(attendances),
-            "active_attendees": active_count,
+            "id": session_id,
+            "event_type": event_type,
+            "started_at": started_at,
+            "ended_at": ended_at,
+            "is_active": is_active,
+            "total_attendees": total,
+            "active_attendees": active,
+            "person_minutes": person_seconds // 60,
             "duration_seconds": duration_seconds
         })
     
+    if len(rows) == limit:
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.started_at, last.id)
+    
     return result
 
+def _archived_session_detail(db: Session, session: ArchivedSession) -> dict:
+    """Detail of a session that was moved to the archive (same shape)"""
+    attendances = db.query(ArchivedAttendance, Personnel).join(
+        Personnel, ArchivedAttendance.personnel_id == Personnel.id
+    ).filter(ArchivedAttendance.session_id == session.id).all()
+    
+    return {
+        "id": session.id,
+        "event_type": session.event_type,
+        "started_at": session.started_at,
+        "ended_at": session.ended_at,
+        "is_active": False,
+        "archived": True,
+        "attendances": [{
+            "id": att.id,
+            "personnel_id": personnel.id,
+            "stammrollennummer": personnel.stammrollennummer,
+            "vorname": personnel.vorname,
+            "nachname": personnel.nachname,
+            "dienstgrad": personnel.dienstgrad,
+            "dienstgrad_name": DIENSTGRADE.get(personnel.dienstgrad, (personnel.dienstgrad, 0))[0],
+            "checked_in_at": att.checked_in_at,
+            "checked_out_at": att.checked_out_at
+        } for att, personnel in attendances]
+    }
+
 @router.get("/{session_id}")
 async def get_session(
     session_id: int,
@@ -70,14 +154,24 @@ async def get_session(
     """Get session details"""
     session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
     if not session:
-        raise HTTPException(status_code=404, detail="Session nicht gefunden")
+        archived = db.get(ArchivedSession, session_id)
+        if not archived:
+            raise HTTPException(status_code=404, detail="Session nicht gefunden")
+        return _archived_session_detail(db, archived)
+    
+    # Ended sessions rarely change - serve repeated views from memory
+    cache_key = SessionCache.detail_key(db, session)
+    cached = SessionCache.get_detail(cache_key)
+    if cached:
+        return cached
     
-    # Get attendances with personnel info
-    attendances = db.query(Attendance).filter(Attendance.session_id == session_id).all()
+    # Get attendances with personnel info (one joined query)
+    attendances = db.query(Attendance, Personnel).join(
+        Personnel, Attendance.personnel_id == Personnel.id
+    ).filter(Attendance.session_id == session_id).all()
     
     attendance_list = []
-    for att in attendances:
-        personnel = att.personnel
+    for att, personnel in attendances:
         dienstgrad_info = DIENSTGRADE.get(personnel.dienstgrad, (personnel.dienstgrad, 0))
         attendance_list.append({
             "id": att.id,
@@ -91,7 +185,7 @@ async def get_session(
             "checked_out_at": att.checked_out_at
         })
     
-    return {
+    detail = {
         "id": session.id,
         "event_type": session.event_type,
         "started_at": session.started_at,
@@ -99,10 +193,13 @@ async def get_session(
         "is_active": session.is_active,
         "attendances": attendance_list
     }
+    SessionCache.put_detail(cache_key, detail)
+    return detail
 
 @router.post("")
 async def create_session(
     session: SessionCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     authorization: Optional[str] = Header(None)
 ):
@@ -125,15 +222,31 @@ async def create_session(
     if session.event_type not in valid_types:
         raise HTTPException(status_code=400, detail="Ungültiger Event-Typ")
     
+    started_at = datetime.utcnow()
+    auto_end_at = SessionManager.auto_end_deadline(session.event_type, started_at)
     new_session = SessionModel(
         event_type=session.event_type,
+        started_at=started_at,
         created_by=current_user.id if current_user else None,
-        is_active=True
+        is_active=True,
+        auto_end_at=auto_end_at,
+        auto_end_scheduled=auto_end_at is not None
     )
     db.add(new_session)
+    roster_version = ChangeTracker.bump(db, ChangeTracker.ROSTER)
     db.commit()
     db.refresh(new_session)
     
+    LiveRoster.session_started(roster_version, new_session)
+    SessionTimers.arm(new_session.id, auto_end_at)
+    EventBroker.publish("session_started", {
+        "session_id": new_session.id,
+        "event_type": new_session.event_type,
+        "started_at": new_session.started_at
+    })
+    # Kiosks ask for the QR code right away; have it ready by then
+    background_tasks.add_task(QRGenerator.prerender, new_session.id, _kiosk_base_url(db))
+    
     return {
         "id": new_session.id,
         "event_type": new_session.event_type,
@@ -158,12 +271,12 @@ async def end_session(
     # Check permission
     check_permission(current_user, "sessions:end")
     
-    success = SessionManager.end_session(db, session_id)
-    
-    if success:
-        return {"message": "Session erfolgreich beendet"}
-    else:
+    ended = SessionManager.end_session(db, session_id)
+    if not ended:
         raise HTTPException(status_code=400, detail="Fehler beim Beenden der Session")
+    
+    SessionTimers.cancel(session_id)
+    return {"message": "Session erfolgreich beendet", "checked_out": len(ended["checked_out"])}
 
 @router.post("/{session_id}/end-with-rank")
 async def end_session_with_rank(
@@ -182,31 +295,24 @@ async def end_session_with_rank(
     # Only Einsatz requires rank validation for ending
     if session.event_type == "Einsatz":
         # Find personnel by stammrollennummer
-        personnel = db.query(Personnel).filter(
-            Personnel.stammrollennummer == request.stammrollennummer,
-            Personnel.is_active == True
-        ).first()
+        personnel = PersonnelIndex.get(db, request.stammrollennummer)
         
         if not personnel:
             raise HTTPException(status_code=404, detail="Personal nicht gefunden")
         
-        # Get dienstgrad level
-        dienstgrad_info = DIENSTGRADE.get(personnel.dienstgrad, (personnel.dienstgrad, 0))
-        dienstgrad_level = dienstgrad_info[1]
-        
         # Check if rank is sufficient (UBM = Level 4 or higher)
-        if dienstgrad_level < MIN_RANG_EINSATZ_BEENDEN:
+        if personnel.dienstgrad_level < MIN_RANG_EINSATZ_BEENDEN:
             raise HTTPException(
                 status_code=403, 
                 detail=f"Unzureichender Dienstgrad. Mindestens {DIENSTGRADE.get('UBM', ('UBM', 4))[0]} erforderlich."
             )
     
-    success = SessionManager.end_session(db, session_id)
-    
-    if success:
-        return {"message": "Session erfolgreich beendet"}
-    else:
+    ended = SessionManager.end_session(db, session_id)
+    if not ended:
         raise HTTPException(status_code=400, detail="Fehler beim Beenden der Session")
+    
+    SessionTimers.cancel(session_id)
+    return {"message": "Session erfolgreich beendet", "checked_out": len(ended["checked_out"])}
 
 @router.delete("/{session_id}")
 async def delete_session(
@@ -230,51 +336,42 @@ async def delete_session(
     
     # Delete the session
     db.delete(session)
+    AttendanceFeed.record(db, SESSION_DELETED, session_id)
     db.commit()
+    SessionCache.forget(session_id)
+    SessionTimers.cancel(session_id)
+    TokenCache.forget()  # SQLite may reuse the id
+    
+    EventBroker.publish("session_deleted", {"session_id": session_id})
     
     return {"message": "Session erfolgreich gelöscht"}
 
 @router.get("/active/current")
-async def get_active_sessions(db: Session = Depends(get_db)):
-    """Get all currently active sessions"""
-    sessions = db.query(SessionModel).filter(SessionModel.is_active == True).all()
-    
-    result = []
-    for s in sessions:
-        attendances = db.query(Attendance).filter(
-            Attendance.session_id == s.id,
-            Attendance.checked_out_at == None
-        ).all()
-        
-        active_personnel = []
-        for att in attendances:
-            p = att.personnel
-            dienstgrad_info = DIENSTGRADE.get(p.dienstgrad, (p.dienstgrad, 0))
-            active_personnel.append({
-                "id": p.id,
-                "stammrollennummer": p.stammrollennummer,
-                "vorname": p.vorname,
-                "nachname": p.nachname,
-                "dienstgrad": p.dienstgrad,
-                "dienstgrad_name": dienstgrad_info[0],
-                "checked_in_at": att.checked_in_at
-            })
-        
-        result.append({
-            "id": s.id,
-            "event_type": s.event_type,
-            "started_at": s.started_at,
-            "active_personnel": active_personnel
-        })
+async def get_active_sessions(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
+    """Get all currently active sessions (served from the in-memory roster)"""
+    etag = LiveRoster.etag(db, *CheckinJournal.etag_parts())
+    cached = not_modified(request, response, etag)
+    if cached:
+        return cached
     
-    return result
+    return LiveRoster.active_sessions(db)
 
 @router.get("/{session_id}/qr")
 async def get_session_qr(
     session_id: int,
+    request: Request,
+    response: Response,
+    format: str = "png",
     db: Session = Depends(get_db)
 ):
-    """Generate QR code for session check-in"""
+    """Generate QR code for session check-in (format: png, svg or print)"""
+    if format not in QR_FORMATS:
+        raise HTTPException(status_code=400, detail="Ungültiges Format")
+    
     session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
     if not session:
         raise HTTPException(status_code=404, detail="Session nicht gefunden")
@@ -282,16 +379,22 @@ async def get_session_qr(
     if not session.is_active:
         raise HTTPException(status_code=400, detail="Session ist nicht aktiv")
     
-    # Load kiosk base URL from system settings
-    sys_settings = db.query(SystemSettings).first()
-    base_url = "http://localhost:5173"  # Default fallback
-    if sys_settings and sys_settings.kiosk_base_url:
-        base_url = sys_settings.kiosk_base_url
-    
-    qr_bytes = QRGenerator.generate_qr_code(session_id, base_url)
+    # Rendered once per token epoch (off the event loop); unchanged images
+    # are revalidated with 304
+    image, etag = await run_in_threadpool(
+        QRGenerator.session_qr, session_id, _kiosk_base_url(db), format
+    )
+    cached = not_modified(request, response, etag)
+    if cached:
+        return cached
     
+    media_type, extension = QR_FORMATS[format]
     return Response(
-        content=qr_bytes,
-        media_type="image/png",
-        headers={"Content-Disposition": f"inline; filename=session_{session_id}_qr.png"}
+        content=image,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"inline; filename=session_{session_id}_qr.{extension}",
+            "ETag": etag,
+            "Cache-Control": "no-cache"
+        }
     )
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request, Response
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
@@ -10,6 +10,9 @@ from ..models import FireStation, SystemSettings, AdminUser
 from ..utils.auth import get_current_user
 from ..utils.permissions import check_permission
 from ..services.backup_manager import BackupManager
+from ..services.change_tracker import ChangeTracker
+from ..services.kiosk_state import KioskState
+from ..utils.conditional import version_etag, not_modified
 
 router = APIRouter(prefix="/api/settings", tags=["settings"])
 
@@ -21,30 +24,18 @@ class FireStationUpdate(BaseModel):
     postal_code: Optional[str] = None
 
 @router.get("/firestation")
-async def get_firestation_settings(db: Session = Depends(get_db)):
+async def get_firestation_settings(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
     """Get fire station settings"""
-    fire_station = db.query(FireStation).first()
+    etag = version_etag(db, ChangeTracker.FIRESTATION)
+    cached = not_modified(request, response, etag)
+    if cached:
+        return cached
     
-    if not fire_station:
-        # Create default
-        fire_station = FireStation(
-            name="Freiwillige Feuerwehr",
-            street="",
-            city="",
-            postal_code=""
-        )
-        db.add(fire_station)
-        db.commit()
-        db.refresh(fire_station)
-    
-    return {
-        "id": fire_station.id,
-        "name": fire_station.name,
-        "logo_path": fire_station.logo_path,
-        "street": fire_station.street,
-        "city": fire_station.city,
-        "postal_code": fire_station.postal_code
-    }
+    return KioskState.firestation(db)
 
 @router.put("/firestation")
 async def update_firestation_settings(
@@ -66,6 +57,7 @@ async def update_firestation_settings(
     for field, value in update_data.items():
         setattr(fire_station, field, value)
     
+    ChangeTracker.bump(db, ChangeTracker.FIRESTATION)
     db.commit()
     db.refresh(fire_station)
     return {"message": "Einstellungen erfolgreich aktualisiert"}
@@ -117,6 +109,7 @@ async def upload_logo(
             pass
     
     fire_station.logo_path = file_path
+    ChangeTracker.bump(db, ChangeTracker.FIRESTATION)
     db.commit()
     
     return {"message": "Logo erfolgreich hochgeladen", "path": file_path}
@@ -206,26 +199,18 @@ class SystemSettingsUpdate(BaseModel):
     auto_update_time: Optional[str] = None
 
 @router.get("/system")
-async def get_system_settings(db: Session = Depends(get_db)):
+async def get_system_settings(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
     """Get system settings including kiosk configuration"""
-    settings = db.query(SystemSettings).first()
+    etag = version_etag(db, ChangeTracker.SYSTEM_SETTINGS)
+    cached = not_modified(request, response, etag)
+    if cached:
+        return cached
     
-    if not settings:
-        settings = SystemSettings()
-        db.add(settings)
-        db.commit()
-        db.refresh(settings)
-    
-    return {
-        "kiosk_base_url": settings.kiosk_base_url,
-        "kiosk_show_attendance_list": settings.kiosk_show_attendance_list,
-        "screensaver_enabled": getattr(settings, 'screensaver_enabled', True),
-        "screensaver_timeout": getattr(settings, 'screensaver_timeout', 300),
-        "screensaver_show_logo": getattr(settings, 'screensaver_show_logo', True),
-        "screensaver_show_clock": getattr(settings, 'screensaver_show_clock', True),
-        "auto_update_enabled": getattr(settings, 'auto_update_enabled', False),
-        "auto_update_time": getattr(settings, 'auto_update_time', '03:00')
-    }
+    return KioskState.system_settings(db)
 
 @router.put("/system")
 async def update_system_settings(
@@ -256,6 +241,7 @@ async def update_system_settings(
     for field, value in update_data.items():
         setattr(sys_settings, field, value)
     
+    ChangeTracker.bump(db, ChangeTracker.SYSTEM_SETTINGS)
     db.commit()
     db.refresh(sys_settings)
     return {"message": "System-Einstellungen erfolgreich aktualisiert"}
@@ -5,10 +5,11 @@ from sqlalchemy import func, extract
 from datetime import datetime, timedelta
 from typing import Optional
 from ..database import get_db
-from ..models import Personnel, Attendance, Session as SessionModel
+from ..models import Personnel
 from ..utils.auth import get_current_user
 from ..models import AdminUser
 from ..services.statistics_pdf import StatisticsPDFGenerator
+from ..services.archive_manager import ArchiveManager
 
 router = APIRouter(prefix="/api/statistics", tags=["statistics"])
 
@@ -39,14 +40,25 @@ async def get_personnel_yearly_stats(
     start_date = datetime(year, 1, 1)
     end_date = datetime(year, 12, 31, 23, 59, 59)
     
+    # Hot tables, plus the archive if the year has been archived
+    sources = ArchiveManager.sources(db, start_date)
+    
     # Get all attendances for this person in the year
-    attendances = db.query(Attendance).join(
-        SessionModel, Attendance.session_id == SessionModel.id
-    ).filter(
-        Attendance.personnel_id == personnel_id,
-        SessionModel.started_at >= start_date,
-        SessionModel.started_at <= end_date
-    ).all()
+    attendances = []
+    for SessionTable, AttendanceTable in sources:
+        attendances += db.query(
+            AttendanceTable.checked_in_at,
+            AttendanceTable.checked_out_at,
+            SessionTable.event_type,
+            SessionTable.started_at,
+            SessionTable.ended_at
+        ).join(
+            SessionTable, AttendanceTable.session_id == SessionTable.id
+        ).filter(
+            AttendanceTable.personnel_id == personnel_id,
+            SessionTable.started_at >= start_date,
+            SessionTable.started_at <= end_date
+        ).all()
     
     # Calculate statistics
     total_sessions = len(attendances)
@@ -57,8 +69,7 @@ async def get_personnel_yearly_stats(
     monthly_data = {i: {"count": 0, "hours": 0.0} for i in range(1, 13)}
     
     for att in attendances:
-        session = att.session
-        event_type = session.event_type
+        event_type = att.event_type
         
         # Count by type
         if event_type not in event_type_counts:
@@ -68,36 +79,33 @@ async def get_personnel_yearly_stats(
         # Calculate hours
         if att.checked_out_at:
             duration = (att.checked_out_at - att.checked_in_at).total_seconds() / 3600
-        elif session.ended_at:
-            duration = (session.ended_at - att.checked_in_at).total_seconds() / 3600
+        elif att.ended_at:
+            duration = (att.ended_at - att.checked_in_at).total_seconds() / 3600
         else:
             duration = 0
         
         total_hours += duration
         
         # Monthly breakdown
-        month = session.started_at.month
+        month = att.started_at.month
         monthly_data[month]["count"] += 1
         monthly_data[month]["hours"] += duration
     
-    # Get total sessions in the year for attendance rate
-    total_sessions_in_year = db.query(SessionModel).filter(
-        SessionModel.started_at >= start_date,
-        SessionModel.started_at <= end_date
-    ).count()
-    
-    # Get total sessions by type in the year
+    # Get total sessions by type in the year (for the attendance rates)
     total_sessions_by_type = {}
-    sessions_by_type = db.query(
-        SessionModel.event_type,
-        func.count(SessionModel.id).label('count')
-    ).filter(
-        SessionModel.started_at >= start_date,
-        SessionModel.started_at <= end_date
-    ).group_by(SessionModel.event_type).all()
+    for SessionTable, _ in sources:
+        sessions_by_type = db.query(
+            SessionTable.event_type,
+            func.count(SessionTable.id).label('count')
+        ).filter(
+            SessionTable.started_at >= start_date,
+            SessionTable.started_at <= end_date
+        ).group_by(SessionTable.event_type).all()
+        
+        for row in sessions_by_type:
+            total_sessions_by_type[row.event_type] = total_sessions_by_type.get(row.event_type, 0) + row.count
     
-    for row in sessions_by_type:
-        total_sessions_by_type[row.event_type] = row.count
+    total_sessions_in_year = sum(total_sessions_by_type.values())
     
     # Calculate attendance rates by type
     event_type_details = {}
@@ -171,11 +179,20 @@ async def get_unit_yearly_stats(
     start_date = datetime(year, 1, 1)
     end_date = datetime(year, 12, 31, 23, 59, 59)
     
+    # Hot tables, plus the archive if the year has been archived
+    sources = ArchiveManager.sources(db, start_date)
+    
     # Get all sessions in the year
-    sessions = db.query(SessionModel).filter(
-        SessionModel.started_at >= start_date,
-        SessionModel.started_at <= end_date
-    ).all()
+    sessions = []
+    for SessionTable, _ in sources:
+        sessions += db.query(
+            SessionTable.event_type,
+            SessionTable.started_at,
+            SessionTable.total_attendees
+        ).filter(
+            SessionTable.started_at >= start_date,
+            SessionTable.started_at <= end_date
+        ).all()
     
     total_sessions = len(sessions)
     
@@ -197,45 +214,44 @@ async def get_unit_yearly_stats(
         monthly_sessions[month][event_type] += 1
         
         # Count attendances
-        total_attendances += len(session.attendances)
+        total_attendances += session.total_attendees
     
     avg_attendance_per_session = (total_attendances / total_sessions) if total_sessions > 0 else 0
     
-    # Get personnel statistics
-    personnel_stats = db.query(
+    # Attendances per person in the year
+    attendance_counts = {}
+    for SessionTable, AttendanceTable in sources:
+        per_person = db.query(
+            AttendanceTable.personnel_id,
+            func.count(AttendanceTable.id)
+        ).join(
+            SessionTable, AttendanceTable.session_id == SessionTable.id
+        ).filter(
+            SessionTable.started_at >= start_date,
+            SessionTable.started_at <= end_date
+        ).group_by(
+            AttendanceTable.personnel_id
+        ).all()
+        for personnel_id, count in per_person:
+            attendance_counts[personnel_id] = attendance_counts.get(personnel_id, 0) + count
+    
+    counted_personnel = db.query(
         Personnel.id,
         Personnel.stammrollennummer,
         Personnel.vorname,
         Personnel.nachname,
-        Personnel.dienstgrad,
-        func.count(Attendance.id).label('attendance_count')
-    ).join(
-        Attendance, Personnel.id == Attendance.personnel_id
-    ).join(
-        SessionModel, Attendance.session_id == SessionModel.id
-    ).filter(
-        SessionModel.started_at >= start_date,
-        SessionModel.started_at <= end_date
-    ).group_by(
-        Personnel.id
-    ).order_by(
-        func.count(Attendance.id).desc()
-    ).limit(10).all()
+        Personnel.dienstgrad
+    ).filter(Personnel.id.in_(attendance_counts.keys())).all()
+    
+    # Get personnel statistics
+    personnel_stats = sorted(
+        counted_personnel, key=lambda p: attendance_counts[p.id], reverse=True
+    )[:10]
     
     # Statistics by rank
-    rank_stats = db.query(
-        Personnel.dienstgrad,
-        func.count(Attendance.id).label('attendance_count')
-    ).join(
-        Attendance, Personnel.id == Attendance.personnel_id
-    ).join(
-        SessionModel, Attendance.session_id == SessionModel.id
-    ).filter(
-        SessionModel.started_at >= start_date,
-        SessionModel.started_at <= end_date
-    ).group_by(
-        Personnel.dienstgrad
-    ).all()
+    rank_counts = {}
+    for p in counted_personnel:
+        rank_counts[p.dienstgrad] = rank_counts.get(p.dienstgrad, 0) + attendance_counts[p.id]
     
     # Format monthly data
     monthly_data = []
@@ -261,17 +277,17 @@ async def get_unit_yearly_stats(
                 "stammrollennummer": p.stammrollennummer,
                 "name": f"{p.vorname} {p.nachname}",
                 "dienstgrad": p.dienstgrad,
-                "attendance_count": p.attendance_count,
-                "attendance_rate": round((p.attendance_count / total_sessions * 100), 2) if total_sessions > 0 else 0
+                "attendance_count": attendance_counts[p.id],
+                "attendance_rate": round((attendance_counts[p.id] / total_sessions * 100), 2) if total_sessions > 0 else 0
             }
             for p in personnel_stats
         ],
         "by_rank": [
             {
-                "dienstgrad": rank.dienstgrad,
-                "attendance_count": rank.attendance_count
+                "dienstgrad": dienstgrad,
+                "attendance_count": count
             }
-            for rank in rank_stats
+            for dienstgrad, count in rank_counts.items()
         ],
         "monthly": monthly_data
     }
@@ -304,29 +320,38 @@ async def get_personnel_history(
     else:
         end_dt = datetime.now()
     
-    # Get attendances
-    attendances = db.query(Attendance).join(
-        SessionModel, Attendance.session_id == SessionModel.id
-    ).filter(
-        Attendance.personnel_id == personnel_id,
-        SessionModel.started_at >= start_dt,
-        SessionModel.started_at <= end_dt
-    ).order_by(SessionModel.started_at.desc()).all()
+    # Get attendances (hot tables, plus the archive for older periods)
+    attendances = []
+    for SessionTable, AttendanceTable in ArchiveManager.sources(db, start_dt):
+        attendances += db.query(
+            AttendanceTable.checked_in_at,
+            AttendanceTable.checked_out_at,
+            SessionTable.id.label("session_id"),
+            SessionTable.event_type,
+            SessionTable.started_at,
+            SessionTable.ended_at
+        ).join(
+            SessionTable, AttendanceTable.session_id == SessionTable.id
+        ).filter(
+            AttendanceTable.personnel_id == personnel_id,
+            SessionTable.started_at >= start_dt,
+            SessionTable.started_at <= end_dt
+        ).all()
+    attendances.sort(key=lambda att: att.started_at, reverse=True)
     
     history = []
     for att in attendances:
-        session = att.session
         duration_minutes = None
         if att.checked_out_at:
             duration_minutes = int((att.checked_out_at - att.checked_in_at).total_seconds() / 60)
-        elif session.ended_at:
-            duration_minutes = int((session.ended_at - att.checked_in_at).total_seconds() / 60)
+        elif att.ended_at:
+            duration_minutes = int((att.ended_at - att.checked_in_at).total_seconds() / 60)
         
         history.append({
-            "session_id": session.id,
-            "event_type": session.event_type,
-            "date": session.started_at.strftime("%Y-%m-%d"),
-            "time": session.started_at.strftime("%H:%M"),
+            "session_id": att.session_id,
+            "event_type": att.event_type,
+            "date": att.started_at.strftime("%Y-%m-%d"),
+            "time": att.started_at.strftime("%H:%M"),
             "checked_in_at": att.checked_in_at.isoformat(),
             "checked_out_at": att.checked_out_at.isoformat() if att.checked_out_at else None,
             "duration_minutes": duration_minutes
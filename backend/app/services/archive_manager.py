@@ -0,0 +1,140 @@
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy import delete, func, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from ..models import Session as SessionModel, Attendance, ArchivedSession, ArchivedAttendance, ChangeCounter
+
+# Years kept in the hot tables, counting the current one (0 = never archive)
+ARCHIVE_KEEP_YEARS = int(os.getenv("ARCHIVE_KEEP_YEARS", "2"))
+# Sessions moved per transaction (keeps the SQLite write lock short)
+ARCHIVE_BATCH_SESSIONS = 500
+# Row in change_counters whose updated_at marks the last archive run
+ARCHIVE_CLAIM_KEY = "archive_run"
+# Runs started within this time of the last one are skipped
+ARCHIVE_CLAIM_INTERVAL = timedelta(hours=1)
+
+
+class ArchiveManager:
+    """Moves the sessions of closed years into the archive tables.
+
+    Kiosks, the live roster and most admin views only touch recent
+    sessions, so the hot sessions/attendances tables and their indexes stay
+    small. Statistics and history read both via sources().
+    """
+
+    @staticmethod
+    def cutoff(keep_years: int = ARCHIVE_KEEP_YEARS) -> Optional[datetime]:
+        """Sessions started before this are archived (None = archiving off)"""
+        if keep_years <= 0:
+            return None
+        return datetime(datetime.utcnow().year - keep_years + 1, 1, 1)
+
+    @staticmethod
+    def claim_run(db: Session) -> bool:
+        """Claim tonight's archive run, False if another worker already has.
+
+        Every worker process schedules the nightly job; a conditional update
+        of a shared row lets exactly one of them run it.
+        """
+        now = datetime.utcnow()
+        result = db.execute(
+            update(ChangeCounter)
+            .where(
+                ChangeCounter.key == ARCHIVE_CLAIM_KEY,
+                ChangeCounter.updated_at < now - ARCHIVE_CLAIM_INTERVAL
+            )
+            .values(version=ChangeCounter.version + 1, updated_at=now)
+        )
+        if result.rowcount:
+            db.commit()
+            return True
+
+        exists = db.execute(
+            select(ChangeCounter.key).where(ChangeCounter.key == ARCHIVE_CLAIM_KEY)
+        ).first()
+        if exists:
+            db.rollback()
+            return False
+        db.add(ChangeCounter(key=ARCHIVE_CLAIM_KEY, version=1, updated_at=now))
+        try:
+            db.commit()
+        except IntegrityError:
+            # First run ever, claimed concurrently by another worker
+            db.rollback()
+            return False
+        return True
+
+    @staticmethod
+    def archive_closed_years(db: Session, keep_years: int = ARCHIVE_KEEP_YEARS) -> int:
+        """Move ended sessions before the cutoff with their attendances, returns the number moved"""
+        cutoff = ArchiveManager.cutoff(keep_years)
+        if cutoff is None:
+            return 0
+
+        # The newest session always stays, otherwise SQLite could hand out
+        # its id again once the hot table is empty
+        newest_id = db.query(func.max(SessionModel.id)).scalar()
+        archived_at = datetime.utcnow()
+        moved = 0
+        while True:
+            session_ids = list(db.execute(
+                select(SessionModel.id)
+                .where(
+                    SessionModel.started_at < cutoff,
+                    SessionModel.is_active == False,
+                    SessionModel.id != newest_id
+                )
+                .order_by(SessionModel.started_at)
+                .limit(ARCHIVE_BATCH_SESSIONS)
+            ).scalars())
+            if not session_ids:
+                break
+
+            db.execute(insert(ArchivedSession).from_select(
+                ["id", "event_type", "started_at", "ended_at", "created_by",
+                 "total_attendees", "person_seconds", "archived_at"],
+                select(
+                    SessionModel.id,
+                    SessionModel.event_type,
+                    SessionModel.started_at,
+                    SessionModel.ended_at,
+                    SessionModel.created_by,
+                    SessionModel.total_attendees,
+                    SessionModel.person_seconds,
+                    literal(archived_at)
+                ).where(SessionModel.id.in_(session_ids))
+            ))
+            db.execute(insert(ArchivedAttendance).from_select(
+                ["session_id", "personnel_id", "checked_in_at", "checked_out_at"],
+                select(
+                    Attendance.session_id,
+                    Attendance.personnel_id,
+                    Attendance.checked_in_at,
+                    Attendance.checked_out_at
+                ).where(Attendance.session_id.in_(session_ids))
+            ))
+            db.execute(delete(Attendance).where(Attendance.session_id.in_(session_ids)))
+            db.execute(delete(SessionModel).where(SessionModel.id.in_(session_ids)))
+            db.commit()
+            moved += len(session_ids)
+
+        return moved
+
+    @staticmethod
+    def sources(db: Session, start: datetime) -> List[Tuple[type, type]]:
+        """(session model, attendance model) pairs that hold sessions started at or after start"""
+        sources = [(SessionModel, Attendance)]
+        archived_until = db.query(func.max(ArchivedSession.started_at)).scalar()
+        if archived_until is not None and start <= archived_until:
+            sources.append((ArchivedSession, ArchivedAttendance))
+        return sources
+
+    @staticmethod
+    def get_session(db: Session, session_id: int):
+        """Session by id from the hot table, otherwise from the archive"""
+        session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
+        if session is None:
+            session = db.get(ArchivedSession, session_id)
+        return session
@@ -0,0 +1,105 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+from ..models import AttendanceEvent, Personnel
+
+CHECKIN = "checkin"
+CHECKOUT = "checkout"
+AUTO_CHECKOUT = "auto_checkout"
+SESSION_DELETED = "session_deleted"
+
+
+class AttendanceFeed:
+    """Append-only attendance change log with cursor pagination.
+
+    Entries are written in the same transaction as the change itself. Reads
+    are a primary-key range scan (id > cursor), so their cost depends on the
+    page size and not on how much history the table holds.
+    """
+
+    MAX_LIMIT = 500
+
+    @staticmethod
+    def record(
+        db: Session,
+        event_type: str,
+        session_id: int,
+        personnel_id: Optional[int] = None,
+        attendance_id: Optional[int] = None,
+        occurred_at: Optional[datetime] = None,
+        client_key: Optional[str] = None,
+        client_timestamp: Optional[datetime] = None
+    ):
+        """Add a feed entry to the caller's transaction (no commit)"""
+        db.add(AttendanceEvent(
+            event_type=event_type,
+            session_id=session_id,
+            personnel_id=personnel_id,
+            attendance_id=attendance_id,
+            occurred_at=occurred_at or datetime.utcnow(),
+            client_key=client_key,
+            client_timestamp=client_timestamp
+        ))
+
+    @staticmethod
+    def record_many(db: Session, entries: List[dict]):
+        """Bulk-add feed entries (dicts with AttendanceEvent columns)"""
+        if entries:
+            db.execute(insert(AttendanceEvent), entries)
+
+    @staticmethod
+    def by_client_keys(db: Session, client_keys: List[str]) -> Dict[str, AttendanceEvent]:
+        """Entries already recorded for these idempotency keys"""
+        client_keys = [key for key in client_keys if key]
+        if not client_keys:
+            return {}
+        events = db.query(AttendanceEvent).filter(AttendanceEvent.client_key.in_(client_keys)).all()
+        return {event.client_key: event for event in events}
+
+    @staticmethod
+    def head(db: Session) -> int:
+        """Cursor of the newest entry (0 if empty)"""
+        return db.query(func.max(AttendanceEvent.id)).scalar() or 0
+
+    @staticmethod
+    def changes(db: Session, since: int, limit: int = 100, session_id: Optional[int] = None) -> dict:
+        """Entries after cursor `since`, oldest first"""
+        limit = max(1, min(limit, AttendanceFeed.MAX_LIMIT))
+
+        query = db.query(
+            AttendanceEvent,
+            Personnel.stammrollennummer,
+            Personnel.vorname,
+            Personnel.nachname
+        ).outerjoin(
+            Personnel, AttendanceEvent.personnel_id == Personnel.id
+        ).filter(AttendanceEvent.id > since)
+
+        if session_id is not None:
+            query = query.filter(AttendanceEvent.session_id == session_id)
+
+        # One extra row tells us whether another page follows
+        rows = query.order_by(AttendanceEvent.id).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        changes = []
+        for event, stammrollennummer, vorname, nachname in rows:
+            changes.append({
+                "cursor": event.id,
+                "event_type": event.event_type,
+                "session_id": event.session_id,
+                "attendance_id": event.attendance_id,
+                "personnel_id": event.personnel_id,
+                "stammrollennummer": stammrollennummer,
+                "vorname": vorname,
+                "nachname": nachname,
+                "occurred_at": event.occurred_at
+            })
+
+        return {
+            "changes": changes,
+            "next_cursor": changes[-1]["cursor"] if changes else since,
+            "has_more": has_more
+        }
@@ -0,0 +1,248 @@
+import os
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from ..models import Attendance, Session as SessionModel
+from .attendance_feed import AttendanceFeed, CHECKIN, CHECKOUT
+from .change_tracker import ChangeTracker
+from .event_broker import EventBroker
+from .live_roster import roster_entry
+from .personnel_index import PersonnelIndex
+from .session_counters import SessionCounters, attendance_seconds
+
+APPLIED = "applied"
+DUPLICATE = "duplicate"
+REJECTED = "rejected"
+
+# Queued kiosk bookings older than this are rejected (hours, 0 = no limit)
+REPLAY_MAX_AGE_HOURS = float(os.getenv("REPLAY_MAX_AGE_HOURS", "24"))
+
+
+def client_time(
+    client_timestamp: Optional[datetime],
+    not_before: Optional[datetime] = None,
+    not_after: Optional[datetime] = None
+) -> datetime:
+    """Time of a kiosk action as naive UTC, kept within sensible bounds.
+
+    Kiosk clocks can be off, so the client time never lies in the future
+    and never before the start of the session (or the check-in).
+    """
+    now = datetime.utcnow()
+    if client_timestamp is None:
+        moment = now
+    elif client_timestamp.tzinfo is not None:
+        moment = client_timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    else:
+        moment = client_timestamp
+
+    moment = min(moment, not_after or now, now)
+    if not_before and moment < not_before:
+        moment = not_before
+    return moment
+
+
+class AttendanceReplay:
+    """Applies check-ins and check-outs that a kiosk queued while offline.
+
+    The whole batch is one transaction. Entries are applied in the order of
+    their client timestamps, entries whose idempotency key was already
+    recorded are skipped. Check-ins into a session that has been ended in
+    the meantime are stored as attendances closed at the session end;
+    check-outs that arrive after the session end move the check-out the
+    session end made back to their own time. Both only for bookings made
+    before the session end, and entries older than REPLAY_MAX_AGE_HOURS
+    are rejected, so a replay cannot rewrite old sessions.
+    """
+
+    MAX_ENTRIES = 500
+
+    @staticmethod
+    def _closed_at_end(db: Session, session: SessionModel, personnel_id: int) -> Optional[Attendance]:
+        """Attendance of an ended session that was closed by the session end"""
+        return db.query(Attendance).filter(
+            Attendance.session_id == session.id,
+            Attendance.personnel_id == personnel_id,
+            Attendance.checked_out_at == session.ended_at
+        ).order_by(Attendance.checked_in_at.desc()).first()
+
+    @staticmethod
+    def apply(
+        db: Session,
+        entries: List[dict],
+        publish: bool = True,
+        max_age_hours: float = REPLAY_MAX_AGE_HOURS
+    ) -> List[dict]:
+        """Apply queued entries and commit, returns a result per entry.
+
+        publish=False skips the push notifications (for callers that already
+        announced the changes). max_age_hours=0 accepts entries of any age.
+        """
+        results: List[Optional[dict]] = [None] * len(entries)
+        oldest = datetime.utcnow() - timedelta(hours=max_age_hours) if max_age_hours > 0 else None
+
+        known = AttendanceFeed.by_client_keys(db, [e["client_key"] for e in entries])
+        pending = []
+        batch_keys = set()
+        for i, entry in enumerate(entries):
+            key = entry["client_key"]
+            if key in known or key in batch_keys:
+                results[i] = {"client_key": key, "status": DUPLICATE}
+                continue
+            batch_keys.add(key)
+            # Journaled bookings carry the server time they were acknowledged at
+            moment = entry.get("occurred_at") or client_time(entry.get("client_timestamp"))
+            pending.append((moment, i, entry))
+        pending.sort(key=lambda item: (item[0], item[1]))
+
+        session_ids = {entry["session_id"] for _, _, entry in pending}
+        sessions = {}
+        if session_ids:
+            sessions = {
+                s.id: s for s in db.query(SessionModel).filter(SessionModel.id.in_(session_ids)).all()
+            }
+        people = PersonnelIndex.get_many(
+            db, list({entry["stammrollennummer"] for _, _, entry in pending}), active_only=False
+        )
+
+        # Open attendances as seen by this batch, (session_id, personnel_id) -> Attendance
+        open_attendances = {}
+        personnel_ids = {person.id for person in people.values()}
+        if sessions and personnel_ids:
+            for attendance in db.query(Attendance).filter(
+                Attendance.session_id.in_(sessions.keys()),
+                Attendance.personnel_id.in_(personnel_ids),
+                Attendance.checked_out_at == None
+            ).all():
+                open_attendances[(attendance.session_id, attendance.personnel_id)] = attendance
+
+        applied = []
+        # State of every touched attendance before this batch, for the
+        # counters: id -> (attendance, inserted, counted seconds or None if open)
+        before = {}
+        for moment, i, entry in pending:
+            key = entry["client_key"]
+            session = sessions.get(entry["session_id"])
+            person = people.get(entry["stammrollennummer"])
+            if not session:
+                results[i] = {"client_key": key, "status": REJECTED, "detail": "Session nicht gefunden"}
+                continue
+            if oldest and moment < oldest:
+                results[i] = {"client_key": key, "status": REJECTED, "detail": "Buchung zu alt"}
+                continue
+            if not session.is_active and (session.ended_at is None or moment >= session.ended_at):
+                results[i] = {"client_key": key, "status": REJECTED, "detail": "Session ist nicht aktiv"}
+                continue
+            if not person:
+                results[i] = {"client_key": key, "status": REJECTED, "detail": "Personal nicht gefunden"}
+                continue
+
+            pair = (session.id, person.id)
+            attendance = open_attendances.get(pair)
+            action = entry.get("action") or "toggle"
+            if action == "toggle":
+                action = "checkout" if attendance else "checkin"
+
+            if action == "checkin":
+                if attendance:
+                    results[i] = {"client_key": key, "status": REJECTED, "detail": "Bereits eingecheckt"}
+                    continue
+                if not person.is_active:
+                    results[i] = {"client_key": key, "status": REJECTED, "detail": "Personal nicht gefunden"}
+                    continue
+                checked_in_at = client_time(moment, session.started_at, session.ended_at)
+                attendance = Attendance(
+                    session_id=session.id,
+                    personnel_id=person.id,
+                    checked_in_at=checked_in_at,
+                    checked_out_at=None if session.is_active else session.ended_at
+                )
+                db.add(attendance)
+                open_attendances[pair] = attendance
+                before[id(attendance)] = (attendance, True, None)
+                applied.append((i, CHECKIN, session, person, attendance, checked_in_at, entry))
+            else:
+                if attendance:
+                    del open_attendances[pair]
+                    before.setdefault(id(attendance), (attendance, False, None))
+                elif not session.is_active:
+                    # The session end checked the person out before this
+                    # checkout reached the database - move it back
+                    attendance = AttendanceReplay._closed_at_end(db, session, person.id)
+                    if attendance:
+                        before.setdefault(id(attendance), (
+                            attendance, False,
+                            attendance_seconds(attendance.checked_in_at, attendance.checked_out_at)
+                        ))
+                if not attendance:
+                    results[i] = {"client_key": key, "status": REJECTED, "detail": "Kein aktiver Check-in gefunden"}
+                    continue
+                attendance.checked_out_at = client_time(moment, attendance.checked_in_at, session.ended_at)
+                applied.append((i, CHECKOUT, session, person, attendance, attendance.checked_out_at, entry))
+
+        if not applied:
+            db.rollback()
+            return results
+
+        db.flush()
+        AttendanceFeed.record_many(db, [{
+            "event_type": event_type,
+            "session_id": session.id,
+            "personnel_id": person.id,
+            "attendance_id": attendance.id,
+            "occurred_at": occurred_at,
+            "client_key": entry["client_key"],
+            "client_timestamp": client_time(entry["client_timestamp"]) if entry.get("client_timestamp") else None
+        } for _, event_type, session, person, attendance, occurred_at, entry in applied])
+
+        # Push notifications for sessions that are still running
+        notifications = []
+        for i, event_type, session, person, attendance, occurred_at, entry in applied:
+            results[i] = {
+                "client_key": entry["client_key"],
+                "status": APPLIED,
+                "action": event_type,
+                "attendance_id": attendance.id,
+                "occurred_at": occurred_at
+            }
+            if not publish or not session.is_active:
+                continue
+            if event_type == CHECKIN:
+                notifications.append(("checkin", {"session_id": session.id, **roster_entry(attendance, person)}))
+            else:
+                notifications.append(("checkout", {
+                    "session_id": session.id,
+                    "attendance_id": attendance.id,
+                    "personnel_id": person.id,
+                    "stammrollennummer": person.stammrollennummer,
+                    "checked_out_at": attendance.checked_out_at
+                }))
+
+        # Counter deltas per session, one UPDATE each. A batch can check a
+        # person in and out again, so every attendance counts once, by its
+        # final state against its state before the batch
+        deltas = {}
+        for attendance, inserted, counted_seconds in before.values():
+            total, active, seconds = deltas.get(attendance.session_id, (0, 0, 0))
+            is_open = attendance.checked_out_at is None
+            if inserted:
+                total += 1
+            if is_open:
+                active += 1 if inserted else 0
+            else:
+                if counted_seconds is None and not inserted:
+                    active -= 1
+                seconds += attendance_seconds(attendance.checked_in_at, attendance.checked_out_at)
+                seconds -= counted_seconds or 0
+            deltas[attendance.session_id] = (total, active, seconds)
+        for session_id, (total, active, seconds) in deltas.items():
+            SessionCounters.add(db, session_id, total, active, seconds)
+
+        # No local roster delta - the version bump makes the next read rebuild
+        ChangeTracker.bump(db, ChangeTracker.ROSTER)
+        db.commit()
+
+        for event_type, data in notifications:
+            EventBroker.publish(event_type, data)
+
+        return results
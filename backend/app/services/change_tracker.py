@@ -0,0 +1,146 @@
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import event, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from ..models import ChangeCounter
+
+
+class ChangeTracker:
+    """Shared change counters for state that every worker process must see.
+
+    Writers bump a counter inside the transaction that makes the change. Once
+    that transaction commits, listeners in the writing process are notified
+    immediately; other worker processes pick the new version up via poll().
+    """
+
+    KIOSK_REFRESH = "kiosk_refresh"
+    ROSTER = "roster"
+    SYSTEM_SETTINGS = "system_settings"
+    FIRESTATION = "firestation"
+    ANNOUNCEMENTS = "announcements"
+    NEWS = "news"
+    PERSONNEL = "personnel"
+    USERS = "users"
+
+    KEYS = [KIOSK_REFRESH, ROSTER, SYSTEM_SETTINGS, FIRESTATION, ANNOUNCEMENTS, NEWS, PERSONNEL, USERS]
+
+    _listeners: Dict[str, List[Callable]] = {}
+    _remote_listeners: Dict[str, List[Callable]] = {}
+    _seen: Dict[str, int] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def ensure_counters(db: Session):
+        """Create missing counter rows and remember the current versions"""
+        existing = {row.key for row in db.execute(select(ChangeCounter.key))}
+        for key in ChangeTracker.KEYS:
+            if key in existing:
+                continue
+            db.add(ChangeCounter(key=key, version=0, updated_at=datetime.utcnow()))
+            try:
+                db.commit()
+            except IntegrityError:
+                # Created concurrently by another worker
+                db.rollback()
+
+        rows = db.execute(select(ChangeCounter.key, ChangeCounter.version)).all()
+        with ChangeTracker._lock:
+            for row in rows:
+                ChangeTracker._seen[row.key] = max(ChangeTracker._seen.get(row.key, 0), row.version)
+
+    @staticmethod
+    def bump(db: Session, key: str) -> int:
+        """Increment a counter within the caller's transaction (no commit)"""
+        now = datetime.utcnow()
+        result = db.execute(
+            update(ChangeCounter)
+            .where(ChangeCounter.key == key)
+            .values(version=ChangeCounter.version + 1, updated_at=now)
+        )
+        if result.rowcount == 0:
+            db.add(ChangeCounter(key=key, version=1, updated_at=now))
+            db.flush()
+            version = 1
+        else:
+            version = db.execute(
+                select(ChangeCounter.version).where(ChangeCounter.key == key)
+            ).scalar_one()
+
+        db.info.setdefault("pending_changes", {})[key] = (version, now)
+        return version
+
+    @staticmethod
+    def current(db: Session, key: str) -> Tuple[int, Optional[datetime]]:
+        """Read the shared version and change time of a counter"""
+        row = db.execute(
+            select(ChangeCounter.version, ChangeCounter.updated_at).where(ChangeCounter.key == key)
+        ).first()
+        if not row:
+            return 0, None
+        return row.version, row.updated_at
+
+    @staticmethod
+    def versions(db: Session, *keys: str) -> Tuple[int, ...]:
+        """Shared versions of several counters in one query (0 if missing)"""
+        rows = dict(db.execute(
+            select(ChangeCounter.key, ChangeCounter.version).where(ChangeCounter.key.in_(keys))
+        ).all())
+        return tuple(rows.get(key, 0) for key in keys)
+
+    @staticmethod
+    def on_change(key: str, callback: Callable):
+        """Register callback(version, updated_at) for a counter"""
+        with ChangeTracker._lock:
+            ChangeTracker._listeners.setdefault(key, []).append(callback)
+
+    @staticmethod
+    def on_remote_change(key: str, callback: Callable):
+        """Register callback(version, updated_at) for versions committed by other workers"""
+        with ChangeTracker._lock:
+            ChangeTracker._remote_listeners.setdefault(key, []).append(callback)
+
+    @staticmethod
+    def announce(key: str, version: int, updated_at: Optional[datetime] = None, remote: bool = False):
+        """Notify local listeners once per new version"""
+        with ChangeTracker._lock:
+            if version <= ChangeTracker._seen.get(key, 0):
+                return
+            ChangeTracker._seen[key] = version
+            listeners = list(ChangeTracker._listeners.get(key, []))
+            if remote:
+                listeners += ChangeTracker._remote_listeners.get(key, [])
+
+        for callback in listeners:
+            try:
+                callback(version, updated_at)
+            except Exception as e:
+                print(f"Change listener for {key} failed: {e}")
+
+    @staticmethod
+    def snapshot(db: Session) -> Dict[str, Tuple[int, Optional[datetime]]]:
+        """Read all counters in one query"""
+        rows = db.execute(
+            select(ChangeCounter.key, ChangeCounter.version, ChangeCounter.updated_at)
+        ).all()
+        return {row.key: (row.version, row.updated_at) for row in rows}
+
+    @staticmethod
+    def poll(db: Session):
+        """Announce changes committed by other worker processes"""
+        for key, (version, updated_at) in ChangeTracker.snapshot(db).items():
+            ChangeTracker.announce(key, version, updated_at, remote=True)
+
+
+@event.listens_for(Session, "after_commit")
+def _announce_committed_changes(session):
+    pending = session.info.pop("pending_changes", None)
+    if pending:
+        for key, (version, updated_at) in pending.items():
+            ChangeTracker.announce(key, version, updated_at)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_changes(session):
+    session.info.pop("pending_changes", None)
@@ -0,0 +1,272 @@
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy.exc import IntegrityError
+from ..database import SessionLocal
+from .attendance_replay import AttendanceReplay, APPLIED, DUPLICATE, REJECTED
+from .live_roster import LiveRoster
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Write-behind journal for check-ins/check-outs (empty = off, write directly)
+JOURNAL_PATH = os.getenv("ATTENDANCE_JOURNAL", "")
+JOURNAL_FLUSH_SECONDS = float(os.getenv("ATTENDANCE_JOURNAL_FLUSH_SECONDS", "0.5"))
+
+
+class CheckinJournal:
+    """Durable write-behind buffer for kiosk check-ins and check-outs.
+
+    Each booking is appended to a local file and fsync'd before it is
+    acknowledged; a background thread writes the bookings to the database in
+    batches (one transaction per batch, via AttendanceReplay). Every entry
+    carries an idempotency key, so replaying the file after a crash cannot
+    book anything twice. Until an entry is stored, the live roster shows it
+    as a pending change.
+
+    Only one process can own the journal (file lock); additional uvicorn
+    workers write directly to the database.
+    """
+
+    _file = None
+    _lock_file = None
+    _pending: List[dict] = []
+    _keys: Dict[str, dict] = {}
+    _revision = 0
+    _lock = threading.RLock()
+    _flush_lock = threading.Lock()
+    _wakeup = threading.Event()
+    _stopping = threading.Event()
+    _thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def is_active() -> bool:
+        return CheckinJournal._file is not None
+
+    @staticmethod
+    def start(path: str = JOURNAL_PATH):
+        """Open the journal, load unflushed entries and start the writer"""
+        if not path or CheckinJournal.is_active():
+            return
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        if fcntl:
+            lock_file = open(path + ".lock", "w")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                print(f"⚠️  Check-in journal {path} is used by another worker - writing directly")
+                return
+            CheckinJournal._lock_file = lock_file
+
+        entries = CheckinJournal._read(path)
+        with CheckinJournal._lock:
+            CheckinJournal._pending = entries
+            CheckinJournal._keys = {entry["client_key"]: entry for entry in entries}
+            CheckinJournal._file = open(path, "a", encoding="utf-8")
+            CheckinJournal._revision += 1
+        if entries:
+            print(f"Check-in journal: replaying {len(entries)} unsaved booking(s)")
+
+        LiveRoster.set_pending_source(CheckinJournal.pending_changes)
+        CheckinJournal._stopping.clear()
+        CheckinJournal._thread = threading.Thread(
+            target=CheckinJournal._run, name="checkin-journal", daemon=True
+        )
+        CheckinJournal._thread.start()
+        CheckinJournal._wakeup.set()
+
+    @staticmethod
+    def stop():
+        """Write remaining entries to the database and close the journal"""
+        if not CheckinJournal.is_active():
+            return
+        CheckinJournal._stopping.set()
+        CheckinJournal._wakeup.set()
+        if CheckinJournal._thread:
+            CheckinJournal._thread.join(timeout=10)
+        CheckinJournal.flush()
+
+        with CheckinJournal._lock:
+            LiveRoster.set_pending_source(None)
+            CheckinJournal._file.close()
+            CheckinJournal._file = None
+            if CheckinJournal._lock_file:
+                CheckinJournal._lock_file.close()
+                CheckinJournal._lock_file = None
+
+    @staticmethod
+    def _read(path: str) -> List[dict]:
+        if not os.path.exists(path):
+            return []
+        entries = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn last line of a crash - never acknowledged
+                    continue
+                # Entries of older versions have no occurred_at (booked at the kiosk time)
+                entry["occurred_at"] = datetime.fromisoformat(entry.get("occurred_at") or entry["client_timestamp"])
+                if entry.get("client_timestamp"):
+                    entry["client_timestamp"] = datetime.fromisoformat(entry["client_timestamp"])
+                if entry.get("entry"):
+                    entry["entry"]["checked_in_at"] = datetime.fromisoformat(entry["entry"]["checked_in_at"])
+                entries.append(entry)
+        return entries
+
+    @staticmethod
+    def _serialize(entry: dict) -> str:
+        data = dict(entry)
+        data["occurred_at"] = entry["occurred_at"].isoformat()
+        if entry.get("client_timestamp"):
+            data["client_timestamp"] = entry["client_timestamp"].isoformat()
+        if entry.get("entry"):
+            data["entry"] = {**entry["entry"], "checked_in_at": entry["entry"]["checked_in_at"].isoformat()}
+        return json.dumps(data, ensure_ascii=False)
+
+    @staticmethod
+    def find(client_key: Optional[str]) -> Optional[dict]:
+        """Journaled entry with this idempotency key, if not yet stored"""
+        if not client_key:
+            return None
+        with CheckinJournal._lock:
+            return CheckinJournal._keys.get(client_key)
+
+    @staticmethod
+    def append(
+        action: str,
+        session_id: int,
+        personnel,
+        moment: datetime,
+        client_key: Optional[str] = None,
+        entry: Optional[dict] = None,
+        client_timestamp: Optional[datetime] = None
+    ) -> dict:
+        """Durably record a check-in/check-out at moment, returns the journal entry.
+
+        entry is the roster entry of a check-in (shown until it is stored),
+        client_timestamp the kiosk clock (only recorded with the event).
+        """
+        record = {
+            "client_key": client_key or f"journal-{uuid.uuid4().hex}",
+            "occurred_at": moment,
+            "client_timestamp": client_timestamp,
+            "action": action,
+            "session_id": session_id,
+            "stammrollennummer": personnel.stammrollennummer,
+            "personnel_id": personnel.id,
+            "entry": entry
+        }
+        line = CheckinJournal._serialize(record) + "\n"
+
+        with CheckinJournal._lock:
+            CheckinJournal._file.write(line)
+            CheckinJournal._file.flush()
+            os.fsync(CheckinJournal._file.fileno())
+            CheckinJournal._pending.append(record)
+            CheckinJournal._keys[record["client_key"]] = record
+            CheckinJournal._revision += 1
+
+        CheckinJournal._wakeup.set()
+        return record
+
+    @staticmethod
+    def pending_changes() -> List[tuple]:
+        """Unstored changes for the live roster"""
+        with CheckinJournal._lock:
+            return [
+                (e["action"], e["session_id"], e["personnel_id"], e["entry"])
+                for e in CheckinJournal._pending
+            ]
+
+    @staticmethod
+    def etag_parts() -> tuple:
+        """Extra ETag part for roster responses (changes with every entry)"""
+        if not CheckinJournal.is_active():
+            return ()
+        return (f"j{CheckinJournal._revision}",)
+
+    @staticmethod
+    def _run():
+        while not CheckinJournal._stopping.is_set():
+            CheckinJournal._wakeup.wait()
+            CheckinJournal._wakeup.clear()
+            # Collect what arrives in the meantime into the same transaction
+            if CheckinJournal._stopping.wait(JOURNAL_FLUSH_SECONDS):
+                break
+            try:
+                CheckinJournal.flush()
+            except Exception as e:
+                print(f"Check-in journal: flush failed, retrying: {e}")
+                CheckinJournal._stopping.wait(JOURNAL_FLUSH_SECONDS)
+                CheckinJournal._wakeup.set()
+
+    @staticmethod
+    def flush():
+        """Store all journaled entries in one transaction"""
+        with CheckinJournal._flush_lock:
+            with CheckinJournal._lock:
+                batch = list(CheckinJournal._pending)
+            if not batch:
+                return
+
+            db = SessionLocal()
+            try:
+                try:
+                    # Acknowledged bookings are kept however long the
+                    # database was unavailable
+                    results = AttendanceReplay.apply(db, batch, publish=False, max_age_hours=0)
+                except IntegrityError:
+                    # Conflicts with a booking made directly (batch check-in,
+                    # other worker) - store entry by entry, drop the conflicts
+                    db.rollback()
+                    results = []
+                    for entry in batch:
+                        try:
+                            results.extend(AttendanceReplay.apply(db, [entry], publish=False, max_age_hours=0))
+                        except IntegrityError:
+                            db.rollback()
+                            results.append({
+                                "client_key": entry["client_key"],
+                                "status": REJECTED,
+                                "detail": "Konflikt mit gleichzeitiger Buchung"
+                            })
+            finally:
+                db.close()
+
+            for result in results:
+                if result["status"] not in (APPLIED, DUPLICATE):
+                    print(f"Check-in journal: booking {result['client_key']} discarded: {result.get('detail')}")
+
+            CheckinJournal._truncate(len(batch))
+
+    @staticmethod
+    def _truncate(count: int):
+        """Drop the first count entries (stored) from memory and file"""
+        with CheckinJournal._lock:
+            stored = CheckinJournal._pending[:count]
+            CheckinJournal._pending = CheckinJournal._pending[count:]
+            for entry in stored:
+                CheckinJournal._keys.pop(entry["client_key"], None)
+            CheckinJournal._revision += 1
+
+            path = CheckinJournal._file.name
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for entry in CheckinJournal._pending:
+                    f.write(CheckinJournal._serialize(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            CheckinJournal._file.close()
+            os.replace(tmp_path, path)
+            CheckinJournal._file = open(path, "a", encoding="utf-8")
@@ -0,0 +1,86 @@
+import asyncio
+import json
+import threading
+from itertools import count
+from typing import Optional
+from fastapi.encoders import jsonable_encoder
+
+
+class EventSubscriber:
+    """A single push-channel client with its own bounded queue"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, session_id: Optional[int] = None, maxsize: int = 100):
+        self.loop = loop
+        self.session_id = session_id
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def wants(self, data: dict) -> bool:
+        """Session-scoped subscribers only receive events for their session"""
+        if self.session_id is None:
+            return True
+        event_session = data.get("session_id")
+        return event_session is None or event_session == self.session_id
+
+    def deliver(self, message: str):
+        """Runs on the subscriber's event loop"""
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Slow client - drop deltas and tell it to reload once it catches up
+            self.overflowed = True
+
+    async def get(self) -> str:
+        return await self.queue.get()
+
+
+class EventBroker:
+    """In-process publish/subscribe hub for kiosk and dashboard push updates.
+
+    Publishers can be request handlers or scheduler threads, so messages are
+    handed to each subscriber's event loop via call_soon_threadsafe.
+    """
+
+    _subscribers = set()
+    _lock = threading.Lock()
+    _ids = count(1)
+
+    @staticmethod
+    def subscribe(session_id: Optional[int] = None) -> EventSubscriber:
+        subscriber = EventSubscriber(asyncio.get_running_loop(), session_id)
+        with EventBroker._lock:
+            EventBroker._subscribers.add(subscriber)
+        return subscriber
+
+    @staticmethod
+    def unsubscribe(subscriber: EventSubscriber):
+        with EventBroker._lock:
+            EventBroker._subscribers.discard(subscriber)
+
+    @staticmethod
+    def format_message(event_type: str, data: dict, event_id: Optional[int] = None) -> str:
+        """Format an event in text/event-stream wire format"""
+        lines = []
+        if event_id is not None:
+            lines.append(f"id: {event_id}")
+        lines.append(f"event: {event_type}")
+        lines.append(f"data: {json.dumps(jsonable_encoder(data))}")
+        return "\n".join(lines) + "\n\n"
+
+    @staticmethod
+    def publish(event_type: str, data: Optional[dict] = None):
+        """Send an event to all interested subscribers (thread-safe)"""
+        data = data or {}
+        message = EventBroker.format_message(event_type, data, next(EventBroker._ids))
+
+        with EventBroker._lock:
+            subscribers = list(EventBroker._subscribers)
+
+        for subscriber in subscribers:
+            if not subscriber.wants(data):
+                continue
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.deliver, message)
+            except RuntimeError:
+                # Event loop already closed
+                EventBroker.unsubscribe(subscriber)
@@ -0,0 +1,207 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import case
+from sqlalchemy.orm import Session
+from ..models import FireStation, SystemSettings, Announcement, News
+from .change_tracker import ChangeTracker
+from .live_roster import LiveRoster
+from .checkin_journal import CheckinJournal
+
+
+class KioskState:
+    """Everything a kiosk needs on startup, assembled from cached sections.
+
+    Each section is tagged with the version of its change counter; a section
+    is only rebuilt from the database when its tag changes. Announcements
+    and news also depend on the clock, so their tags roll over every minute.
+    """
+
+    # section -> (counter key, depends on clock)
+    SECTIONS = {
+        "system_settings": (ChangeTracker.SYSTEM_SETTINGS, False),
+        "firestation": (ChangeTracker.FIRESTATION, False),
+        "sessions": (ChangeTracker.ROSTER, False),
+        "announcements": (ChangeTracker.ANNOUNCEMENTS, True),
+        "news": (ChangeTracker.NEWS, True),
+    }
+
+    _cache: Dict[str, Tuple[str, object]] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def system_settings(db: Session) -> dict:
+        """Body of GET /api/settings/system"""
+        settings = db.query(SystemSettings).first()
+
+        if not settings:
+            settings = SystemSettings()
+            db.add(settings)
+            db.commit()
+            db.refresh(settings)
+
+        return {
+            "kiosk_base_url": settings.kiosk_base_url,
+            "kiosk_show_attendance_list": settings.kiosk_show_attendance_list,
+            "screensaver_enabled": getattr(settings, 'screensaver_enabled', True),
+            "screensaver_timeout": getattr(settings, 'screensaver_timeout', 300),
+            "screensaver_show_logo": getattr(settings, 'screensaver_show_logo', True),
+            "screensaver_show_clock": getattr(settings, 'screensaver_show_clock', True),
+            "auto_update_enabled": getattr(settings, 'auto_update_enabled', False),
+            "auto_update_time": getattr(settings, 'auto_update_time', '03:00')
+        }
+
+    @staticmethod
+    def firestation(db: Session) -> dict:
+        """Body of GET /api/settings/firestation"""
+        fire_station = db.query(FireStation).first()
+
+        if not fire_station:
+            # Create default
+            fire_station = FireStation(
+                name="Freiwillige Feuerwehr",
+                street="",
+                city="",
+                postal_code=""
+            )
+            db.add(fire_station)
+            db.commit()
+            db.refresh(fire_station)
+
+        return {
+            "id": fire_station.id,
+            "name": fire_station.name,
+            "logo_path": fire_station.logo_path,
+            "street": fire_station.street,
+            "city": fire_station.city,
+            "postal_code": fire_station.postal_code
+        }
+
+    @staticmethod
+    def active_announcements(db: Session) -> List[dict]:
+        """Body of GET /api/announcements/active"""
+        now = datetime.utcnow()
+
+        # Define priority order for sorting
+        priority_order = case(
+            (Announcement.priority == 'urgent', 1),
+            (Announcement.priority == 'high', 2),
+            (Announcement.priority == 'normal', 3),
+            else_=4
+        )
+
+        announcements = db.query(Announcement).filter(
+            Announcement.valid_from <= now,
+            (Announcement.valid_until == None) | (Announcement.valid_until >= now)
+        ).order_by(
+            priority_order,
+            Announcement.created_at.desc()
+        ).all()
+
+        return [{
+            "id": ann.id,
+            "title": ann.title,
+            "content": ann.content,
+            "priority": ann.priority,
+            "valid_from": ann.valid_from,
+            "valid_until": ann.valid_until,
+            "created_at": ann.created_at
+        } for ann in announcements]
+
+    @staticmethod
+    def news(db: Session, active_only: bool = True, skip: int = 0, limit: int = 50) -> List[dict]:
+        """Body of GET /api/news"""
+        query = db.query(News)
+
+        if active_only:
+            query = query.filter(News.is_active == True)
+            # Filter out expired news
+            query = query.filter(
+                (News.expires_at.is_(None)) | (News.expires_at > datetime.now())
+            )
+
+        news_items = query.order_by(News.created_at.desc()).offset(skip).limit(limit).all()
+
+        return [{
+            "id": n.id,
+            "title": n.title,
+            "content": n.content,
+            "priority": n.priority,
+            "is_active": n.is_active,
+            "created_at": n.created_at,
+            "expires_at": n.expires_at,
+            "created_by": n.created_by
+        } for n in news_items]
+
+    @staticmethod
+    def _build(db: Session, section: str):
+        if section == "system_settings":
+            return KioskState.system_settings(db)
+        if section == "firestation":
+            return KioskState.firestation(db)
+        if section == "sessions":
+            return LiveRoster.active_sessions(db)
+        if section == "announcements":
+            return KioskState.active_announcements(db)
+        return KioskState.news(db)
+
+    @staticmethod
+    def section_tags(db: Session) -> Dict[str, str]:
+        """Current tag of every section (one query)"""
+        counters = ChangeTracker.snapshot(db)
+        # The sessions section comes from the live roster; make it catch up
+        # with the version in its tag before the payload is built
+        LiveRoster.note_version(counters.get(ChangeTracker.ROSTER, (0, None))[0])
+        minute = int(time.time() // 60)
+        tags = {}
+        for section, (key, clock_dependent) in KioskState.SECTIONS.items():
+            version, updated_at = counters.get(key, (0, None))
+            stamp = int(updated_at.timestamp() * 1000) if updated_at else 0
+            tag = f"{version}_{stamp}"
+            if clock_dependent:
+                tag += f"_{minute}"
+            if section == "sessions":
+                # Bookings acknowledged from the journal but not yet stored
+                tag += "".join(f"_{part}" for part in CheckinJournal.etag_parts())
+            tags[section] = tag
+        return tags
+
+    @staticmethod
+    def version_token(tags: Dict[str, str]) -> str:
+        return ".".join(tags[section] for section in KioskState.SECTIONS)
+
+    @staticmethod
+    def parse_token(token: Optional[str]) -> Dict[str, str]:
+        """Section tags of a token from a previous response ({} if invalid)"""
+        if not token:
+            return {}
+        parts = token.split(".")
+        if len(parts) != len(KioskState.SECTIONS):
+            return {}
+        return dict(zip(KioskState.SECTIONS, parts))
+
+    @staticmethod
+    def get_state(db: Session, since: Optional[str] = None, tags: Optional[Dict[str, str]] = None) -> dict:
+        """Full kiosk state, or only the sections changed after `since`"""
+        tags = tags or KioskState.section_tags(db)
+        known = KioskState.parse_token(since)
+
+        state = {"version": KioskState.version_token(tags), "changed": []}
+        for section, tag in tags.items():
+            if known.get(section) == tag:
+                continue
+
+            with KioskState._lock:
+                cached = KioskState._cache.get(section)
+            if cached and cached[0] == tag:
+                payload = cached[1]
+            else:
+                payload = KioskState._build(db, section)
+                with KioskState._lock:
+                    KioskState._cache[section] = (tag, payload)
+
+            state["changed"].append(section)
+            state[section] = payload
+
+        return state
@@ -0,0 +1,233 @@
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from sqlalchemy.orm import Session
+from ..models import Session as SessionModel, Attendance, Personnel, DIENSTGRADE
+from .change_tracker import ChangeTracker
+from ..utils.conditional import counter_etag
+
+
+def roster_entry(attendance: Attendance, personnel: Personnel) -> dict:
+    """Checked-in person as shown on kiosks and the live dashboard"""
+    dienstgrad_info = DIENSTGRADE.get(personnel.dienstgrad, (personnel.dienstgrad, 0))
+    return {
+        "attendance_id": attendance.id,
+        "personnel_id": personnel.id,
+        "stammrollennummer": personnel.stammrollennummer,
+        "vorname": personnel.vorname,
+        "nachname": personnel.nachname,
+        "dienstgrad": personnel.dienstgrad,
+        "dienstgrad_name": dienstgrad_info[0],
+        "checked_in_at": attendance.checked_in_at
+    }
+
+
+class LiveRoster:
+    """In-memory view of active sessions and their checked-in personnel.
+
+    Write paths bump the shared "roster" counter in their transaction and
+    apply their delta here after the commit. A version gap (change made by
+    another worker, or a change without a local delta) makes the next read
+    rebuild the roster from the database.
+    """
+
+    _sessions: Dict[int, dict] = {}
+    _version = -1
+    _latest_version = 0
+    _active_current: Optional[List[dict]] = None
+    _lock = threading.RLock()
+    # Acknowledged changes not yet in the database (write-behind journal):
+    # callable returning [(action, session_id, personnel_id, entry)]
+    _pending_source: Optional[Callable[[], List[tuple]]] = None
+
+    @staticmethod
+    def rebuild(db: Session):
+        """Load active sessions and open attendances from the database"""
+        version, _ = ChangeTracker.current(db, ChangeTracker.ROSTER)
+
+        sessions = db.query(SessionModel).filter(
+            SessionModel.is_active == True
+        ).order_by(SessionModel.id).all()
+
+        rows = db.query(Attendance, Personnel).join(
+            Personnel, Attendance.personnel_id == Personnel.id
+        ).join(
+            SessionModel, Attendance.session_id == SessionModel.id
+        ).filter(
+            SessionModel.is_active == True,
+            Attendance.checked_out_at == None
+        ).order_by(Attendance.checked_in_at, Attendance.id).all()
+
+        roster = {}
+        for s in sessions:
+            roster[s.id] = {
+                "id": s.id,
+                "event_type": s.event_type,
+                "started_at": s.started_at,
+                "personnel": {}
+            }
+        for attendance, personnel in rows:
+            if attendance.session_id in roster:
+                roster[attendance.session_id]["personnel"][personnel.id] = roster_entry(attendance, personnel)
+
+        with LiveRoster._lock:
+            LiveRoster._sessions = roster
+            LiveRoster._version = version
+            LiveRoster._latest_version = max(LiveRoster._latest_version, version)
+            LiveRoster._active_current = None
+
+    @staticmethod
+    def note_version(version: int, updated_at: Optional[datetime] = None):
+        """A newer shared version than ours makes the next read rebuild"""
+        with LiveRoster._lock:
+            LiveRoster._latest_version = max(LiveRoster._latest_version, version)
+
+    @staticmethod
+    def etag(db: Session, *extra) -> str:
+        """ETag of the roster views.
+
+        The version in the tag is handed to the roster before the body is
+        read, so a change committed by another worker (not yet seen by the
+        change watcher) can never be served under its new tag with the old
+        roster - the read rebuilds first.
+        """
+        version, updated_at = ChangeTracker.current(db, ChangeTracker.ROSTER)
+        LiveRoster.note_version(version)
+        return counter_etag(ChangeTracker.ROSTER, version, updated_at, *extra)
+
+    @staticmethod
+    def _is_stale() -> bool:
+        return LiveRoster._version < LiveRoster._latest_version
+
+    @staticmethod
+    def _apply(version: int, change) -> None:
+        """Apply a committed local change if it directly follows our state"""
+        with LiveRoster._lock:
+            LiveRoster._latest_version = max(LiveRoster._latest_version, version)
+            if LiveRoster._version >= version:
+                return  # Already contained in a rebuild
+            if LiveRoster._version != version - 1:
+                return  # Missed a change - next read rebuilds
+            change()
+            LiveRoster._version = version
+            LiveRoster._active_current = None
+
+    @staticmethod
+    def session_started(version: int, session: SessionModel):
+        def change():
+            LiveRoster._sessions.setdefault(session.id, {
+                "id": session.id,
+                "event_type": session.event_type,
+                "started_at": session.started_at,
+                "personnel": {}
+            })
+        LiveRoster._apply(version, change)
+
+    @staticmethod
+    def sessions_ended(version: int, session_ids: List[int]):
+        def change():
+            for session_id in session_ids:
+                LiveRoster._sessions.pop(session_id, None)
+        LiveRoster._apply(version, change)
+
+    @staticmethod
+    def checked_in(version: int, session_id: int, entry: dict):
+        LiveRoster.checked_in_many(version, session_id, [entry])
+
+    @staticmethod
+    def checked_in_many(version: int, session_id: int, entries: List[dict]):
+        def change():
+            session = LiveRoster._sessions.get(session_id)
+            if session is not None:
+                for entry in entries:
+                    session["personnel"][entry["personnel_id"]] = entry
+        LiveRoster._apply(version, change)
+
+    @staticmethod
+    def checked_out(version: int, session_id: int, personnel_id: int):
+        def change():
+            session = LiveRoster._sessions.get(session_id)
+            if session is not None:
+                session["personnel"].pop(personnel_id, None)
+        LiveRoster._apply(version, change)
+
+    @staticmethod
+    def set_pending_source(source: Optional[Callable[[], List[tuple]]]):
+        """Register the provider of acknowledged, not yet stored changes"""
+        LiveRoster._pending_source = source
+
+    @staticmethod
+    def _current_sessions(db: Session) -> Dict[int, dict]:
+        """Roster with pending changes applied (caller holds the lock)"""
+        if LiveRoster._is_stale():
+            LiveRoster.rebuild(db)
+
+        pending = LiveRoster._pending_source() if LiveRoster._pending_source else None
+        if not pending:
+            return LiveRoster._sessions
+
+        sessions = {
+            session_id: {**session, "personnel": dict(session["personnel"])}
+            for session_id, session in LiveRoster._sessions.items()
+        }
+        for action, session_id, personnel_id, entry in pending:
+            session = sessions.get(session_id)
+            if session is None:
+                continue
+            if action == "checkin":
+                session["personnel"][personnel_id] = entry
+            else:
+                session["personnel"].pop(personnel_id, None)
+        return sessions
+
+    @staticmethod
+    def _format_active(sessions: Dict[int, dict]) -> List[dict]:
+        return [
+            {
+                "id": s["id"],
+                "event_type": s["event_type"],
+                "started_at": s["started_at"],
+                "active_personnel": [
+                    {
+                        "id": p["personnel_id"],
+                        "stammrollennummer": p["stammrollennummer"],
+                        "vorname": p["vorname"],
+                        "nachname": p["nachname"],
+                        "dienstgrad": p["dienstgrad"],
+                        "dienstgrad_name": p["dienstgrad_name"],
+                        "checked_in_at": p["checked_in_at"]
+                    }
+                    for p in s["personnel"].values()
+                ]
+            }
+            for s in sessions.values()
+        ]
+
+    @staticmethod
+    def active_sessions(db: Session) -> List[dict]:
+        """Response body of GET /api/sessions/active/current"""
+        with LiveRoster._lock:
+            sessions = LiveRoster._current_sessions(db)
+            if sessions is not LiveRoster._sessions:
+                return LiveRoster._format_active(sessions)
+            if LiveRoster._active_current is None:
+                LiveRoster._active_current = LiveRoster._format_active(sessions)
+            return LiveRoster._active_current
+
+    @staticmethod
+    def active_session(db: Session, session_id: int) -> Optional[dict]:
+        """Active session with its checked-in personnel by id, None if not active"""
+        with LiveRoster._lock:
+            return LiveRoster._current_sessions(db).get(session_id)
+
+    @staticmethod
+    def session_attendees(db: Session, session_id: int) -> Optional[List[dict]]:
+        """Checked-in personnel of an active session, None if not active"""
+        session = LiveRoster.active_session(db, session_id)
+        if session is None:
+            return None
+        return list(session["personnel"].values())
+
+
+# Changes committed by other worker processes arrive via the change watcher
+ChangeTracker.on_change(ChangeTracker.ROSTER, LiveRoster.note_version)
@@ -6,8 +6,9 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from io import BytesIO
 from datetime import datetime
-from sqlalchemy.orm import Session
-from ..models import Session as SessionModel, Attendance, Personnel, FireStation, DIENSTGRADE
+from sqlalchemy.orm import Session, joinedload
+from ..models import Attendance, FireStation, DIENSTGRADE, ArchivedSession, ArchivedAttendance
+from .archive_manager import ArchiveManager
 import os
 
 class PDFGenerator:
@@ -18,17 +19,18 @@ class PDFGenerator:
         doc = SimpleDocTemplate(buffer, pagesize=A4, leftMargin=2*cm, rightMargin=2*cm,
                                topMargin=2*cm, bottomMargin=2*cm)
         
-        # Get session data
-        session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
+        # Get session data (archived sessions included)
+        session = ArchiveManager.get_session(db, session_id)
         if not session:
             return None
+        AttendanceTable = ArchivedAttendance if isinstance(session, ArchivedSession) else Attendance
         
         # Get fire station settings
         fire_station = db.query(FireStation).first()
         
         # Get attendances
-        attendances = db.query(Attendance).filter(
-            Attendance.session_id == session_id
+        attendances = db.query(AttendanceTable).options(joinedload(AttendanceTable.personnel)).filter(
+            AttendanceTable.session_id == session_id
         ).all()
         
         story = []
@@ -0,0 +1,101 @@
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+from sqlalchemy.orm import Session
+from ..models import Personnel, DIENSTGRADE
+from .change_tracker import ChangeTracker
+
+
+class PersonRecord:
+    """Compact, read-only copy of the personnel fields the kiosk needs"""
+
+    __slots__ = (
+        "id", "stammrollennummer", "vorname", "nachname", "dienstgrad",
+        "dienstgrad_name", "dienstgrad_level", "group_id", "is_active"
+    )
+
+    def __init__(self, personnel: Personnel):
+        dienstgrad_info = DIENSTGRADE.get(personnel.dienstgrad, (personnel.dienstgrad, 0))
+        self.id = personnel.id
+        self.stammrollennummer = personnel.stammrollennummer
+        self.vorname = personnel.vorname
+        self.nachname = personnel.nachname
+        self.dienstgrad = personnel.dienstgrad
+        self.dienstgrad_name = dienstgrad_info[0]
+        self.dienstgrad_level = dienstgrad_info[1]
+        self.group_id = personnel.group_id
+        self.is_active = personnel.is_active
+
+
+class PersonnelIndex:
+    """Process-local lookup of personnel by Stammrollennummer.
+
+    Personnel routes bump the shared "personnel" counter. Every lookup reads
+    that counter (one primary-key query, like the roster ETag) and reloads
+    the index when it moved, so changes of other workers are seen without
+    the change watcher. A number that is not in the index is looked up in
+    the database once; numbers not found there either are remembered until
+    the next reload.
+    """
+
+    _by_number: Dict[str, PersonRecord] = {}
+    _unknown: Set[str] = set()
+    _version = -1
+    _lock = threading.Lock()
+
+    @staticmethod
+    def rebuild(db: Session):
+        """Load all personnel (including inactive) into the index"""
+        version, _ = ChangeTracker.current(db, ChangeTracker.PERSONNEL)
+        index = {p.stammrollennummer: PersonRecord(p) for p in db.query(Personnel).all()}
+
+        with PersonnelIndex._lock:
+            PersonnelIndex._by_number = index
+            PersonnelIndex._unknown = set()
+            PersonnelIndex._version = version
+
+    @staticmethod
+    def invalidate(version: Optional[int] = None, updated_at: Optional[datetime] = None):
+        """Force a reload on the next lookup"""
+        with PersonnelIndex._lock:
+            PersonnelIndex._version = -1
+
+    @staticmethod
+    def get_many(db: Session, numbers: List[str], active_only: bool = True) -> Dict[str, PersonRecord]:
+        """Records for several Stammrollennummern, unknown numbers are left out"""
+        current, _ = ChangeTracker.current(db, ChangeTracker.PERSONNEL)
+        with PersonnelIndex._lock:
+            stale = PersonnelIndex._version != current
+        if stale:
+            PersonnelIndex.rebuild(db)
+
+        with PersonnelIndex._lock:
+            index = PersonnelIndex._by_number
+            unknown = PersonnelIndex._unknown
+            version = PersonnelIndex._version
+        found = {n: index[n] for n in numbers if n in index}
+        missing = [n for n in numbers if n not in found and n not in unknown]
+        if missing:
+            loaded = {
+                p.stammrollennummer: PersonRecord(p)
+                for p in db.query(Personnel).filter(Personnel.stammrollennummer.in_(missing)).all()
+            }
+            with PersonnelIndex._lock:
+                # Skip if the index was reloaded in the meantime
+                if PersonnelIndex._version == version:
+                    PersonnelIndex._by_number.update(loaded)
+                    PersonnelIndex._unknown.update(n for n in missing if n not in loaded)
+            found.update(loaded)
+
+        if active_only:
+            found = {n: record for n, record in found.items() if record.is_active}
+        return found
+
+    @staticmethod
+    def get(db: Session, stammrollennummer: str, active_only: bool = True) -> Optional[PersonRecord]:
+        """Record for a Stammrollennummer, None if unknown"""
+        return PersonnelIndex.get_many(db, [stammrollennummer], active_only).get(stammrollennummer)
+
+
+# Manual kiosk refreshes from the admin panel reload the index
+ChangeTracker.on_change(ChangeTracker.KIOSK_REFRESH, PersonnelIndex.invalidate)
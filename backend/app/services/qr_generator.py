@@ -1,14 +1,80 @@
+import base64
+import hashlib
+import hmac
+import os
 import qrcode
+import threading
+import time
 from io import BytesIO
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
 from jose import jwt
 from ..utils.auth import SECRET_KEY, ALGORITHM
+from ..utils.cache import LRUCache
+
+# QR tokens are minted once per epoch (time slot), so the QR code of a session
+# stays the same (and cacheable) within an epoch and rotates with the next one
+QR_TOKEN_EPOCH_SECONDS = int(os.getenv("QR_TOKEN_EPOCH_SECONDS", "3600"))
+# How long a token is accepted after its epoch has ended
+QR_TOKEN_VALID_HOURS = float(os.getenv("QR_TOKEN_VALID_HOURS", "24"))
+# Old JWT links are accepted until this date (YYYY-MM-DD, empty = no end)
+QR_LEGACY_TOKENS_UNTIL = os.getenv("QR_LEGACY_TOKENS_UNTIL", "")
+# Every session is cached in all formats (see QR_FORMATS)
+QR_CACHE_ENTRIES = 192
+
+# Served formats: format -> (media type, file extension)
+QR_FORMATS = {
+    "png": ("image/png", "png"),
+    "svg": ("image/svg+xml", "svg"),
+    "print": ("image/png", "png"),  # large PNG for posters
+}
+QR_BOX_SIZE = 10
+QR_PRINT_BOX_SIZE = 30
+
+# Compact token: "<session_id>.<epoch>.<mac>", mac = truncated HMAC-SHA256
+QR_MAC_BYTES = 12
+_QR_KEY = hmac.new(SECRET_KEY.encode(), b"qr_checkin", hashlib.sha256).digest()
+
+def _mac(session_id: int, epoch: int) -> str:
+    digest = hmac.new(_QR_KEY, f"{session_id}.{epoch}".encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:QR_MAC_BYTES]).decode().rstrip("=")
+
+def _parse_legacy_cutoff(value: str) -> Optional[date]:
+    """Last day of QR_LEGACY_TOKENS_UNTIL, None = no end (also if invalid)"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        print(f"⚠️  Invalid QR_LEGACY_TOKENS_UNTIL '{value}' (expected YYYY-MM-DD) - ignored")
+        return None
+
+_LEGACY_TOKENS_CUTOFF = _parse_legacy_cutoff(QR_LEGACY_TOKENS_UNTIL)
+
+def _legacy_tokens_accepted() -> bool:
+    return _LEGACY_TOKENS_CUTOFF is None or datetime.utcnow().date() <= _LEGACY_TOKENS_CUTOFF
 
 class QRGenerator:
+    # (session_id, base_url, epoch, format) -> (image, etag)
+    _cache = LRUCache(QR_CACHE_ENTRIES)
+    # Pre-rendering and requests must not render the same code twice
+    _render_lock = threading.Lock()
+    
     @staticmethod
-    def generate_session_token(session_id: int, expires_hours: int = 24) -> str:
-        """Generate JWT token for QR code check-in"""
-        expiry = datetime.utcnow() + timedelta(hours=expires_hours)
+    def generate_session_token(session_id: int, epoch: Optional[int] = None) -> str:
+        """Generate compact signed token for QR code check-in.
+
+        The token names the session and the time slot it was minted in; the
+        MAC keeps it from being forged or moved to another session.
+        """
+        if epoch is None:
+            epoch = int(time.time() // QR_TOKEN_EPOCH_SECONDS)
+        return f"{session_id}.{epoch}.{_mac(session_id, epoch)}"
+    
+    @staticmethod
+    def generate_legacy_token(session_id: int, expires_hours: int = 24, issued_at: Optional[datetime] = None) -> str:
+        """Generate JWT token for QR code check-in (format before compact tokens)"""
+        expiry = (issued_at or datetime.utcnow()) + timedelta(hours=expires_hours)
         payload = {
             "session_id": session_id,
             "exp": expiry,
@@ -19,7 +85,19 @@ class QRGenerator:
     
     @staticmethod
     def validate_session_token(token: str) -> dict:
-        """Validate and decode session token"""
+        """Validate and decode session token (compact, or JWT while still accepted)"""
+        parts = token.split(".")
+        if len(parts) == 3 and parts[0].isdigit() and parts[1].isdigit():
+            session_id, epoch = int(parts[0]), int(parts[1])
+            if not hmac.compare_digest(parts[2].encode(), _mac(session_id, epoch).encode()):
+                return None
+            expires = (epoch + 1) * QR_TOKEN_EPOCH_SECONDS + QR_TOKEN_VALID_HOURS * 3600
+            if time.time() >= expires:
+                return None
+            return {"session_id": session_id, "exp": int(expires), "type": "qr_checkin"}
+        
+        if not _legacy_tokens_accepted():
+            return None
         try:
             payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
             if payload.get("type") != "qr_checkin":
@@ -29,24 +107,101 @@ class QRGenerator:
             return None
     
     @staticmethod
-    def generate_qr_code(session_id: int, base_url: str = "http://localhost:5173") -> bytes:
-        """Generate QR code image for session check-in"""
-        token = QRGenerator.generate_session_token(session_id)
-        url = f"{base_url}/checkin?token={token}"
-        
+    def _make(data: str) -> qrcode.QRCode:
         qr = qrcode.QRCode(
             version=1,
             error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
+            box_size=QR_BOX_SIZE,
             border=4,
         )
-        qr.add_data(url)
+        qr.add_data(data)
         qr.make(fit=True)
-        
+        return qr
+    
+    @staticmethod
+    def _png(qr: qrcode.QRCode, box_size: int) -> bytes:
+        qr.box_size = box_size
         img = qr.make_image(fill_color="black", back_color="white")
         
         # Convert to bytes
         buffer = BytesIO()
         img.save(buffer, format="PNG")
-        buffer.seek(0)
         return buffer.getvalue()
+    
+    @staticmethod
+    def _svg(qr: qrcode.QRCode) -> bytes:
+        """Scalable SVG with one path segment per horizontal run of dark modules"""
+        matrix = qr.get_matrix()  # includes the border
+        size = len(matrix)
+        runs = []
+        for y, row in enumerate(matrix):
+            x = 0
+            while x < size:
+                if not row[x]:
+                    x += 1
+                    continue
+                start = x
+                while x < size and row[x]:
+                    x += 1
+                runs.append(f"M{start} {y}h{x - start}v1h-{x - start}z")
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {size} {size}" '
+            f'shape-rendering="crispEdges"><rect width="{size}" height="{size}" fill="#fff"/>'
+            f'<path d="{"".join(runs)}"/></svg>'
+        ).encode()
+    
+    @staticmethod
+    def render_png(data: str) -> bytes:
+        """Encode data as QR code PNG"""
+        return QRGenerator._png(QRGenerator._make(data), QR_BOX_SIZE)
+    
+    @staticmethod
+    def render_all(data: str) -> dict:
+        """Encode data once and render it in every format of QR_FORMATS"""
+        qr = QRGenerator._make(data)
+        return {
+            "png": QRGenerator._png(qr, QR_BOX_SIZE),
+            "svg": QRGenerator._svg(qr),
+            "print": QRGenerator._png(qr, QR_PRINT_BOX_SIZE),
+        }
+    
+    @staticmethod
+    def session_qr(session_id: int, base_url: str, fmt: str = "png") -> Tuple[bytes, str]:
+        """Image and ETag of the check-in QR code, rendered once per token epoch.
+
+        All formats are rendered together, so the first request (or the
+        pre-rendering at session start) fills the cache for the others.
+        The token only depends on the epoch, so every worker renders identical
+        bytes and the ETag (a content hash) matches across workers. A token is
+        valid for QR_TOKEN_VALID_HOURS after it was last served.
+        """
+        epoch = int(time.time() // QR_TOKEN_EPOCH_SECONDS)
+        key = (session_id, base_url, epoch, fmt)
+        cached = QRGenerator._cache.get(key)
+        if cached:
+            return cached
+        
+        with QRGenerator._render_lock:
+            cached = QRGenerator._cache.get(key)
+            if cached:
+                return cached
+            
+            token = QRGenerator.generate_session_token(session_id, epoch)
+            images = QRGenerator.render_all(f"{base_url}/checkin?token={token}")
+            for name, image in images.items():
+                entry = (image, '"qr-' + hashlib.sha256(image).hexdigest()[:32] + '"')
+                QRGenerator._cache.put((session_id, base_url, epoch, name), entry)
+                if name == fmt:
+                    cached = entry
+        return cached
+    
+    @staticmethod
+    def prerender(session_id: int, base_url: str):
+        """Render the QR code of a new session ahead of the first request"""
+        QRGenerator.session_qr(session_id, base_url)
+    
+    @staticmethod
+    def forget(session_ids):
+        """Drop cached QR codes of ended sessions"""
+        ended = set(session_ids)
+        QRGenerator._cache.discard(lambda key: key[0] in ended)
@@ -0,0 +1,64 @@
+import os
+from typing import Optional
+from sqlalchemy.orm import Session
+from ..models import Session as SessionModel
+from ..utils.cache import LRUCache
+from .change_tracker import ChangeTracker
+
+# Number of ended sessions whose detail/PDF are kept in memory (0 = off)
+SESSION_CACHE_ENTRIES = int(os.getenv("SESSION_CACHE_ENTRIES", "200"))
+SESSION_PDF_CACHE_MB = int(os.getenv("SESSION_PDF_CACHE_MB", "32"))
+
+
+class SessionCache:
+    """Serialized detail and PDF of ended sessions.
+
+    An ended session only changes through bookings that reach it afterwards
+    (offline replay) or through admin changes of the people in it, so the
+    key is the session's revision plus the personnel counter (and the fire
+    station counter for the PDF letterhead). Running sessions are never
+    cached. started_at is part of the key because SQLite may reuse the id
+    of a deleted session.
+    """
+
+    _details = LRUCache(SESSION_CACHE_ENTRIES)
+    _pdfs = LRUCache(SESSION_CACHE_ENTRIES, SESSION_PDF_CACHE_MB * 1024 * 1024, len)
+
+    @staticmethod
+    def _key(db: Session, session: SessionModel, *counters) -> Optional[tuple]:
+        if session.is_active:
+            return None
+        versions = tuple(ChangeTracker.current(db, key)[0] for key in counters)
+        return (session.id, session.started_at, session.revision, *versions)
+
+    @staticmethod
+    def detail_key(db: Session, session: SessionModel) -> Optional[tuple]:
+        return SessionCache._key(db, session, ChangeTracker.PERSONNEL)
+
+    @staticmethod
+    def pdf_key(db: Session, session: SessionModel) -> Optional[tuple]:
+        return SessionCache._key(db, session, ChangeTracker.PERSONNEL, ChangeTracker.FIRESTATION)
+
+    @staticmethod
+    def get_detail(key: Optional[tuple]) -> Optional[dict]:
+        return SessionCache._details.get(key) if key else None
+
+    @staticmethod
+    def put_detail(key: Optional[tuple], detail: dict):
+        if key:
+            SessionCache._details.put(key, detail)
+
+    @staticmethod
+    def get_pdf(key: Optional[tuple]) -> Optional[bytes]:
+        return SessionCache._pdfs.get(key) if key else None
+
+    @staticmethod
+    def put_pdf(key: Optional[tuple], pdf_bytes: bytes):
+        if key:
+            SessionCache._pdfs.put(key, pdf_bytes)
+
+    @staticmethod
+    def forget(session_id: int):
+        """Drop the entries of a deleted session (frees memory early)"""
+        SessionCache._details.discard(lambda key: key[0] == session_id)
+        SessionCache._pdfs.discard(lambda key: key[0] == session_id)
@@ -0,0 +1,104 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from ..models import Session as SessionModel, Attendance
+
+
+def attendance_seconds(checked_in_at: datetime, checked_out_at: datetime) -> int:
+    """Whole seconds of a closed attendance (what person_seconds accumulates)"""
+    return max(0, int((checked_out_at - checked_in_at).total_seconds()))
+
+
+class SessionCounters:
+    """Denormalized attendee counters on Session.
+
+    total_attendees, active_attendees and person_seconds (sum of the closed
+    attendances) are adjusted with relative UPDATEs in the transaction that
+    changes the attendances, so concurrent bookings cannot lose an increment.
+    Every adjustment also bumps Session.revision, which keys the cached
+    detail and PDF of ended sessions (SessionCache).
+    compute/check/repair recount everything from the attendances table.
+    """
+
+    @staticmethod
+    def add(db: Session, session_id: int, total: int = 0, active: int = 0, seconds: int = 0):
+        """Adjust the counters of one session (not committed)"""
+        if not (total or active or seconds):
+            return
+        db.execute(
+            update(SessionModel)
+            .where(SessionModel.id == session_id)
+            .values(
+                total_attendees=SessionModel.total_attendees + total,
+                active_attendees=SessionModel.active_attendees + active,
+                person_seconds=SessionModel.person_seconds + seconds,
+                revision=SessionModel.revision + 1
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def checked_in(db: Session, session_id: int, count: int = 1):
+        SessionCounters.add(db, session_id, total=count, active=count)
+
+    @staticmethod
+    def checked_out(db: Session, session_id: int, attendances: Iterable[Tuple[datetime, datetime]]):
+        """Close attendances, given as (checked_in_at, checked_out_at) pairs"""
+        durations = [attendance_seconds(start, end) for start, end in attendances]
+        SessionCounters.add(db, session_id, active=-len(durations), seconds=sum(durations))
+
+    @staticmethod
+    def compute(db: Session, session_ids: Optional[List[int]] = None) -> Dict[int, Tuple[int, int, int]]:
+        """Counters recounted from the attendances, session_id -> (total, active, seconds)"""
+        query = db.query(Attendance.session_id, Attendance.checked_in_at, Attendance.checked_out_at)
+        if session_ids is not None:
+            query = query.filter(Attendance.session_id.in_(session_ids))
+
+        counters = defaultdict(lambda: [0, 0, 0])
+        for session_id, checked_in_at, checked_out_at in query.yield_per(5000):
+            counter = counters[session_id]
+            counter[0] += 1
+            if checked_out_at is None:
+                counter[1] += 1
+            else:
+                counter[2] += attendance_seconds(checked_in_at, checked_out_at)
+        return {session_id: tuple(counter) for session_id, counter in counters.items()}
+
+    @staticmethod
+    def check(db: Session) -> List[dict]:
+        """Sessions whose stored counters differ from the attendances"""
+        expected = SessionCounters.compute(db)
+        mismatches = []
+        for session_id, total, active, seconds in db.query(
+            SessionModel.id,
+            SessionModel.total_attendees,
+            SessionModel.active_attendees,
+            SessionModel.person_seconds
+        ).yield_per(5000):
+            stored = (total, active, seconds)
+            actual = expected.get(session_id, (0, 0, 0))
+            if stored != actual:
+                mismatches.append({"session_id": session_id, "stored": stored, "expected": actual})
+        return mismatches
+
+    @staticmethod
+    def repair(db: Session) -> int:
+        """Rewrite all differing counters and commit, returns the number of sessions fixed"""
+        mismatches = SessionCounters.check(db)
+        for mismatch in mismatches:
+            total, active, seconds = mismatch["expected"]
+            db.execute(
+                update(SessionModel)
+                .where(SessionModel.id == mismatch["session_id"])
+                .values(
+                    total_attendees=total,
+                    active_attendees=active,
+                    person_seconds=seconds,
+                    revision=SessionModel.revision + 1
+                )
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+        return len(mismatches)
@@ -1,75 +1,146 @@
 from datetime import datetime, timedelta
+from sqlalchemy import case, select, update
 from sqlalchemy.orm import Session
 from ..models import Session as SessionModel, Attendance
-from typing import List
+from typing import List, Optional
+from .event_broker import EventBroker
+from .change_tracker import ChangeTracker
+from .live_roster import LiveRoster
+from .attendance_feed import AttendanceFeed, AUTO_CHECKOUT
+from .session_counters import SessionCounters
+from .qr_generator import QRGenerator
+from .token_cache import TokenCache
+
+# Übungsdienst and Arbeitsdienst end by themselves after this time
+AUTO_END_AFTER = timedelta(hours=3)
 
 class SessionManager:
     @staticmethod
-    def should_auto_end(session: SessionModel) -> bool:
-        """Check if session should be automatically ended"""
-        if not session.is_active:
-            return False
-        
-        if session.event_type == "Einsatz":
-            return False  # Einsatz can only be ended manually
-        
-        # Check if 3 hours have passed
-        if session.started_at:
-            elapsed = datetime.utcnow() - session.started_at
-            if elapsed >= timedelta(hours=3):
-                return True
-        
-        return False
+    def auto_end_deadline(event_type: str, started_at: datetime) -> Optional[datetime]:
+        """When a session ends by itself (None for Einsatz)"""
+        if event_type == "Einsatz":
+            return None  # Einsatz can only be ended manually
+        return started_at + AUTO_END_AFTER
     
     @staticmethod
-    def auto_end_sessions(db: Session) -> List[int]:
-        """Auto-end sessions that have exceeded 3 hours (except Einsatz)"""
-        ended_sessions = []
-        
-        active_sessions = db.query(SessionModel).filter(
-            SessionModel.is_active == True
+    def _check_out_all(db: Session, session_ids: List[int]) -> list:
+        """Close the open attendances of ended sessions at their ended_at.
+
+        One UPDATE for all sessions; returns the closed rows
+        (id, session_id, personnel_id, checked_in_at, checked_out_at).
+        """
+        ended_at = select(SessionModel.ended_at).where(
+            SessionModel.id == Attendance.session_id
+        ).scalar_subquery()
+        closed = db.execute(
+            update(Attendance)
+            .where(Attendance.session_id.in_(session_ids), Attendance.checked_out_at == None)
+            .values(checked_out_at=case(
+                (Attendance.checked_in_at > ended_at, Attendance.checked_in_at),
+                else_=ended_at
+            ))
+            .returning(
+                Attendance.id,
+                Attendance.session_id,
+                Attendance.personnel_id,
+                Attendance.checked_in_at,
+                Attendance.checked_out_at
+            )
+            .execution_options(synchronize_session=False)
         ).all()
         
-        for session in active_sessions:
-            if SessionManager.should_auto_end(session):
-                session.is_active = False
-                session.ended_at = datetime.utcnow()
-                
-                # Auto checkout all attendees
-                active_attendances = db.query(Attendance).filter(
-                    Attendance.session_id == session.id,
-                    Attendance.checked_out_at == None
-                ).all()
-                
-                for attendance in active_attendances:
-                    attendance.checked_out_at = datetime.utcnow()
-                
-                ended_sessions.append(session.id)
-        
-        if ended_sessions:
-            db.commit()
+        by_session = {}
+        for row in closed:
+            by_session.setdefault(row.session_id, []).append((row.checked_in_at, row.checked_out_at))
+        for session_id, attendances in by_session.items():
+            SessionCounters.checked_out(db, session_id, attendances)
         
-        return ended_sessions
+        AttendanceFeed.record_many(db, [{
+            "event_type": AUTO_CHECKOUT,
+            "session_id": row.session_id,
+            "personnel_id": row.personnel_id,
+            "attendance_id": row.id,
+            "occurred_at": row.checked_out_at
+        } for row in closed])
+        return closed
     
     @staticmethod
-    def end_session(db: Session, session_id: int) -> bool:
-        """Manually end a session"""
-        session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
-        
-        if not session or not session.is_active:
-            return False
-        
-        session.is_active = False
-        session.ended_at = datetime.utcnow()
+    def _finish(db: Session, ended_rows: list, auto_ended: bool) -> List[dict]:
+        """Check out the attendees of just-ended sessions, commit and notify.
+
+        Returns per session its end and the roster that was checked out,
+        so callers need not query it again.
+        """
+        ended = {
+            row.id: {"session_id": row.id, "ended_at": row.ended_at, "checked_out": []}
+            for row in ended_rows
+        }
+        for row in SessionManager._check_out_all(db, list(ended)):
+            ended[row.session_id]["checked_out"].append({
+                "attendance_id": row.id,
+                "personnel_id": row.personnel_id,
+                "checked_in_at": row.checked_in_at,
+                "checked_out_at": row.checked_out_at
+            })
         
-        # Checkout all attendees
-        active_attendances = db.query(Attendance).filter(
-            Attendance.session_id == session.id,
-            Attendance.checked_out_at == None
-        ).all()
+        roster_version = ChangeTracker.bump(db, ChangeTracker.ROSTER)
+        db.commit()
+        LiveRoster.sessions_ended(roster_version, list(ended))
+        QRGenerator.forget(ended)
+        TokenCache.forget()
+        for result in ended.values():
+            EventBroker.publish("session_ended", {
+                "session_id": result["session_id"],
+                "auto_ended": auto_ended,
+                "ended_at": result["ended_at"],
+                "checked_out": [entry["personnel_id"] for entry in result["checked_out"]]
+            })
+        return list(ended.values())
+    
+    @staticmethod
+    def auto_end_sessions(db: Session, session_ids: Optional[List[int]] = None) -> List[dict]:
+        """Auto-end sessions whose deadline has passed (except Einsatz).
+
+        The sessions end at their deadline, not at the time this runs, so a
+        late run (e.g. after a restart) does not stretch them. Returns the
+        ended sessions like end_session.
+        """
+        stmt = (
+            update(SessionModel)
+            .where(
+                SessionModel.is_active == True,
+                SessionModel.auto_end_at != None,
+                SessionModel.auto_end_at <= datetime.utcnow()
+            )
+            .values(is_active=False, ended_at=SessionModel.auto_end_at)
+            .returning(SessionModel.id, SessionModel.ended_at)
+            .execution_options(synchronize_session=False)
+        )
+        if session_ids is not None:
+            stmt = stmt.where(SessionModel.id.in_(session_ids))
+        ended_rows = db.execute(stmt).all()
         
-        for attendance in active_attendances:
-            attendance.checked_out_at = datetime.utcnow()
+        if not ended_rows:
+            db.rollback()
+            return []
+        return SessionManager._finish(db, ended_rows, auto_ended=True)
+    
+    @staticmethod
+    def end_session(db: Session, session_id: int) -> Optional[dict]:
+        """Manually end a session, all attendees are checked out at the same moment.
+
+        Returns {"session_id", "ended_at", "checked_out": [...]}, or None if
+        the session does not exist or has already ended.
+        """
+        ended_row = db.execute(
+            update(SessionModel)
+            .where(SessionModel.id == session_id, SessionModel.is_active == True)
+            .values(is_active=False, ended_at=datetime.utcnow())
+            .returning(SessionModel.id, SessionModel.ended_at)
+            .execution_options(synchronize_session=False)
+        ).first()
         
-        db.commit()
-        return True
+        if not ended_row:
+            db.rollback()
+            return None
+        return SessionManager._finish(db, [ended_row], auto_ended=False)[0]
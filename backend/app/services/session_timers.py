@@ -0,0 +1,72 @@
+from datetime import datetime, timezone
+from typing import Optional
+from apscheduler.jobstores.base import JobLookupError
+from sqlalchemy.orm import Session
+from ..database import SessionLocal
+from ..models import Session as SessionModel
+from .session_manager import SessionManager
+
+
+class SessionTimers:
+    """One-shot scheduler jobs that end sessions exactly at their deadline.
+
+    Each non-Einsatz session gets a date job at Session.auto_end_at when it
+    is created; on startup the jobs are re-armed from the database. Ending
+    is a guarded UPDATE, so a job that fires in several worker processes (or
+    after a manual end) does nothing.
+    """
+
+    _scheduler = None
+
+    @staticmethod
+    def _job_id(session_id: int) -> str:
+        return f"auto_end_session_{session_id}"
+
+    @staticmethod
+    def start(scheduler, db: Session):
+        """Attach to the scheduler, end overdue sessions and arm the others"""
+        SessionTimers._scheduler = scheduler
+        ended = SessionManager.auto_end_sessions(db)
+        if ended:
+            print(f"Auto-ended sessions: {[result['session_id'] for result in ended]}")
+
+        pending = db.query(SessionModel.id, SessionModel.auto_end_at).filter(
+            SessionModel.is_active == True,
+            SessionModel.auto_end_at != None
+        ).all()
+        for session_id, deadline in pending:
+            SessionTimers.arm(session_id, deadline)
+
+    @staticmethod
+    def arm(session_id: int, deadline: Optional[datetime]):
+        """Schedule the auto end of a session (deadline in naive UTC)"""
+        if SessionTimers._scheduler is None or deadline is None:
+            return
+        SessionTimers._scheduler.add_job(
+            SessionTimers._fire,
+            "date",
+            run_date=deadline.replace(tzinfo=timezone.utc),
+            args=[session_id],
+            id=SessionTimers._job_id(session_id),
+            replace_existing=True,
+            misfire_grace_time=None
+        )
+
+    @staticmethod
+    def cancel(session_id: int):
+        """Drop the job of a session that was ended or deleted manually"""
+        if SessionTimers._scheduler is None:
+            return
+        try:
+            SessionTimers._scheduler.remove_job(SessionTimers._job_id(session_id))
+        except JobLookupError:
+            pass
+
+    @staticmethod
+    def _fire(session_id: int):
+        db = SessionLocal()
+        try:
+            if SessionManager.auto_end_sessions(db, [session_id]):
+                print(f"Auto-ended session: {session_id}")
+        finally:
+            db.close()
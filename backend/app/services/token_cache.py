@@ -0,0 +1,62 @@
+import os
+import time
+from typing import Optional, Tuple
+from ..utils.cache import LRUCache
+
+# How long validated QR tokens (and rejected ones) are remembered (0 = off)
+QR_VALIDATION_CACHE_SECONDS = float(os.getenv("QR_VALIDATION_CACHE_SECONDS", "30"))
+ACCEPTED_ENTRIES = 256
+REJECTED_ENTRIES = 1024
+
+
+class TokenCache:
+    """Recent outcomes of POST /api/attendance/validate-token.
+
+    Accepted tokens map to their session until the cache time or the token
+    runs out, whichever is first; rejected tokens map to the error they got.
+    Rejections are kept apart so a flood of bad scans cannot push out the
+    good entries. Ending or deleting a session in this worker drops all
+    entries; other workers notice within QR_VALIDATION_CACHE_SECONDS (the
+    check-in itself still checks that the session is active).
+    """
+
+    # token -> (expires_at, session_id)
+    _accepted = LRUCache(ACCEPTED_ENTRIES)
+    # token -> (expires_at, status_code, detail)
+    _rejected = LRUCache(REJECTED_ENTRIES)
+
+    @staticmethod
+    def _fresh(entry: Optional[tuple]) -> Optional[tuple]:
+        if entry is None or entry[0] <= time.time():
+            return None
+        return entry[1:]
+
+    @staticmethod
+    def accepted(token: str) -> Optional[int]:
+        entry = TokenCache._fresh(TokenCache._accepted.get(token))
+        return entry[0] if entry else None
+
+    @staticmethod
+    def rejected(token: str) -> Optional[Tuple[int, str]]:
+        return TokenCache._fresh(TokenCache._rejected.get(token))
+
+    @staticmethod
+    def accept(token: str, session_id: int, token_expires_at: Optional[float] = None):
+        if QR_VALIDATION_CACHE_SECONDS <= 0:
+            return
+        expires_at = time.time() + QR_VALIDATION_CACHE_SECONDS
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        TokenCache._accepted.put(token, (expires_at, session_id))
+
+    @staticmethod
+    def reject(token: str, status_code: int, detail: str):
+        if QR_VALIDATION_CACHE_SECONDS <= 0:
+            return
+        TokenCache._rejected.put(token, (time.time() + QR_VALIDATION_CACHE_SECONDS, status_code, detail))
+
+    @staticmethod
+    def forget():
+        """Drop everything after sessions ended or were deleted (rare)"""
+        TokenCache._accepted.clear()
+        TokenCache._rejected.clear()
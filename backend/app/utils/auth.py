@@ -1,5 +1,9 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -8,21 +12,62 @@ from sqlalchemy.orm import Session
 import os
 from ..database import get_db
 from ..models import AdminUser, PersonnelAdmin, Personnel
+from ..services.change_tracker import ChangeTracker
+from .cache import LRUCache
 
 # Load from environment variables with defaults
 SECRET_KEY = os.getenv("SECRET_KEY", "feuerwehr-secret-key-2025-change-in-production")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "43200"))
+# How long an authenticated user is remembered per token (0 = off)
+PRINCIPAL_CACHE_SECONDS = float(os.getenv("PRINCIPAL_CACHE_SECONDS", "60"))
+PRINCIPAL_CACHE_ENTRIES = 256
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost factor; hashes with another cost are rehashed at the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Threads for password hashing and how many hashes may wait for them
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", "2"))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "8"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 security = HTTPBearer()
 
+# bcrypt takes a few hundred ms on a Pi; route handlers must not run it on
+# the event loop, or every other request (kiosk check-ins) waits
+_hash_pool = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+_hash_pending = 0
+_hash_lock = threading.Lock()
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+async def _run_hash(func, *args):
+    """Run a hash function in the bounded pool (429 when it is backed up)"""
+    global _hash_pending
+    with _hash_lock:
+        if _hash_pending >= BCRYPT_WORKERS + BCRYPT_MAX_PENDING:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Zu viele Anmeldeversuche, bitte kurz warten",
+                headers={"Retry-After": "1"}
+            )
+        _hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_pool, func, *args)
+    finally:
+        with _hash_lock:
+            _hash_pending -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify off the event loop; also returns a new hash if the cost factor changed"""
+    return await _run_hash(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hash(pwd_context.hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -40,20 +85,59 @@ def decode_token(token: str):
     except JWTError:
         return None
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
-    """Get current user - supports both AdminUser and PersonnelAdmin"""
-    token = credentials.credentials
-    payload = decode_token(token)
-    
-    if payload is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Ungültiger Token"
-        )
-    
+class Principal:
+    """Read-only copy of the authenticated user (admin or personnel admin).
+
+    Routes only read these fields; anything that writes the user loads the
+    ORM object again by id.
+    """
+
+    __slots__ = ("id", "username", "role", "is_personnel", "personnel_id", "last_login")
+
+    def __init__(self, id: int, username: str, role: str, is_personnel: bool,
+                 personnel_id: Optional[int] = None, last_login: Optional[datetime] = None):
+        for name, value in (("id", id), ("username", username), ("role", role),
+                            ("is_personnel", is_personnel), ("personnel_id", personnel_id),
+                            ("last_login", last_login)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Principal is read-only")
+
+
+class PrincipalCache:
+    """Principals by bearer token, so authenticated requests skip the user queries.
+
+    Changes to admin accounts bump the shared "users" counter and personnel
+    changes the "personnel" counter. Each entry remembers both versions and
+    is only used while they are unchanged, so changes made in another worker
+    take effect right away (one primary-key query instead of the user
+    queries).
+    """
+
+    COUNTERS = (ChangeTracker.USERS, ChangeTracker.PERSONNEL)
+
+    # token -> (expires_at, counter versions, principal)
+    _entries = LRUCache(PRINCIPAL_CACHE_ENTRIES)
+
+    @staticmethod
+    def get(token: str, versions: tuple) -> Optional[Principal]:
+        entry = PrincipalCache._entries.get(token)
+        if entry is None or entry[0] <= time.time() or entry[1] != versions:
+            return None
+        return entry[2]
+
+    @staticmethod
+    def put(token: str, principal: Principal, token_expires_at: Optional[float], versions: tuple):
+        if PRINCIPAL_CACHE_SECONDS <= 0:
+            return
+        expires_at = time.time() + PRINCIPAL_CACHE_SECONDS
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        PrincipalCache._entries.put(token, (expires_at, versions, principal))
+
+
+def _load_principal(payload: dict, db: Session) -> Principal:
     # Check token type
     token_type = payload.get("type", "admin")
     username: str = payload.get("sub")
@@ -91,17 +175,14 @@ async def get_current_user(
                 detail="Kein Admin-Zugriff"
             )
         
-        # Return AdminUser-like object for compatibility
-        class PersonnelAdminUser:
-            def __init__(self, personnel, admin):
-                self.id = admin.id
-                self.username = personnel.stammrollennummer
-                self.role = admin.role
-                self.is_personnel = True
-                self.personnel_id = personnel.id
-                self.personnel = personnel
-        
-        return PersonnelAdminUser(personnel, admin)
+        return Principal(
+            id=admin.id,
+            username=personnel.stammrollennummer,
+            role=admin.role,
+            is_personnel=True,
+            personnel_id=personnel.id,
+            last_login=admin.last_login
+        )
     
     else:
         # Standard admin login
@@ -112,6 +193,33 @@ async def get_current_user(
                 detail="Benutzer nicht gefunden"
             )
         
-        # Add flag for compatibility
-        user.is_personnel = False
-        return user
+        return Principal(
+            id=user.id,
+            username=user.username,
+            role=user.role,
+            is_personnel=False,
+            last_login=user.last_login
+        )
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """Get current user - supports both AdminUser and PersonnelAdmin"""
+    token = credentials.credentials
+    versions = ChangeTracker.versions(db, *PrincipalCache.COUNTERS)
+    principal = PrincipalCache.get(token, versions)
+    if principal is not None:
+        return principal
+    
+    payload = decode_token(token)
+    
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Ungültiger Token"
+        )
+    
+    principal = _load_principal(payload, db)
+    PrincipalCache.put(token, principal, payload.get("exp"), versions)
+    return principal
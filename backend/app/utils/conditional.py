@@ -0,0 +1,58 @@
+import time
+from datetime import datetime
+from typing import Optional
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+from ..services.change_tracker import ChangeTracker
+
+
+def version_etag(db: Session, key: str, *extra) -> str:
+    """Weak ETag derived from a shared change counter.
+
+    The counter's change time is part of the tag, so versions that repeat
+    after a database restore still produce different tags.
+    """
+    version, updated_at = ChangeTracker.current(db, key)
+    return counter_etag(key, version, updated_at, *extra)
+
+
+def counter_etag(key: str, version: int, updated_at: Optional[datetime], *extra) -> str:
+    """Weak ETag for a counter version that was already read"""
+    stamp = int(updated_at.timestamp() * 1000) if updated_at else 0
+    parts = [key, version, stamp, *extra]
+    return 'W/"' + "-".join(str(p) for p in parts) + '"'
+
+
+def minute_bucket() -> int:
+    """Extra ETag part for resources whose content depends on the clock"""
+    return int(time.time() // 60)
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison - ignore W/ prefixes
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == wanted:
+            return True
+    return False
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Return a 304 response if the client already has this version.
+
+    Otherwise the ETag is set on the regular response and None is returned,
+    so the endpoint continues building its body.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict
+from fastapi import HTTPException, Request, status
+
+# Login attempts per client IP and failed logins per account within the window
+LOGIN_WINDOW_SECONDS = int(os.getenv("LOGIN_WINDOW_SECONDS", "300"))
+LOGIN_MAX_ATTEMPTS_PER_IP = int(os.getenv("LOGIN_MAX_ATTEMPTS_PER_IP", "20"))
+LOGIN_MAX_FAILURES_PER_USER = int(os.getenv("LOGIN_MAX_FAILURES_PER_USER", "5"))
+# Upper bound of tracked IPs/accounts, so random names cannot fill the memory
+MAX_TRACKED_KEYS = 10000
+
+
+class _Window:
+    """Timestamps per key within the last LOGIN_WINDOW_SECONDS"""
+
+    def __init__(self):
+        self._events: Dict[str, Deque[float]] = {}
+
+    def _recent(self, key: str, now: float) -> Deque[float]:
+        events = self._events.get(key)
+        if events is None:
+            return deque()
+        while events and events[0] <= now - LOGIN_WINDOW_SECONDS:
+            events.popleft()
+        if not events:
+            del self._events[key]
+        return events
+
+    def count(self, key: str, now: float) -> int:
+        return len(self._recent(key, now))
+
+    def retry_after(self, key: str, now: float) -> int:
+        events = self._recent(key, now)
+        return max(1, int(events[0] + LOGIN_WINDOW_SECONDS - now) + 1) if events else 1
+
+    def add(self, key: str, now: float):
+        if key not in self._events and len(self._events) >= MAX_TRACKED_KEYS:
+            self._events.pop(next(iter(self._events)))  # oldest key
+        self._events.setdefault(key, deque()).append(now)
+
+    def clear(self, key: str):
+        self._events.pop(key, None)
+
+
+class LoginThrottle:
+    """Brute-force brake for the login routes (per worker process).
+
+    Every attempt counts against the client IP, failed ones also against the
+    account; over the limit the route answers 429 before any password is
+    hashed. A successful login clears the account's failures.
+    """
+
+    _ips = _Window()
+    _failures = _Window()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def check(request: Request, account: str):
+        """Count the attempt, or raise 429 if the IP or account is blocked"""
+        ip = request.client.host if request.client else "unknown"
+        now = time.time()
+        with LoginThrottle._lock:
+            if LoginThrottle._ips.count(ip, now) >= LOGIN_MAX_ATTEMPTS_PER_IP:
+                retry_after = LoginThrottle._ips.retry_after(ip, now)
+            elif LoginThrottle._failures.count(account, now) >= LOGIN_MAX_FAILURES_PER_USER:
+                retry_after = LoginThrottle._failures.retry_after(account, now)
+            else:
+                LoginThrottle._ips.add(ip, now)
+                return
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Zu viele Anmeldeversuche, bitte später erneut versuchen",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+    @staticmethod
+    def failed(account: str):
+        with LoginThrottle._lock:
+            LoginThrottle._failures.add(account, time.time())
+
+    @staticmethod
+    def succeeded(account: str):
+        with LoginThrottle._lock:
+            LoginThrottle._failures.clear(account)
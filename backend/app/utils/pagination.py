@@ -0,0 +1,17 @@
+import base64
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(started_at: datetime, row_id: int) -> str:
+    """Opaque keyset cursor for the position after (started_at, id)"""
+    raw = f"{started_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor, raises ValueError for malformed cursors"""
+    # binascii.Error and UnicodeDecodeError are ValueErrors as well
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    started_at, row_id = raw.rsplit("|", 1)
+    return datetime.fromisoformat(started_at), int(row_id)
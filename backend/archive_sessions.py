@@ -0,0 +1,40 @@
+"""
+Verschiebt die Sessions abgeschlossener Jahre in die Archivtabellen
+(archived_sessions, archived_attendances). Läuft sonst nachts automatisch.
+
+Aufruf:
+    python archive_sessions.py [--keep-years 2] [--vacuum]
+
+--vacuum gibt unter SQLite den frei gewordenen Platz an das Dateisystem zurück
+(sperrt die Datenbank für die Dauer, daher nicht während eines Dienstes).
+"""
+
+import argparse
+from sqlalchemy import text
+from app.database import engine, SessionLocal, init_db
+from app.services.archive_manager import ArchiveManager, ARCHIVE_KEEP_YEARS
+
+parser = argparse.ArgumentParser(description="Sessions abgeschlossener Jahre archivieren")
+parser.add_argument("--keep-years", type=int, default=ARCHIVE_KEEP_YEARS,
+                    help="Jahre in den aktiven Tabellen, inkl. des laufenden Jahres")
+parser.add_argument("--vacuum", action="store_true", help="SQLite-Datei danach verkleinern")
+args = parser.parse_args()
+
+# Creates the archive tables if they do not exist yet
+init_db()
+
+cutoff = ArchiveManager.cutoff(args.keep_years)
+if cutoff is None:
+    print("Archivierung ist deaktiviert (--keep-years 0)")
+else:
+    db = SessionLocal()
+    try:
+        moved = ArchiveManager.archive_closed_years(db, args.keep_years)
+    finally:
+        db.close()
+    print(f"✓ {moved} Session(s) vor dem {cutoff:%d.%m.%Y} archiviert")
+
+if args.vacuum and engine.dialect.name == "sqlite":
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM"))
+    print("✓ Datenbank verkleinert")
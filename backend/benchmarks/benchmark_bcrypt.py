@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Passwort-Hashing (bcrypt)
+Misst Hash- und Prüfzeit je Kostenfaktor auf der aktuellen Hardware und
+wie stark parallele Logins die Event-Loop blockieren - synchron (altes
+Verhalten) gegenüber dem Thread-Pool aus app.utils.auth
+
+Aufruf:
+    python benchmarks/benchmark_bcrypt.py [--rounds 10 11 12 13] [--samples 5] [--logins 8] [--target-ms 250]
+
+Der empfohlene Kostenfaktor ist der höchste, dessen Prüfzeit unter --target-ms liegt.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passlib.context import CryptContext
+
+from app.utils import auth
+
+
+def measure_rounds(rounds, samples):
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+    hash_ms, verify_ms = [], []
+    hashed = None
+    for _ in range(samples):
+        start = time.perf_counter()
+        hashed = context.hash("feuerwehr2025")
+        hash_ms.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        context.verify("feuerwehr2025", hashed)
+        verify_ms.append((time.perf_counter() - start) * 1000)
+    return statistics.median(hash_ms), statistics.median(verify_ms)
+
+
+async def loop_lag(logins, hashed, offloaded):
+    """Longest gap of a 10 ms ticker (stand-in for check-ins) during parallel logins"""
+    gaps = []
+    done = asyncio.Event()
+
+    async def ticker():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            gaps.append((now - last) * 1000 - 10)
+            last = now
+
+    async def login():
+        if offloaded:
+            await auth.verify_password_async("feuerwehr2025", hashed)
+        else:
+            auth.verify_password("feuerwehr2025", hashed)
+        await asyncio.sleep(0)
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = (time.perf_counter() - start) * 1000
+    done.set()
+    await tick
+    return max(gaps), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12, 13])
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--logins", type=int, default=8, help="parallele Logins für den Event-Loop-Test")
+    parser.add_argument("--target-ms", type=float, default=250)
+    args = parser.parse_args()
+
+    print(f"{'Faktor':>6} {'Hash (ms)':>10} {'Prüfen (ms)':>12}")
+    recommended = None
+    for rounds in args.rounds:
+        hash_ms, verify_ms = measure_rounds(rounds, args.samples)
+        print(f"{rounds:>6} {hash_ms:>10.1f} {verify_ms:>12.1f}")
+        if verify_ms <= args.target_ms:
+            recommended = rounds
+    if recommended:
+        print(f"Empfehlung: BCRYPT_ROUNDS={recommended} (Prüfzeit <= {args.target_ms:.0f} ms)")
+    else:
+        print(f"Kein Faktor unter {args.target_ms:.0f} ms, kleinsten gemessenen verwenden")
+
+    auth.BCRYPT_MAX_PENDING = max(auth.BCRYPT_MAX_PENDING, args.logins)
+    hashed = auth.get_password_hash("feuerwehr2025")
+    print()
+    print(f"{args.logins} parallele Logins mit BCRYPT_ROUNDS={auth.BCRYPT_ROUNDS}, "
+          f"BCRYPT_WORKERS={auth.BCRYPT_WORKERS}:")
+    for label, offloaded in (("synchron (alt)", False), ("Thread-Pool (neu)", True)):
+        lag, elapsed = asyncio.run(loop_lag(args.logins, hashed, offloaded))
+        print(f"  {label:<18} Event-Loop blockiert max. {lag:7.1f} ms, alle Logins nach {elapsed:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Shared Refresh State
+Misst Lese- und Schreibzeiten der gemeinsamen Change-Counter
+(Grundlage für /api/events/last-refresh bei mehreren Workern)
+
+Aufruf:
+    python benchmarks/benchmark_change_tracker.py [--reads 20000] [--writes 500] [--database-url URL]
+
+Ohne --database-url wird eine temporäre SQLite-Datenbank verwendet.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(label, samples):
+    micro = [s * 1_000_000 for s in samples]
+    print(f"{label}:")
+    print(f"   n={len(micro)}  mean={statistics.mean(micro):.1f}µs  "
+          f"p50={percentile(micro, 50):.1f}µs  p95={percentile(micro, 95):.1f}µs  "
+          f"p99={percentile(micro, 99):.1f}µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reads", type=int, default=20000)
+    parser.add_argument("--writes", type=int, default=500)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    tmpdir = None
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        tmpdir = tempfile.mkdtemp(prefix="bench_change_tracker_")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+    from app.database import init_db, SessionLocal, DATABASE_URL
+    from app.services.change_tracker import ChangeTracker
+
+    print("=" * 60)
+    print("Benchmark: Shared Refresh State")
+    print("=" * 60)
+    print(f"Datenbank: {DATABASE_URL}")
+    print()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        ChangeTracker.ensure_counters(db)
+        key = ChangeTracker.KIOSK_REFRESH
+
+        # Warm up connection pool and statement cache
+        for _ in range(100):
+            ChangeTracker.current(db, key)
+            db.rollback()
+
+        reads = []
+        for _ in range(args.reads):
+            start = time.perf_counter()
+            ChangeTracker.current(db, key)
+            db.rollback()  # end the read transaction like a request would
+            reads.append(time.perf_counter() - start)
+        report("Lesen (ChangeTracker.current)", reads)
+
+        writes = []
+        for _ in range(args.writes):
+            start = time.perf_counter()
+            ChangeTracker.bump(db, key)
+            db.commit()
+            writes.append(time.perf_counter() - start)
+        report("Schreiben (bump + commit)", writes)
+
+        print()
+        p99_ms = percentile(reads, 99) * 1000
+        status = "✓" if p99_ms < 1 else "✗"
+        print(f"{status} Lese-p99: {p99_ms:.3f} ms (Ziel: < 1 ms)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
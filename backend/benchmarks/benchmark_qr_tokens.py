@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: QR-Check-in-Tokens
+Vergleicht das alte JWT-Format mit dem kompakten signierten Token:
+URL-Länge, QR-Version, PNG-Größe, Renderzeit und Prüfzeit
+
+Aufruf:
+    python benchmarks/benchmark_qr_tokens.py [--renders 50] [--validations 20000] [--base-url URL]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import qrcode
+
+from app.services.qr_generator import QRGenerator
+
+
+def qr_version(data):
+    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L)
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr.version
+
+
+def measure(label, token, renders, validations, base_url):
+    url = f"{base_url}/checkin?token={token}"
+    
+    render_ms = []
+    for _ in range(renders):
+        start = time.perf_counter()
+        png = QRGenerator.render_png(url)
+        render_ms.append((time.perf_counter() - start) * 1000)
+    
+    start = time.perf_counter()
+    for _ in range(validations):
+        assert QRGenerator.validate_session_token(token)
+    validate_us = (time.perf_counter() - start) / validations * 1_000_000
+    
+    version = qr_version(url)
+    print(f"{label}")
+    print(f"  URL-Länge:   {len(url)} Zeichen")
+    print(f"  QR-Version:  {version} ({17 + 4 * version}x{17 + 4 * version} Module)")
+    print(f"  PNG-Größe:   {len(png)} Bytes")
+    print(f"  Rendern:     median {statistics.median(render_ms):.2f} ms, max {max(render_ms):.2f} ms")
+    print(f"  Prüfen:      {validate_us:.1f} µs pro Token")
+    return statistics.median(render_ms), len(png), version
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renders", type=int, default=50)
+    parser.add_argument("--validations", type=int, default=20000)
+    parser.add_argument("--base-url", default="http://192.168.1.10:5173")
+    args = parser.parse_args()
+    
+    session_id = 1234
+    legacy = measure("JWT (alt)", QRGenerator.generate_legacy_token(session_id),
+                     args.renders, args.validations, args.base_url)
+    compact = measure("Kompakt (neu)", QRGenerator.generate_session_token(session_id),
+                      args.renders, args.validations, args.base_url)
+    
+    print()
+    print(f"Renderzeit: {legacy[0] / compact[0]:.1f}x schneller, "
+          f"PNG: {legacy[1] - compact[1]} Bytes kleiner, "
+          f"QR-Version {legacy[2]} -> {compact[2]}")
+
+
+if __name__ == "__main__":
+    main()
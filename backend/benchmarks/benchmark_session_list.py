@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Sessionliste (GET /api/sessions)
+Vergleicht die frühere Abfrage (eine Anwesenheitsabfrage pro Session) mit den
+gespeicherten Zählern und misst tiefe Seiten mit skip gegenüber dem Cursor
+(X-Next-Cursor).
+
+Aufruf:
+    python benchmarks/benchmark_session_list.py [--sessions 5000] [--limit 100]
+
+Legt eine temporäre SQLite-Datenbank mit Testdaten an.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed(db, session_count):
+    from sqlalchemy import insert
+    from app.models import Personnel, Session as SessionModel, Attendance
+    from app.services.session_counters import SessionCounters
+
+    db.execute(insert(Personnel), [{
+        "stammrollennummer": f"X{i:04d}",
+        "vorname": "Test",
+        "nachname": f"Person {i}",
+        "dienstgrad": "FM",
+        "is_active": True
+    } for i in range(200)])
+    personnel_ids = [row[0] for row in db.query(Personnel.id).all()]
+
+    start = datetime.utcnow() - timedelta(days=8 * 365)
+    db.execute(insert(SessionModel), [{
+        "event_type": random.choice(["Einsatz", "Übungsdienst", "Arbeitsdienst-A"]),
+        "started_at": start + timedelta(hours=12 * i),
+        "ended_at": start + timedelta(hours=12 * i + 2),
+        "is_active": i >= session_count - 2
+    } for i in range(session_count)])
+    sessions = db.query(SessionModel.id, SessionModel.started_at, SessionModel.is_active).all()
+
+    rows = []
+    for session_id, started_at, is_active in sessions:
+        for personnel_id in random.sample(personnel_ids, random.randint(8, 30)):
+            rows.append({
+                "session_id": session_id,
+                "personnel_id": personnel_id,
+                "checked_in_at": started_at,
+                "checked_out_at": None if is_active else started_at + timedelta(hours=2)
+            })
+    db.execute(insert(Attendance), rows)
+    db.commit()
+    SessionCounters.repair(db)
+    print(f"Testdaten: {len(sessions)} Sessions, {len(rows)} Anwesenheiten")
+
+
+def legacy_list(db, skip, limit):
+    """Previous implementation: one attendance query per listed session"""
+    from app.models import Session as SessionModel, Attendance
+
+    sessions = db.query(SessionModel).order_by(SessionModel.started_at.desc()).offset(skip).limit(limit).all()
+    result = []
+    for s in sessions:
+        attendances = db.query(Attendance).filter(Attendance.session_id == s.id).all()
+        result.append({
+            "id": s.id,
+            "total_attendees": len(attendances),
+            "active_attendees": sum(1 for a in attendances if a.checked_out_at is None)
+        })
+    return result
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def measure(label, fn, counter, runs):
+    times = []
+    queries = 0
+    for _ in range(runs):
+        before = counter.count
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+        queries = counter.count - before
+    print(f"{label:<44} {statistics.median(times):>9.1f} ms {queries:>8}")
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="benchmark_session_list_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'sessions.db')}"
+
+    from fastapi.testclient import TestClient
+    from app.database import init_db, engine, SessionLocal
+    from main import app
+
+    print("=" * 70)
+    print("Benchmark: Sessionliste")
+    print("=" * 70)
+    init_db()
+    db = SessionLocal()
+    seed(db, args.sessions)
+    print()
+
+    client = TestClient(app)  # without startup - no scheduler needed
+    counter = QueryCounter(engine)
+    deep = max(0, args.sessions - args.limit)
+
+    # Cursor for the last page (walked once beforehand, as a client would)
+    cursor = None
+    response = client.get(f"/api/sessions?limit={args.limit}")
+    while response.headers.get("X-Next-Cursor"):
+        next_cursor = response.headers["X-Next-Cursor"]
+        response = client.get(f"/api/sessions?limit={args.limit}&cursor={next_cursor}")
+        if response.json():
+            cursor = next_cursor
+
+    # Results must match the previous implementation
+    legacy = legacy_list(db, 0, args.limit)
+    current = client.get(f"/api/sessions?limit={args.limit}").json()
+    assert [(r["id"], r["total_attendees"], r["active_attendees"]) for r in current] == \
+        [(r["id"], r["total_attendees"], r["active_attendees"]) for r in legacy], "Zählungen weichen ab"
+
+    print(f"{'Abfrage':<44} {'Median':>12} {'Queries':>8}")
+    print("-" * 70)
+    measure("Vorher: erste Seite (N+1)", lambda: legacy_list(db, 0, args.limit), counter, args.runs)
+    measure("Vorher: letzte Seite (N+1, skip)", lambda: legacy_list(db, deep, args.limit), counter, args.runs)
+    measure("Jetzt: erste Seite", lambda: client.get(f"/api/sessions?limit={args.limit}"), counter, args.runs)
+    measure("Jetzt: letzte Seite (skip)",
+            lambda: client.get(f"/api/sessions?limit={args.limit}&skip={deep}"), counter, args.runs)
+    measure("Jetzt: letzte Seite (Cursor)",
+            lambda: client.get(f"/api/sessions?limit={args.limit}&cursor={cursor}"), counter, args.runs)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Query-Pläne der häufigsten Abfragen
+Zeigt EXPLAIN (PostgreSQL) bzw. EXPLAIN QUERY PLAN (SQLite) für die Abfragen
+von Check-in, Check-out, Live-Anzeige, Sessionliste und Statistiken und prüft,
+dass keine davon die Tabellen attendances/sessions vollständig durchsucht.
+
+Aufruf:
+    python benchmarks/explain_hot_queries.py [--database-url URL] [--sessions 2000]
+
+Ohne --database-url wird eine temporäre SQLite-Datenbank mit Testdaten angelegt.
+Bei einer bestehenden Datenbank vorher migrate_indexes.py ausführen.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed(db, session_count):
+    from sqlalchemy import insert
+    from app.models import Personnel, Session as SessionModel, Attendance
+
+    db.execute(insert(Personnel), [{
+        "stammrollennummer": f"X{i:04d}",
+        "vorname": "Test",
+        "nachname": f"Person {i}",
+        "dienstgrad": "FM",
+        "is_active": True
+    } for i in range(200)])
+    personnel_ids = [row[0] for row in db.query(Personnel.id).all()]
+
+    start = datetime.utcnow() - timedelta(days=3 * 365)
+    db.execute(insert(SessionModel), [{
+        "event_type": random.choice(["Einsatz", "Übungsdienst", "Arbeitsdienst-A"]),
+        "started_at": start + timedelta(hours=12 * i),
+        "ended_at": start + timedelta(hours=12 * i + 2),
+        "is_active": i >= session_count - 2
+    } for i in range(session_count)])
+    sessions = db.query(SessionModel.id, SessionModel.started_at, SessionModel.is_active).all()
+
+    rows = []
+    for session_id, started_at, is_active in sessions:
+        for personnel_id in random.sample(personnel_ids, 15):
+            rows.append({
+                "session_id": session_id,
+                "personnel_id": personnel_id,
+                "checked_in_at": started_at,
+                "checked_out_at": None if is_active else started_at + timedelta(hours=2)
+            })
+    db.execute(insert(Attendance), rows)
+    db.commit()
+    print(f"Testdaten: {len(personnel_ids)} Personen, {len(sessions)} Sessions, {len(rows)} Anwesenheiten")
+
+
+def hot_queries():
+    from sqlalchemy import select, func, tuple_
+    from app.models import Personnel, Session as SessionModel, Attendance
+
+    year_start = datetime(datetime.utcnow().year, 1, 1)
+    year_end = datetime(datetime.utcnow().year, 12, 31, 23, 59, 59)
+
+    return [
+        ("Check-in: Person per Stammrollennummer",
+         select(Personnel).where(Personnel.stammrollennummer == "X0001", Personnel.is_active == True)),
+        ("Check-in/Check-out: offene Anwesenheit",
+         select(Attendance).where(
+             Attendance.session_id == 1,
+             Attendance.personnel_id == 1,
+             Attendance.checked_out_at == None
+         )),
+        ("Live-Anzeige: offene Anwesenheiten einer Session",
+         select(Attendance).where(Attendance.session_id == 1, Attendance.checked_out_at == None)),
+        ("Live-Anzeige: Neuaufbau (aktive Sessions + Personal)",
+         select(Attendance, Personnel)
+         .join(Personnel, Attendance.personnel_id == Personnel.id)
+         .join(SessionModel, Attendance.session_id == SessionModel.id)
+         .where(SessionModel.is_active == True, Attendance.checked_out_at == None)),
+        ("Sessiondetails: alle Anwesenheiten",
+         select(Attendance).where(Attendance.session_id == 1)),
+        ("Sessionliste: neueste zuerst",
+         select(SessionModel).order_by(SessionModel.started_at.desc()).limit(50)),
+        ("Sessionliste: Folgeseite per Cursor",
+         select(SessionModel.id)
+         .where(tuple_(SessionModel.started_at, SessionModel.id) < (year_start, 1000))
+         .order_by(SessionModel.started_at.desc(), SessionModel.id.desc()).limit(100)),
+        ("Sessionliste: nur aktive",
+         select(SessionModel).where(SessionModel.is_active == True)
+         .order_by(SessionModel.started_at.desc()).limit(50)),
+        ("Statistik: Sessions im Jahr",
+         select(SessionModel.event_type, func.count(SessionModel.id))
+         .where(SessionModel.started_at >= year_start, SessionModel.started_at <= year_end)
+         .group_by(SessionModel.event_type)),
+        ("Statistik: Anwesenheiten einer Person im Jahr",
+         select(Attendance)
+         .join(SessionModel, Attendance.session_id == SessionModel.id)
+         .where(
+             Attendance.personnel_id == 1,
+             SessionModel.started_at >= year_start,
+             SessionModel.started_at <= year_end
+         )),
+    ]
+
+
+def explain(conn, stmt):
+    compiled = stmt.compile(dialect=conn.dialect)
+    if compiled.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        params = compiled.params
+
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), params).all()
+        return [row[-1] for row in rows]
+    rows = conn.exec_driver_sql("EXPLAIN " + str(compiled), params).all()
+    return [row[0] for row in rows]
+
+
+def is_full_scan(line):
+    """Full scan of a large table in the plan line"""
+    line = line.upper()
+    for table in ("ATTENDANCES", "SESSIONS"):
+        # SQLite: "SCAN attendances", PostgreSQL: "Seq Scan on attendances"
+        if f"SCAN {table}" in line and "USING" not in line:
+            return True
+        if f"SEQ SCAN ON {table}" in line:
+            return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url")
+    parser.add_argument("--sessions", type=int, default=2000)
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        tmpdir = tempfile.mkdtemp(prefix="explain_hot_queries_")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'explain.db')}"
+
+    from sqlalchemy import text
+    from app.database import init_db, engine, SessionLocal, DATABASE_URL
+
+    print("=" * 60)
+    print("Query-Pläne der häufigsten Abfragen")
+    print("=" * 60)
+    print(f"Datenbank: {DATABASE_URL}")
+
+    if not args.database_url:
+        init_db()
+        db = SessionLocal()
+        try:
+            seed(db, args.sessions)
+        finally:
+            db.close()
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+    print()
+
+    failures = 0
+    with engine.connect() as conn:
+        for label, stmt in hot_queries():
+            plan = explain(conn, stmt)
+            scans = [line for line in plan if is_full_scan(line)]
+            status = "✗" if scans else "✓"
+            failures += bool(scans)
+            print(f"{status} {label}")
+            for line in plan:
+                print(f"     {line}")
+
+    print()
+    if failures:
+        print(f"✗ {failures} Abfrage(n) ohne passenden Index")
+        sys.exit(1)
+    print("✓ Alle Abfragen verwenden einen Index")
+
+
+if __name__ == "__main__":
+    main()
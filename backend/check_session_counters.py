@@ -0,0 +1,37 @@
+"""
+Prüft die gespeicherten Teilnehmerzähler der Sessions
+(total_attendees, active_attendees, person_seconds) gegen die Anwesenheiten.
+
+Aufruf:
+    python check_session_counters.py           # nur prüfen, Exit-Code 1 bei Abweichungen
+    python check_session_counters.py --repair  # Abweichungen korrigieren
+"""
+
+import argparse
+import sys
+from app.database import SessionLocal
+from app.services.session_counters import SessionCounters
+
+parser = argparse.ArgumentParser(description="Teilnehmerzähler der Sessions prüfen")
+parser.add_argument("--repair", action="store_true", help="Abweichungen korrigieren")
+args = parser.parse_args()
+
+db = SessionLocal()
+try:
+    mismatches = SessionCounters.check(db)
+    for mismatch in mismatches[:50]:
+        print(f"✗ Session {mismatch['session_id']}: gespeichert {mismatch['stored']}, "
+              f"erwartet {mismatch['expected']} (gesamt, aktiv, Personensekunden)")
+    if len(mismatches) > 50:
+        print(f"  ... und {len(mismatches) - 50} weitere")
+
+    if not mismatches:
+        print("✓ Alle Zähler stimmen")
+    elif args.repair:
+        fixed = SessionCounters.repair(db)
+        print(f"✓ {fixed} Session(s) korrigiert")
+    else:
+        print(f"✗ {len(mismatches)} Session(s) mit abweichenden Zählern (--repair zum Korrigieren)")
+        sys.exit(1)
+finally:
+    db.close()
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Lasttest: Alarmierung
+Simuliert den Ansturm nach einer Alarmierung: N Mitglieder kommen innerhalb
+eines Zeitfensters an und buchen sich an den Kiosken oder per QR-Code am
+Handy ein, während Kioske und Live-Anzeige die Anwesenheitsliste abfragen.
+
+Ablauf:
+    1. Personal anlegen (POST /api/personnel, bestehende Nummern werden übernommen)
+    2. Einsatz eröffnen (POST /api/sessions)
+    3. Gleichzeitig: Check-ins (Kiosk), QR-Validierung + Check-in (Handy),
+       Abfragen der Anwesenheitsliste (mit If-None-Match wie ein Browser)
+    4. Bericht: p50/p95/p99 je Aufruf, Fehler, "database is locked"
+    5. Einsatz beenden
+
+Aufruf (aus dem backend-Verzeichnis):
+    python loadtest/alarm_burst.py                       # App im Prozess, temporäre SQLite-DB
+    python loadtest/alarm_burst.py --database-url postgresql+psycopg://feuerwehr:pw@localhost/loadtest
+    python loadtest/alarm_burst.py --base-url http://localhost:8000   # laufender Server
+
+Im Prozess läuft die App wie mit einem einzelnen uvicorn-Worker. Für mehrere
+Worker den Server separat starten (uvicorn main:app --workers 4) und
+--base-url verwenden; "database is locked" erscheint dann als HTTP 500 und
+steht im Server-Log. QR-Tokens werden lokal mit dem SECRET_KEY aus .env
+signiert - der Server muss denselben Schlüssel verwenden.
+
+Optionen siehe --help. Mit --json werden die Ergebnisse zum Vergleich
+zwischen zwei Ständen gespeichert. Benötigt httpx (loadtest/requirements.txt).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+# Add backend directory to path
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+try:
+    import httpx
+except ImportError:
+    print("❌ httpx fehlt: pip install -r loadtest/requirements.txt")
+    sys.exit(1)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def classify_error(message):
+    if "database is locked" in message:
+        return "database is locked"
+    return message.splitlines()[0][:80] if message else "unbekannt"
+
+
+class Recorder:
+    """Collects latencies and errors per operation"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(Counter)
+        self.not_modified = Counter()
+
+    async def call(self, operation, request, expected=(200,)):
+        start = time.perf_counter()
+        try:
+            response = await request()
+        except Exception as e:
+            self.samples[operation].append(time.perf_counter() - start)
+            self.errors[operation][classify_error(f"{type(e).__name__}: {e}")] += 1
+            return None
+
+        self.samples[operation].append(time.perf_counter() - start)
+        if response.status_code == 304:
+            self.not_modified[operation] += 1
+        elif response.status_code not in expected:
+            detail = f"HTTP {response.status_code}"
+            if "database is locked" in response.text:
+                detail += " database is locked"
+            self.errors[operation][detail] += 1
+        return response
+
+    def locked_errors(self):
+        return sum(
+            count for errors in self.errors.values()
+            for error, count in errors.items() if "database is locked" in error
+        )
+
+    def summary(self):
+        result = {}
+        for operation, samples in sorted(self.samples.items()):
+            millis = [s * 1000 for s in samples]
+            result[operation] = {
+                "n": len(millis),
+                "errors": sum(self.errors[operation].values()),
+                "not_modified": self.not_modified[operation],
+                "mean_ms": round(statistics.mean(millis), 2),
+                "p50_ms": round(percentile(millis, 50), 2),
+                "p95_ms": round(percentile(millis, 95), 2),
+                "p99_ms": round(percentile(millis, 99), 2),
+                "max_ms": round(max(millis), 2),
+            }
+        return result
+
+
+async def seed_personnel(client, headers, count):
+    """Create (or reuse) the load-test personnel, returns their numbers"""
+    numbers = [f"LT{i:04d}" for i in range(1, count + 1)]
+    for i, number in enumerate(numbers):
+        response = await client.post("/api/personnel", headers=headers, json={
+            "stammrollennummer": number,
+            "vorname": "Last",
+            "nachname": f"Test {i + 1}",
+            "dienstgrad": "BM" if i == 0 else "FM"
+        })
+        if response.status_code not in (200, 400):  # 400: already exists
+            raise RuntimeError(f"Personal {number} konnte nicht angelegt werden: {response.text}")
+    return numbers
+
+
+async def member(client, recorder, args, session_id, token, number, arrival, via_phone):
+    """One member arriving after an alarm"""
+    await asyncio.sleep(arrival)
+
+    if via_phone:
+        # Phone opens the QR link: kiosk page state, then token check
+        await recorder.call("GET /kiosk/state (Handy)", lambda: client.get("/api/kiosk/state"))
+        await recorder.call(
+            "POST /attendance/validate-token",
+            lambda: client.post("/api/attendance/validate-token", json={"token": token})
+        )
+
+    if args.endpoint == "toggle":
+        operation, url = "POST /attendance/toggle", "/api/attendance/toggle"
+    else:
+        operation, url = "POST /attendance/checkin", "/api/attendance/checkin"
+    await recorder.call(operation, lambda: client.post(url, json={
+        "session_id": session_id,
+        "stammrollennummer": number
+    }))
+
+
+async def poller(client, recorder, operation, url, interval, stop, rng):
+    """Kiosk or dashboard refreshing a list, revalidating with its ETag"""
+    etag = None
+    await asyncio.sleep(rng.uniform(0, interval))
+    while not stop.is_set():
+        headers = {"If-None-Match": etag} if etag else {}
+        response = await recorder.call(operation, lambda: client.get(url, headers=headers))
+        if response is not None and response.status_code == 200:
+            etag = response.headers.get("etag")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run(client, args):
+    from app.services.qr_generator import QRGenerator
+
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+
+    login = await client.post("/api/auth/login", json={
+        "username": args.admin_user,
+        "password": args.admin_password
+    })
+    if login.status_code != 200:
+        raise RuntimeError(f"Login fehlgeschlagen: {login.text}")
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    numbers = await seed_personnel(client, headers, args.members)
+
+    response = await client.post("/api/sessions", json={"event_type": "Einsatz"})
+    if response.status_code != 200:
+        raise RuntimeError(f"Einsatz konnte nicht eröffnet werden: {response.text}")
+    session_id = response.json()["id"]
+    token = QRGenerator.generate_session_token(session_id)
+
+    print(f"Einsatz {session_id}: {args.members} Mitglieder in {args.window:.0f} s, "
+          f"{args.kiosks} Kioske, {args.phone_share:.0%} per Handy, Endpunkt: {args.endpoint}")
+
+    stop = asyncio.Event()
+    pollers = []
+    for k in range(args.kiosks):
+        pollers.append(poller(
+            client, recorder, "GET /attendance/session/{id}/active (Kiosk)",
+            f"/api/attendance/session/{session_id}/active", args.poll_interval, stop, rng
+        ))
+    for d in range(args.dashboards):
+        pollers.append(poller(
+            client, recorder, "GET /sessions/active/current (Dashboard)",
+            "/api/sessions/active/current", args.poll_interval, stop, rng
+        ))
+    poller_tasks = [asyncio.create_task(p) for p in pollers]
+
+    # Arrivals peak early after the alarm
+    arrivals = [rng.triangular(0, args.window, args.window * 0.3) for _ in numbers]
+    phones = [rng.random() < args.phone_share for _ in numbers]
+
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        member(client, recorder, args, session_id, token, number, arrival, via_phone)
+        for number, arrival, via_phone in zip(numbers, arrivals, phones)
+    ])
+    duration = time.perf_counter() - start
+
+    stop.set()
+    await asyncio.gather(*poller_tasks)
+
+    roster = await client.get(f"/api/attendance/session/{session_id}/active")
+    checked_in = len(roster.json()) if roster.status_code == 200 else -1
+
+    ended = await client.post(f"/api/sessions/{session_id}/end", headers=headers)
+    if ended.status_code != 200:
+        print(f"⚠️  Einsatz {session_id} konnte nicht beendet werden: {ended.text}")
+
+    return recorder, duration, checked_in
+
+
+def report(args, recorder, duration, checked_in):
+    summary = recorder.summary()
+
+    print()
+    print(f"{'Aufruf':<48} {'n':>5} {'Fehler':>6} {'304':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    print("-" * 100)
+    for operation, stats in summary.items():
+        print(f"{operation:<48} {stats['n']:>5} {stats['errors']:>6} {stats['not_modified']:>5} "
+              f"{stats['p50_ms']:>6.1f}ms {stats['p95_ms']:>6.1f}ms {stats['p99_ms']:>6.1f}ms "
+              f"{stats['max_ms']:>6.1f}ms")
+
+    errors = {op: dict(errs) for op, errs in recorder.errors.items() if errs}
+    if errors:
+        print()
+        print("Fehler:")
+        for operation, errs in errors.items():
+            for error, count in errs.items():
+                print(f"   {operation}: {count}× {error}")
+
+    locked = recorder.locked_errors()
+    print()
+    print(f"Dauer: {duration:.1f} s")
+    print(f"{'✓' if locked == 0 else '✗'} database is locked: {locked}")
+    print(f"{'✓' if checked_in == args.members else '✗'} Eingecheckt: {checked_in}/{args.members}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "config": {
+                    "members": args.members,
+                    "window": args.window,
+                    "kiosks": args.kiosks,
+                    "dashboards": args.dashboards,
+                    "phone_share": args.phone_share,
+                    "poll_interval": args.poll_interval,
+                    "endpoint": args.endpoint,
+                    "seed": args.seed,
+                    "target": args.base_url or os.environ.get("DATABASE_URL"),
+                },
+                "duration_s": round(duration, 2),
+                "database_locked": locked,
+                "checked_in": checked_in,
+                "operations": summary,
+                "errors": errors,
+            }, f, indent=2, ensure_ascii=False)
+        print(f"Ergebnisse gespeichert: {args.json}")
+
+    return locked == 0 and checked_in == args.members
+
+
+async def main_async(args):
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=30) as client:
+            return await run(client, args)
+
+    import main as backend
+
+    await backend.app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=backend.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=30) as client:
+            return await run(client, args)
+    finally:
+        await backend.app.router.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=40, help="Mitglieder, die sich einbuchen")
+    parser.add_argument("--window", type=float, default=90, help="Zeitfenster der Ankünfte in Sekunden")
+    parser.add_argument("--kiosks", type=int, default=2, help="Kioske, die die Anwesenheitsliste abfragen")
+    parser.add_argument("--dashboards", type=int, default=1, help="Live-Anzeigen")
+    parser.add_argument("--phone-share", type=float, default=0.5, help="Anteil der Buchungen per QR-Code")
+    parser.add_argument("--poll-interval", type=float, default=5, help="Abfrageintervall der Listen (s)")
+    parser.add_argument("--endpoint", choices=["toggle", "checkin"], default="toggle")
+    parser.add_argument("--seed", type=int, default=112)
+    parser.add_argument("--database-url", help="Datenbank für den Test im Prozess (Standard: temporäre SQLite)")
+    parser.add_argument("--base-url", help="Laufenden Server testen, z. B. http://localhost:8000")
+    parser.add_argument("--admin-user", default="admin")
+    parser.add_argument("--admin-password", default="feuerwehr2025")
+    parser.add_argument("--json", help="Ergebnisse als JSON speichern")
+    args = parser.parse_args()
+
+    if not args.base_url:
+        if args.database_url:
+            os.environ["DATABASE_URL"] = args.database_url
+        else:
+            tmpdir = tempfile.mkdtemp(prefix="loadtest_")
+            os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'loadtest.db')}"
+        os.chdir(BACKEND_DIR)
+
+    print("=" * 60)
+    print("Lasttest: Alarmierung")
+    print("=" * 60)
+    print(f"Ziel: {args.base_url or os.environ['DATABASE_URL']}")
+
+    recorder, duration, checked_in = asyncio.run(main_async(args))
+    success = report(args, recorder, duration, checked_in)
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,22 +4,30 @@ from fastapi.staticfiles import StaticFiles
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 import os
+import sys
+from typing import List
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
 from app.database import init_db, SessionLocal
+from app.migrations import upgrade_database
 from app.seed import seed_initial_data
-from app.services.session_manager import SessionManager
+from app.services.session_timers import SessionTimers
 from app.services.backup_manager import BackupManager
+from app.services.change_tracker import ChangeTracker
+from app.services.live_roster import LiveRoster
+from app.services.personnel_index import PersonnelIndex
+from app.services.checkin_journal import CheckinJournal
+from app.services.archive_manager import ArchiveManager, ARCHIVE_KEEP_YEARS
 from app.models import SystemSettings
 
 # Import routes
 from app.routes import (
     auth, personnel, sessions, attendance, settings, 
     backup, export, announcements, news, statistics, 
-    system, events, calendar, duty, personnel_admin, audit
+    system, events, calendar, duty, personnel_admin, audit, kiosk
 )
 
 app = FastAPI(
@@ -36,6 +44,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
@@ -55,6 +64,7 @@ app.include_router(calendar.router)
 app.include_router(duty.router)
 app.include_router(personnel_admin.router)
 app.include_router(audit.router)
+app.include_router(kiosk.router)
 
 # Serve uploaded files
 os.makedirs("./uploads", exist_ok=True)
@@ -63,13 +73,51 @@ app.mount("/uploads", StaticFiles(directory="./uploads"), name="uploads")
 # Background scheduler
 scheduler = BackgroundScheduler()
 
-def auto_end_sessions_job():
-    """Background job to auto-end sessions after 3 hours"""
+# How often each worker process checks for changes made by other workers.
+# Off by default (single worker); with several workers it defaults to 1 s
+CHANGE_POLL_SECONDS = float(os.getenv("CHANGE_POLL_SECONDS", "0"))
+
+def configured_workers(argv: List[str] = sys.argv) -> int:
+    """Worker processes of the server (uvicorn/gunicorn --workers, WEB_CONCURRENCY).
+
+    uvicorn and gunicorn workers keep the command line of the server process.
+    """
+    workers = os.getenv("WEB_CONCURRENCY", "1")
+    for i, arg in enumerate(argv):
+        if arg in ("--workers", "-w") and i + 1 < len(argv):
+            workers = argv[i + 1]
+        elif arg.startswith("--workers="):
+            workers = arg.split("=", 1)[1]
+    try:
+        return int(workers)
+    except ValueError:
+        return 1
+
+def change_poll_seconds() -> float:
+    """Change poll interval; never off when several workers share the database"""
+    if CHANGE_POLL_SECONDS <= 0 and configured_workers() > 1:
+        print("⚠️  Several workers but CHANGE_POLL_SECONDS=0 - polling for changes every second")
+        return 1.0
+    return CHANGE_POLL_SECONDS
+
+def change_watcher_job():
+    """Background job to pick up shared state changes from other worker processes"""
+    db = SessionLocal()
+    try:
+        ChangeTracker.poll(db)
+    finally:
+        db.close()
+
+def archive_job():
+    """Background job to move the sessions of closed years into the archive tables"""
     db = SessionLocal()
     try:
-        ended_sessions = SessionManager.auto_end_sessions(db)
-        if ended_sessions:
-            print(f"Auto-ended sessions: {ended_sessions}")
+        # Scheduled in every worker process, only one of them runs it
+        if not ArchiveManager.claim_run(db):
+            return
+        moved = ArchiveManager.archive_closed_years(db)
+        if moved:
+            print(f"Archived {moved} sessions")
     finally:
         db.close()
 
@@ -98,16 +146,52 @@ async def startup_event():
     # Initialize database
     init_db()
     
+    # Bring databases of older versions up to date (new columns and indexes)
+    for step in upgrade_database():
+        print(f"Database upgraded: {step}")
+    
     # Seed initial data
     seed_initial_data()
     
+    # Shared change counters (refresh trigger etc.) and in-memory live roster
+    db = SessionLocal()
+    try:
+        ChangeTracker.ensure_counters(db)
+        LiveRoster.rebuild(db)
+        PersonnelIndex.rebuild(db)
+    finally:
+        db.close()
+    
+    # Optional write-behind journal for check-ins (replays unsaved bookings)
+    CheckinJournal.start()
+    
     # Start background scheduler
-    scheduler.add_job(
-        auto_end_sessions_job,
-        'interval',
-        seconds=60,
-        id='auto_end_sessions'
-    )
+    # One-shot auto-end job per session (overdue ones are ended right away)
+    db = SessionLocal()
+    try:
+        SessionTimers.start(scheduler, db)
+    finally:
+        db.close()
+    
+    
+    poll_seconds = change_poll_seconds()
+    if poll_seconds > 0:
+        scheduler.add_job(
+            change_watcher_job,
+            'interval',
+            seconds=poll_seconds,
+            id='change_watcher',
+            coalesce=True,
+            max_instances=1
+        )
+    
+    # Nightly archiving of closed years (no-op when there is nothing to move)
+    if ARCHIVE_KEEP_YEARS > 0:
+        scheduler.add_job(
+            archive_job,
+            CronTrigger(hour=3, minute=30),
+            id='archive_sessions'
+        )
     
     # Add daily backup job at configured time
     db = SessionLocal()
@@ -129,6 +213,7 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
+    CheckinJournal.stop()
     scheduler.shutdown()
     print("Scheduler stopped")
 
@@ -0,0 +1,28 @@
+"""
+Database migration script for timer-based session auto end
+Adds: sessions.auto_end_at and sets it for running sessions
+(Übungsdienst/Arbeitsdienst: started_at + 3 hours, Einsatz: none).
+
+Works for SQLite and PostgreSQL (uses DATABASE_URL like the application).
+The application also applies this at startup (app/migrations.py).
+"""
+
+from app.database import DATABASE_URL
+from app.migrations import add_auto_end
+
+def run_migration():
+    """Run database migration"""
+    print("Starting database migration...")
+    print(f"Database: {DATABASE_URL}")
+
+    if add_auto_end():
+        print("✅ Migration completed successfully!")
+    else:
+        print("✅ Already up to date - nothing to do")
+
+if __name__ == "__main__":
+    try:
+        run_migration()
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        raise
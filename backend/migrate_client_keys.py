@@ -0,0 +1,28 @@
+"""
+Database migration script for idempotent check-ins (offline kiosks)
+Adds: attendance_events.client_key, attendance_events.client_timestamp,
+uq_attendance_events_client_key
+
+Works for SQLite and PostgreSQL (uses DATABASE_URL like the application).
+The application also applies this at startup (app/migrations.py).
+"""
+
+from app.database import DATABASE_URL
+from app.migrations import add_client_keys
+
+def run_migration():
+    """Run database migration"""
+    print("Starting database migration...")
+    print(f"Database: {DATABASE_URL}")
+
+    if add_client_keys():
+        print("✅ Migration completed successfully!")
+    else:
+        print("✅ Already up to date - nothing to do")
+
+if __name__ == "__main__":
+    try:
+        run_migration()
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        raise
@@ -0,0 +1,30 @@
+"""
+Database migration script to add the indexes for attendances and sessions
+Adds: uq_attendances_open_checkin (partial unique index: one open check-in
+per person and session), ix_attendances_session_personnel,
+ix_attendances_personnel_session, ix_sessions_started_at,
+ix_sessions_active_started_at
+
+Works for SQLite and PostgreSQL (uses DATABASE_URL like the application).
+The application also applies this at startup (app/migrations.py).
+"""
+
+from app.database import DATABASE_URL
+from app.migrations import add_indexes
+
+def run_migration():
+    """Run database migration"""
+    print("Starting database migration...")
+    print(f"Database: {DATABASE_URL}")
+
+    if add_indexes():
+        print("✅ Migration completed successfully!")
+    else:
+        print("✅ Already up to date - nothing to do")
+
+if __name__ == "__main__":
+    try:
+        run_migration()
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        raise
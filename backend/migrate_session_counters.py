@@ -0,0 +1,28 @@
+"""
+Database migration script for the denormalized attendee counters
+Adds: sessions.total_attendees, sessions.active_attendees, sessions.person_seconds,
+sessions.revision and fills the counters from the existing attendances.
+
+Works for SQLite and PostgreSQL (uses DATABASE_URL like the application).
+The application also applies this at startup (app/migrations.py).
+"""
+
+from app.database import DATABASE_URL
+from app.migrations import add_session_counters
+
+def run_migration():
+    """Run database migration"""
+    print("Starting database migration...")
+    print(f"Database: {DATABASE_URL}")
+
+    if add_session_counters():
+        print("✅ Migration completed successfully!")
+    else:
+        print("✅ Already up to date - nothing to do")
+
+if __name__ == "__main__":
+    try:
+        run_migration()
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        raise
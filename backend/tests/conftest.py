@@ -0,0 +1,73 @@
+"""Shared fixtures: the app on a temporary SQLite database.
+
+The environment has to be set before the app is imported, so the database
+URL and the change poll are configured at import time of this module.
+"""
+
+import itertools
+import os
+import sys
+import tempfile
+
+import pytest
+
+_tmp = tempfile.mkdtemp(prefix="feuerwehr-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/test.db"
+os.environ["CHANGE_POLL_SECONDS"] = "0"
+os.environ["ATTENDANCE_JOURNAL"] = ""
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(_tmp)  # uploads/ and backups land in the temp directory
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+
+_numbers = itertools.count(1000)
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    response = client.post("/api/auth/login", json={"username": "admin", "password": "feuerwehr2025"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_person(client, admin_headers):
+    """Create a person, returns their Stammrollennummer"""
+    def make():
+        number = f"T{next(_numbers)}"
+        response = client.post("/api/personnel", headers=admin_headers, json={
+            "stammrollennummer": number, "vorname": "Test", "nachname": number, "dienstgrad": "FM"
+        })
+        assert response.status_code == 200, response.text
+        return number
+    return make
+
+
+@pytest.fixture
+def make_session(client, admin_headers):
+    """Start a session, returns its id"""
+    def make(event_type="Einsatz"):
+        response = client.post("/api/sessions", headers=admin_headers, json={"event_type": event_type})
+        assert response.status_code == 200, response.text
+        return response.json()["id"]
+    return make
@@ -0,0 +1,21 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.models import ChangeCounter
+from app.services.archive_manager import ArchiveManager, ARCHIVE_CLAIM_KEY, ARCHIVE_CLAIM_INTERVAL
+
+
+def test_only_one_worker_claims_the_archive_run(client, db):
+    db.execute(update(ChangeCounter).where(ChangeCounter.key == ARCHIVE_CLAIM_KEY)
+               .values(updated_at=datetime.utcnow() - ARCHIVE_CLAIM_INTERVAL - timedelta(minutes=1)))
+    db.commit()
+
+    assert ArchiveManager.claim_run(db)
+    assert not ArchiveManager.claim_run(db)
+
+    # Next night
+    db.execute(update(ChangeCounter).where(ChangeCounter.key == ARCHIVE_CLAIM_KEY)
+               .values(updated_at=datetime.utcnow() - timedelta(days=1)))
+    db.commit()
+    assert ArchiveManager.claim_run(db)
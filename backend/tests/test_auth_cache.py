@@ -0,0 +1,19 @@
+from sqlalchemy import text
+
+
+def set_role_from_other_worker(db, role):
+    """Change the admin like another worker process would (no local notification)"""
+    db.execute(text("UPDATE admin_users SET role = :role WHERE username = 'admin'"), {"role": role})
+    db.execute(text("UPDATE change_counters SET version = version + 1 WHERE key = 'users'"))
+    db.commit()
+
+
+def test_cached_principal_follows_changes_of_other_workers(client, db, admin_headers):
+    role = client.get("/api/auth/me", headers=admin_headers).json()["role"]
+
+    set_role_from_other_worker(db, "viewer")
+    try:
+        assert client.get("/api/auth/me", headers=admin_headers).json()["role"] == "viewer"
+    finally:
+        set_role_from_other_worker(db, role)
+    assert client.get("/api/auth/me", headers=admin_headers).json()["role"] == role
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import Attendance, Session as SessionModel
+from app.services.checkin_journal import CheckinJournal
+from app.services.session_counters import SessionCounters
+
+from .test_toggle import deactivate, started_two_hours_ago
+
+
+@pytest.fixture
+def journal(client, tmp_path):
+    CheckinJournal.start(str(tmp_path / "journal.jsonl"))
+    assert CheckinJournal.is_active()
+    yield CheckinJournal
+    CheckinJournal.stop()
+
+
+def book(client, action, session_id, number):
+    response = client.post(f"/api/attendance/{action}", json={"session_id": session_id, "stammrollennummer": number})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_flush_of_checkin_checkout_checkin_keeps_counters(client, db, journal, make_person, make_session):
+    session_id = make_session()
+    a, b = make_person(), make_person()
+
+    book(client, "checkin", session_id, a)
+    book(client, "checkout", session_id, a)
+    book(client, "checkin", session_id, b)
+    journal.flush()
+
+    db.expire_all()
+    session = db.get(SessionModel, session_id)
+    assert (session.total_attendees, session.active_attendees) == (2, 1)
+    assert SessionCounters.check(db) == []
+    listed = {s["id"]: s for s in client.get("/api/sessions").json()}
+    assert listed[session_id]["active_attendees"] == 1
+
+
+def test_journaled_checkout_survives_session_end(client, db, admin_headers, journal, make_person, make_session):
+    session_id = make_session()
+    a = make_person()
+    book(client, "checkin", session_id, a)
+    journal.flush()
+
+    book(client, "checkout", session_id, a)
+    checkout = CheckinJournal._pending[-1]["occurred_at"]
+    assert client.post(f"/api/sessions/{session_id}/end", headers=admin_headers).status_code == 200
+    journal.flush()
+
+    db.expire_all()
+    attendance = db.query(Attendance).filter(Attendance.session_id == session_id).one()
+    assert attendance.checked_out_at <= checkout
+    assert attendance.checked_out_at < db.get(SessionModel, session_id).ended_at
+    assert SessionCounters.check(db) == []
+
+
+def test_deactivated_member_can_check_out_while_journaled(client, admin_headers, journal, make_person, make_session):
+    session_id = make_session()
+    number = make_person()
+    assert book(client, "toggle", session_id, number)["action"] == "checkin"
+
+    deactivate(client, admin_headers, number)
+
+    assert book(client, "toggle", session_id, number)["action"] == "checkout"
+    response = client.post("/api/attendance/toggle", json={"session_id": session_id, "stammrollennummer": number})
+    assert response.status_code == 404
+
+
+def test_journaled_bookings_use_server_time(client, db, journal, make_person, make_session):
+    session_id = make_session()
+    a = make_person()
+    started_two_hours_ago(db, session_id)
+    behind = datetime.utcnow() - timedelta(minutes=30)  # kiosk clock behind
+
+    response = client.post("/api/attendance/checkin", json={
+        "session_id": session_id, "stammrollennummer": a, "client_timestamp": behind.isoformat()
+    })
+    assert response.status_code == 200, response.text
+    journal.flush()
+
+    db.expire_all()
+    attendance = db.query(Attendance).filter(Attendance.session_id == session_id).one()
+    assert attendance.checked_in_at > behind + timedelta(minutes=29)
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.services.change_tracker import ChangeTracker
+from app.services.event_broker import EventBroker
+
+
+def test_roster_change_of_other_worker_publishes_resync(client, db, monkeypatch, make_person, make_session):
+    session_id = make_session()
+    number = make_person()
+    published = []
+    monkeypatch.setattr(EventBroker, "publish", lambda event_type, data=None: published.append(event_type))
+
+    # Local bookings push their own deltas, polling them again adds nothing
+    assert client.post("/api/attendance/checkin", json={"session_id": session_id, "stammrollennummer": number}).status_code == 200
+    assert published == ["checkin"]
+    ChangeTracker.poll(db)
+    assert published == ["checkin"]
+
+    db.execute(text(
+        "UPDATE change_counters SET version = version + 1, updated_at = :t WHERE key = 'roster'"
+    ), {"t": datetime.utcnow()})
+    db.commit()
+    ChangeTracker.poll(db)
+    assert published == ["checkin", "resync"]
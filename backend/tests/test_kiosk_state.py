@@ -0,0 +1,17 @@
+from .test_roster_etags import commit_from_other_worker, names
+
+
+def test_kiosk_state_sessions_section_matches_tag(client, db, make_person, make_session):
+    session_id = make_session()
+    number = make_person()
+    first = client.get("/api/kiosk/state").json()
+    assert names(first["sessions"], session_id) == []
+
+    commit_from_other_worker(db, session_id, number)
+
+    second = client.get("/api/kiosk/state", params={"since": first["version"]}).json()
+    assert "sessions" in second["changed"]
+    assert names(second["sessions"], session_id) == [number]
+    # The cached section under the new tag is the fresh one as well
+    third = client.get("/api/kiosk/state").json()
+    assert names(third["sessions"], session_id) == [number]
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app.migrations import upgrade_database
+from app.models import Base
+
+NEW_INDEXES = (
+    "uq_attendances_open_checkin", "ix_attendances_session_personnel", "ix_attendances_personnel_session",
+    "ix_sessions_started_at", "ix_sessions_active_started_at",
+    "uq_attendance_events_client_key", "ix_attendance_events_session_cursor",
+)
+NEW_COLUMNS = {
+    "sessions": ("total_attendees", "active_attendees", "person_seconds", "revision", "auto_end_at"),
+    "attendance_events": ("client_key", "client_timestamp"),
+}
+
+
+@pytest.fixture
+def old_engine(tmp_path):
+    """A database as an older version left it: no new columns or indexes"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for index in NEW_INDEXES:
+            conn.execute(text(f"DROP INDEX {index}"))
+        for table, columns in NEW_COLUMNS.items():
+            for column in columns:
+                conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+
+        started = datetime.utcnow() - timedelta(hours=1)
+        conn.execute(text("INSERT INTO personnel (id, stammrollennummer, vorname, nachname, dienstgrad, is_active) "
+                          "VALUES (1, '1', 'A', 'B', 'FM', 1)"))
+        conn.execute(text("INSERT INTO sessions (id, event_type, started_at, is_active) VALUES (1, 'Übungsdienst', :t, 1)"),
+                     {"t": started})
+        # Two open check-ins of the same person (allowed before the unique index)
+        for attendance_id in (1, 2):
+            conn.execute(text("INSERT INTO attendances (id, session_id, personnel_id, checked_in_at) VALUES (:id, 1, 1, :t)"),
+                         {"id": attendance_id, "t": started})
+    yield engine
+    engine.dispose()
+
+
+def test_upgrade_brings_old_database_up_to_date(old_engine):
+    applied = upgrade_database(old_engine)
+
+    assert applied == ["add_client_keys", "add_session_counters", "add_auto_end", "add_indexes"]
+    inspector = inspect(old_engine)
+    for table, columns in NEW_COLUMNS.items():
+        assert set(columns) <= {column["name"] for column in inspector.get_columns(table)}
+    indexes = {index["name"] for table in ("attendances", "sessions", "attendance_events")
+               for index in inspector.get_indexes(table)}
+    assert set(NEW_INDEXES) <= indexes
+
+    with old_engine.connect() as conn:
+        open_count = conn.execute(text("SELECT COUNT(*) FROM attendances WHERE checked_out_at IS NULL")).scalar()
+        session = conn.execute(text("SELECT total_attendees, active_attendees, auto_end_at FROM sessions WHERE id = 1")).one()
+    assert open_count == 1
+    assert session.total_attendees == 2
+    assert session.active_attendees == 1
+    assert session.auto_end_at is not None
+
+    assert upgrade_database(old_engine) == []
+
+
+def test_upgrade_is_a_no_op_on_current_schema(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'new.db'}")
+    Base.metadata.create_all(bind=engine)
+    assert upgrade_database(engine) == []
+    engine.dispose()
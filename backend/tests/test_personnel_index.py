@@ -0,0 +1,62 @@
+from sqlalchemy import event, text
+
+from app.database import engine
+from app.services.personnel_index import PersonnelIndex
+
+
+def personnel_queries(db, number):
+    """Number of statements on the personnel table for one lookup"""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        if "FROM personnel" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        PersonnelIndex.get(db, number)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return len(statements)
+
+
+def test_unknown_number_is_looked_up_once(client, db, make_person):
+    PersonnelIndex.get(db, make_person())  # reloads the index
+
+    assert personnel_queries(db, "U1") == 1
+    assert personnel_queries(db, "U1") == 0
+    assert PersonnelIndex.get(db, "U1") is None
+
+
+def test_unknown_number_is_found_after_it_was_created(client, admin_headers, db):
+    assert PersonnelIndex.get(db, "U2") is None
+
+    response = client.post("/api/personnel", headers=admin_headers, json={
+        "stammrollennummer": "U2", "vorname": "Test", "nachname": "U2", "dienstgrad": "FM"
+    })
+    assert response.status_code == 200, response.text
+
+    assert PersonnelIndex.get(db, "U2").nachname == "U2"
+
+
+def commit_from_other_worker(db, statement, **params):
+    """Change personnel like another worker process would (no local notification)"""
+    db.execute(text(statement), params)
+    db.execute(text("UPDATE change_counters SET version = version + 1 WHERE key = 'personnel'"))
+    db.commit()
+
+
+def test_changes_of_other_workers_are_seen_without_the_change_poll(client, db, make_person):
+    number = make_person()
+    assert PersonnelIndex.get(db, number) is not None
+    assert PersonnelIndex.get(db, "U3") is None
+
+    commit_from_other_worker(db, "UPDATE personnel SET is_active = 0 WHERE stammrollennummer = :n", n=number)
+    commit_from_other_worker(
+        db, "INSERT INTO personnel (stammrollennummer, vorname, nachname, dienstgrad, is_active) "
+            "VALUES ('U3', 'Test', 'U3', 'FM', 1)"
+    )
+
+    assert PersonnelIndex.get(db, number) is None
+    assert PersonnelIndex.get(db, number, active_only=False) is not None
+    assert PersonnelIndex.get(db, "U3").nachname == "U3"
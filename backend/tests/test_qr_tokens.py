@@ -0,0 +1,21 @@
+from datetime import date, datetime, timedelta
+
+from app.services import qr_generator
+from app.services.qr_generator import QRGenerator, _parse_legacy_cutoff
+
+
+def test_invalid_legacy_cutoff_is_ignored():
+    assert _parse_legacy_cutoff("31.12.2026") is None
+    assert _parse_legacy_cutoff("") is None
+    assert _parse_legacy_cutoff("2026-12-31") == date(2026, 12, 31)
+
+
+def test_legacy_tokens_follow_the_cutoff(monkeypatch):
+    token = QRGenerator.generate_legacy_token(7)
+    today = datetime.utcnow().date()
+
+    monkeypatch.setattr(qr_generator, "_LEGACY_TOKENS_CUTOFF", today)
+    assert QRGenerator.validate_session_token(token)["session_id"] == 7
+
+    monkeypatch.setattr(qr_generator, "_LEGACY_TOKENS_CUTOFF", today - timedelta(days=1))
+    assert QRGenerator.validate_session_token(token) is None
@@ -0,0 +1,59 @@
+"""Roster responses must never carry a newer ETag than the roster they show.
+
+Another worker's commit is simulated with plain SQL, so this process only
+learns about it from the counter it reads for the ETag.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.models import Personnel
+
+
+def commit_from_other_worker(db, session_id, number):
+    personnel_id = db.query(Personnel.id).filter(Personnel.stammrollennummer == number).scalar()
+    db.execute(text(
+        "INSERT INTO attendances (session_id, personnel_id, checked_in_at) VALUES (:s, :p, :t)"
+    ), {"s": session_id, "p": personnel_id, "t": datetime.utcnow()})
+    db.execute(text(
+        "UPDATE sessions SET total_attendees = total_attendees + 1, "
+        "active_attendees = active_attendees + 1, revision = revision + 1 WHERE id = :s"
+    ), {"s": session_id})
+    db.execute(text(
+        "UPDATE change_counters SET version = version + 1, updated_at = :t WHERE key = 'roster'"
+    ), {"t": datetime.utcnow()})
+    db.commit()
+
+
+def names(sessions, session_id):
+    session = next(s for s in sessions if s["id"] == session_id)
+    return [p["stammrollennummer"] for p in session["active_personnel"]]
+
+
+def test_active_sessions_etag_matches_body(client, db, make_person, make_session):
+    session_id = make_session()
+    number = make_person()
+    first = client.get("/api/sessions/active/current")
+    assert names(first.json(), session_id) == []
+
+    commit_from_other_worker(db, session_id, number)
+
+    second = client.get("/api/sessions/active/current", headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 200
+    assert second.headers["etag"] != first.headers["etag"]
+    assert names(second.json(), session_id) == [number]
+
+
+def test_session_attendees_etag_matches_body(client, db, make_person, make_session):
+    session_id = make_session()
+    number = make_person()
+    first = client.get(f"/api/attendance/session/{session_id}/active")
+    assert first.json() == []
+
+    commit_from_other_worker(db, session_id, number)
+
+    second = client.get(f"/api/attendance/session/{session_id}/active")
+    assert [p["stammrollennummer"] for p in second.json()] == [number]
+    third = client.get(f"/api/attendance/session/{session_id}/active", headers={"If-None-Match": second.headers["etag"]})
+    assert third.status_code == 304
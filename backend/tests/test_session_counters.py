@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+from app.models import Attendance, Session as SessionModel
+from app.services.session_counters import SessionCounters
+
+
+def counters(db, session_id):
+    db.expire_all()
+    session = db.get(SessionModel, session_id)
+    return session.total_attendees, session.active_attendees
+
+
+def replay(client, entries):
+    response = client.post("/api/attendance/replay", json={"entries": entries})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def entry(key, action, session_id, number, moment):
+    return {
+        "client_key": key,
+        "client_timestamp": moment.isoformat(),
+        "action": action,
+        "session_id": session_id,
+        "stammrollennummer": number
+    }
+
+
+def test_replayed_checkin_and_checkout_of_one_person_count_once(client, db, make_person, make_session):
+    session_id = make_session()
+    a, b = make_person(), make_person()
+    now = datetime.utcnow()
+
+    replay(client, [
+        entry("pair-1", "toggle", session_id, a, now - timedelta(seconds=30)),
+        entry("pair-2", "toggle", session_id, a, now - timedelta(seconds=20)),
+        entry("pair-3", "toggle", session_id, b, now - timedelta(seconds=10)),
+    ])
+
+    assert counters(db, session_id) == (2, 1)
+    assert SessionCounters.check(db) == []
+    listed = {s["id"]: s for s in client.get("/api/sessions").json()}
+    assert listed[session_id]["active_attendees"] == 1
+
+
+def test_replay_counts_checkout_of_existing_attendance(client, db, make_person, make_session):
+    session_id = make_session()
+    a = make_person()
+    assert client.post("/api/attendance/checkin", json={"session_id": session_id, "stammrollennummer": a}).status_code == 200
+
+    replay(client, [entry("existing-1", "checkout", session_id, a, datetime.utcnow())])
+
+    assert counters(db, session_id) == (1, 0)
+    assert SessionCounters.check(db) == []
+
+
+def test_replay_after_session_end_is_rejected(client, db, admin_headers, make_person, make_session):
+    session_id = make_session()
+    a, b = make_person(), make_person()
+    assert client.post("/api/attendance/checkin", json={"session_id": session_id, "stammrollennummer": a}).status_code == 200
+    assert client.post(f"/api/sessions/{session_id}/end", headers=admin_headers).status_code == 200
+    closed_at = db.get(SessionModel, session_id).ended_at
+    later = datetime.utcnow() + timedelta(seconds=1)
+
+    results = replay(client, [
+        entry("late-in", "checkin", session_id, b, later),
+        entry("late-out", "checkout", session_id, a, later),
+    ])["results"]
+
+    assert [r["status"] for r in results] == ["rejected", "rejected"]
+    db.expire_all()
+    assert counters(db, session_id) == (1, 0)
+    attendance = db.query(Attendance).filter(Attendance.session_id == session_id).one()
+    assert attendance.checked_out_at == closed_at
+
+
+def test_replay_of_old_entries_is_rejected(client, db, make_person, make_session):
+    session_id = make_session()
+    a = make_person()
+
+    results = replay(client, [
+        entry("old-in", "checkin", session_id, a, datetime.utcnow() - timedelta(days=2)),
+    ])["results"]
+
+    assert results[0]["status"] == "rejected"
+    assert counters(db, session_id) == (0, 0)
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+from app.models import Attendance, AttendanceEvent, Session as SessionModel
+from app.services.live_roster import LiveRoster
+
+
+def started_two_hours_ago(db, session_id):
+    db.get(SessionModel, session_id).started_at = datetime.utcnow() - timedelta(hours=2)
+    db.commit()
+    LiveRoster.rebuild(db)
+
+
+def toggle(client, session_id, number):
+    return client.post("/api/attendance/toggle", json={"session_id": session_id, "stammrollennummer": number})
+
+
+def deactivate(client, admin_headers, number):
+    personnel_id = client.get(f"/api/personnel/by-nummer/{number}").json()["id"]
+    response = client.delete(f"/api/personnel/{personnel_id}", headers=admin_headers)
+    assert response.status_code == 200, response.text
+
+
+def test_deactivated_member_can_check_out(client, admin_headers, make_person, make_session):
+    session_id = make_session()
+    number = make_person()
+    assert toggle(client, session_id, number).json()["action"] == "checkin"
+
+    deactivate(client, admin_headers, number)
+
+    response = toggle(client, session_id, number)
+    assert response.status_code == 200, response.text
+    assert response.json()["action"] == "checkout"
+
+
+def test_deactivated_member_cannot_check_in(client, db, admin_headers, make_person, make_session):
+    session_id = make_session()
+    number = make_person()
+    deactivate(client, admin_headers, number)
+
+    response = toggle(client, session_id, number)
+    assert response.status_code == 404
+    active = client.get(f"/api/attendance/session/{session_id}/active").json()
+    assert all(entry["stammrollennummer"] != number for entry in active)
+
+
+def test_live_bookings_use_server_time(client, db, make_person, make_session):
+    session_id = make_session()
+    number = make_person()
+    started_two_hours_ago(db, session_id)
+    behind = datetime.utcnow() - timedelta(minutes=30)  # kiosk clock behind
+
+    response = client.post("/api/attendance/toggle", json={
+        "session_id": session_id, "stammrollennummer": number,
+        "client_key": f"slow-{number}", "client_timestamp": behind.isoformat()
+    })
+    assert response.status_code == 200, response.text
+
+    attendance = db.get(Attendance, response.json()["attendance_id"])
+    assert attendance.checked_in_at > behind + timedelta(minutes=29)
+    event = db.query(AttendanceEvent).filter(AttendanceEvent.client_key == f"slow-{number}").one()
+    assert event.client_timestamp == behind
@@ -0,0 +1,20 @@
+import main
+
+
+def test_configured_workers(monkeypatch):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    assert main.configured_workers(["uvicorn", "main:app", "--port", "8000"]) == 1
+    assert main.configured_workers(["uvicorn", "main:app", "--workers", "4"]) == 4
+    assert main.configured_workers(["uvicorn", "main:app", "--workers=3"]) == 3
+    assert main.configured_workers(["gunicorn", "-w", "2", "main:app"]) == 2
+
+    monkeypatch.setenv("WEB_CONCURRENCY", "2")
+    assert main.configured_workers(["uvicorn", "main:app"]) == 2
+
+
+def test_change_poll_is_on_with_several_workers(monkeypatch):
+    monkeypatch.setattr(main, "CHANGE_POLL_SECONDS", 0)
+    monkeypatch.setattr(main, "configured_workers", lambda: 1)
+    assert main.change_poll_seconds() == 0
+    monkeypatch.setattr(main, "configured_workers", lambda: 4)
+    assert main.change_poll_seconds() == 1
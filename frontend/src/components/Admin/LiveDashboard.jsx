@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import api from '../../api';
+import { subscribeToEvents } from '../../utils/eventStream';
 
 const LiveDashboard = () => {
   const [dashboardData, setDashboardData] = useState(null);
@@ -7,9 +8,25 @@ const LiveDashboard = () => {
 
   useEffect(() => {
     loadDashboardData();
-    // Refresh every 5 seconds
-    const interval = setInterval(loadDashboardData, 5000);
-    return () => clearInterval(interval);
+    
+    // Reload on pushed changes; the slow interval only keeps durations current
+    const unsubscribe = subscribeToEvents({
+      hello: loadDashboardData,
+      resync: loadDashboardData,
+      checkin: loadDashboardData,
+      checkout: loadDashboardData,
+      session_started: loadDashboardData,
+      session_ended: loadDashboardData,
+      session_deleted: loadDashboardData
+    });
+    
+    const interval = setInterval(loadDashboardData, unsubscribe ? 60000 : 5000);
+    return () => {
+      if (unsubscribe) {
+        unsubscribe();
+      }
+      clearInterval(interval);
+    };
   }, []);
 
   const loadDashboardData = async () => {
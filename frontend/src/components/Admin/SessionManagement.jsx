@@ -5,6 +5,7 @@ import api from '../../api';
 const SessionManagement = () => {
   const [sessions, setSessions] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
   const [showCreateModal, setShowCreateModal] = useState(false);
   const [newSessionType, setNewSessionType] = useState('Einsatz');
   
@@ -23,14 +24,26 @@ const SessionManagement = () => {
       setLoading(true);
       const response = await api.get('/sessions?limit=50');
       setSessions(Array.isArray(response.data) ? response.data : []);
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       console.error('Fehler beim Laden der Sessions:', error);
       setSessions([]);
+      setNextCursor(null);
     } finally {
       setLoading(false);
     }
   };
 
+  const loadMoreSessions = async () => {
+    try {
+      const response = await api.get('/sessions', { params: { limit: 50, cursor: nextCursor } });
+      setSessions(prev => [...prev, ...response.data]);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      console.error('Fehler beim Laden weiterer Sessions:', error);
+    }
+  };
+
   const createSession = async () => {
     try {
       await api.post('/sessions', { event_type: newSessionType });
@@ -440,6 +453,14 @@ const SessionManagement = () => {
           {filteredSessions.filter(s => !s.is_active).length === 0 && (
             <p className="text-gray-500 text-center py-4">Keine abgeschlossenen Sessions</p>
           )}
+          {nextCursor && (
+            <button
+              onClick={loadMoreSessions}
+              className="w-full bg-gray-200 text-gray-700 px-4 py-2 rounded-lg hover:bg-gray-300 transition-all text-sm"
+            >
+              Weitere Sessions laden
+            </button>
+          )}
         </div>
       </div>
       </>
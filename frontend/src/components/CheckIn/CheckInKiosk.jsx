@@ -5,6 +5,8 @@ import SessionQRCode from './SessionQRCode';
 import AnnouncementBanner from './AnnouncementBanner';
 import NewsBanner from './NewsBanner';
 import Screensaver from './Screensaver';
+import { subscribeToEvents } from '../../utils/eventStream';
+import { newClientKey, isOfflineError, enqueueBooking, pendingBookings, flushBookings } from '../../utils/offlineQueue';
 
 const CheckInKiosk = () => {
   const [searchParams] = useSearchParams();
@@ -23,61 +25,118 @@ const CheckInKiosk = () => {
   const [isMobileQRView, setIsMobileQRView] = useState(false);
   const [showScreensaver, setShowScreensaver] = useState(false);
   const inactivityTimerRef = useRef(null);
+  const kioskVersionRef = useRef(null);
 
   useEffect(() => {
-    // Load system settings
-    loadSystemSettings();
-    loadFireStationInfo();
+    // Load settings, fire station info and active sessions in one request
+    loadKioskState();
     
-    // Setup polling for kiosk refresh (every 5 seconds)
-    let lastRefreshTimestamp = null;
+    const reloadAll = () => {
+      loadKioskState();
+      if (selectedSession) {
+        loadActivePersonnel();
+      }
+    };
     
-    const checkForRefresh = async () => {
-      try {
-        const response = await api.get('/events/last-refresh');
-        const newTimestamp = response.data.unix_timestamp;
-        
-        if (lastRefreshTimestamp && newTimestamp > lastRefreshTimestamp) {
-          console.log('🔄 Admin triggered refresh, reloading data...');
-          // Reload all data
-          loadSystemSettings();
-          loadActiveSessions();
-          if (selectedSession) {
-            loadActivePersonnel();
-          }
-        }
-        
-        lastRefreshTimestamp = newTimestamp;
-      } catch (error) {
-        console.error('Error checking for refresh:', error);
+    // Bookings queued while the backend was unreachable
+    const sendQueuedBookings = () => {
+      if (pendingBookings() > 0) {
+        flushBookings();
       }
     };
+    sendQueuedBookings();
+    const queueInterval = setInterval(sendQueuedBookings, 30000);
     
-    // Check immediately
-    checkForRefresh();
+    // Push channel: admin refresh triggers and session start/end
+    let connectedOnce = false;
+    const unsubscribe = subscribeToEvents({
+      hello: () => {
+        // Reconnected - send queued bookings, reload whatever we may have missed
+        sendQueuedBookings();
+        if (connectedOnce) {
+          reloadAll();
+        }
+        connectedOnce = true;
+      },
+      refresh: () => {
+        console.log('🔄 Admin triggered refresh, reloading data...');
+        reloadAll();
+      },
+      resync: reloadAll,
+      session_started: () => loadActiveSessions(),
+      session_ended: () => loadActiveSessions(),
+      session_deleted: () => loadActiveSessions()
+    });
     
-    // Then check every 5 seconds
-    const refreshInterval = setInterval(checkForRefresh, 5000);
+    // Fallback: poll for kiosk refresh (every 5 seconds)
+    let refreshInterval = null;
+    if (!unsubscribe) {
+      let lastRefreshTimestamp = null;
+      
+      const checkForRefresh = async () => {
+        try {
+          const response = await api.get('/events/last-refresh');
+          const newTimestamp = response.data.unix_timestamp;
+          
+          if (lastRefreshTimestamp && newTimestamp > lastRefreshTimestamp) {
+            console.log('🔄 Admin triggered refresh, reloading data...');
+            reloadAll();
+          }
+          
+          lastRefreshTimestamp = newTimestamp;
+        } catch (error) {
+          console.error('Error checking for refresh:', error);
+        }
+      };
+      
+      checkForRefresh();
+      refreshInterval = setInterval(checkForRefresh, 5000);
+    }
     
     if (qrToken) {
       // Validate QR token and get session
       validateQRToken();
       // Set mobile QR view flag
       setIsMobileQRView(true);
-    } else {
-      loadActiveSessions();
     }
     
     return () => {
-      clearInterval(refreshInterval);
+      if (unsubscribe) {
+        unsubscribe();
+      }
+      if (refreshInterval) {
+        clearInterval(refreshInterval);
+      }
+      clearInterval(queueInterval);
     };
   }, [qrToken]);
 
   useEffect(() => {
     if (selectedSession) {
       loadActivePersonnel();
-      const interval = setInterval(loadActivePersonnel, 5000);
-      return () => clearInterval(interval);
+      
+      // Apply check-in/check-out deltas pushed by the backend
+      const unsubscribe = subscribeToEvents({
+        hello: loadActivePersonnel,
+        resync: loadActivePersonnel,
+        checkin: (attendee) => {
+          setActivePersonnel(prev => (
+            prev.some(p => p.personnel_id === attendee.personnel_id) ? prev : [...prev, attendee]
+          ));
+        },
+        checkout: (change) => {
+          setActivePersonnel(prev => prev.filter(p => p.personnel_id !== change.personnel_id));
+        }
+      }, { sessionId: selectedSession.id });
+      
+      // With push updates the slow interval is only a safety net (ETag-revalidated)
+      const interval = setInterval(loadActivePersonnel, unsubscribe ? 60000 : 5000);
+      return () => {
+        if (unsubscribe) {
+          unsubscribe();
+        }
+        clearInterval(interval);
+      };
     }
   }, [selectedSession]);
 
@@ -130,6 +189,33 @@ const CheckInKiosk = () => {
     };
   }, [systemSettings, isMobileQRView]);
 
+  const loadKioskState = async () => {
+    try {
+      // With a known version only the changed sections are returned
+      const params = kioskVersionRef.current ? { since: kioskVersionRef.current } : {};
+      const response = await api.get('/kiosk/state', { params });
+      const state = response.data;
+      
+      if (state.system_settings) {
+        setSystemSettings(state.system_settings);
+      }
+      if (state.firestation) {
+        setFireStationInfo(state.firestation);
+      }
+      if (state.sessions && !qrToken) {
+        applyActiveSessions(state.sessions);
+      }
+      kioskVersionRef.current = state.version;
+    } catch (error) {
+      console.error('Fehler beim Laden des Kiosk-Status:', error);
+      loadSystemSettings();
+      loadFireStationInfo();
+      if (!qrToken) {
+        loadActiveSessions();
+      }
+    }
+  };
+
   const loadSystemSettings = async () => {
     try {
       const response = await api.get('/settings/system');
@@ -192,18 +278,22 @@ const CheckInKiosk = () => {
   const loadActiveSessions = async () => {
     try {
       const response = await api.get('/sessions/active/current');
-      const data = Array.isArray(response.data) ? response.data : [];
-      setSessions(data);
-      if (data.length === 1) {
-        setSelectedSession(data[0]);
-        setShowSessionSelect(false);
-      }
+      applyActiveSessions(response.data);
     } catch (error) {
       console.error('Fehler beim Laden der Sessions:', error);
       setSessions([]);
     }
   };
 
+  const applyActiveSessions = (activeSessions) => {
+    const data = Array.isArray(activeSessions) ? activeSessions : [];
+    setSessions(data);
+    if (data.length === 1) {
+      setSelectedSession(data[0]);
+      setShowSessionSelect(false);
+    }
+  };
+
   const loadActivePersonnel = async () => {
     if (!selectedSession) return;
     try {
@@ -229,23 +319,27 @@ const CheckInKiosk = () => {
   const handleSubmit = async () => {
     if (!number || !selectedSession) return;
 
+    // Key and time travel with the booking, also when it has to be queued
+    const booking = {
+      client_key: newClientKey(),
+      client_timestamp: new Date().toISOString(),
+      action: 'toggle',
+      session_id: selectedSession.id,
+      stammrollennummer: number
+    };
+
     try {
-      // Check if already checked in
-      const isCheckedIn = activePersonnel.some(p => p.stammrollennummer === number);
-
-      if (isCheckedIn) {
-        // Check out
-        await api.post('/attendance/checkout', {
-          session_id: selectedSession.id,
-          stammrollennummer: number
-        });
+      // The server checks in or out depending on the current state
+      const response = await api.post('/attendance/toggle', {
+        session_id: booking.session_id,
+        stammrollennummer: booking.stammrollennummer,
+        client_key: booking.client_key,
+        client_timestamp: booking.client_timestamp
+      }, { timeout: 8000 }); // a stalled backend counts as offline
+
+      if (response.data.action === 'checkout') {
         setMessage({ text: 'Erfolgreich ausgecheckt!', type: 'success' });
       } else {
-        // Check in
-        const response = await api.post('/attendance/checkin', {
-          session_id: selectedSession.id,
-          stammrollennummer: number
-        });
         setMessage({ 
           text: `Willkommen ${response.data.personnel.vorname} ${response.data.personnel.nachname}!`, 
           type: 'success' 
@@ -255,11 +349,24 @@ const CheckInKiosk = () => {
       setNumber('');
       setTimeout(() => setMessage({ text: '', type: '' }), 3000);
       loadActivePersonnel();
+      if (pendingBookings() > 0) {
+        flushBookings();
+      }
     } catch (error) {
-      setMessage({ 
-        text: error.response?.data?.detail || 'Fehler beim Check-in/out', 
-        type: 'error' 
-      });
+      if (isOfflineError(error)) {
+        // Backend unreachable - keep the booking and send it later
+        enqueueBooking(booking);
+        setNumber('');
+        setMessage({ 
+          text: 'Keine Verbindung - Buchung gespeichert und wird nachgereicht', 
+          type: 'success' 
+        });
+      } else {
+        setMessage({ 
+          text: error.response?.data?.detail || 'Fehler beim Check-in/out', 
+          type: 'error' 
+        });
+      }
       setTimeout(() => setMessage({ text: '', type: '' }), 3000);
     }
   };
@@ -65,7 +65,7 @@ const SessionQRCode = ({ sessionId, large = false }) => {
         </head>
         <body>
           <h2>Feuerwehr Check-In QR Code</h2>
-          <img src="${qrUrl}" alt="QR Code" onload="window.print(); window.close();" />
+          <img src="${qrUrl}?format=print" alt="QR Code" onload="window.print(); window.close();" />
         </body>
       </html>
     `);
@@ -100,7 +100,7 @@ const SessionQRCode = ({ sessionId, large = false }) => {
     <div className="flex flex-col items-center space-y-4">
       <div className="bg-white p-6 rounded-2xl shadow-lg">
         <img 
-          src={qrUrl} 
+          src={`${qrUrl}?format=svg`} 
           alt="Session QR Code" 
           className={qrSizeClass}
           onError={handleImageError}
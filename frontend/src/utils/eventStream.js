@@ -0,0 +1,34 @@
+/**
+ * Subscribe to the backend push channel (server-sent events).
+ * Returns an unsubscribe function, or null if the browser has no EventSource
+ * support - callers should fall back to polling in that case.
+ *
+ * The "hello" event is sent on every (re)connect, so handlers can use it to
+ * reload state that may have been missed while disconnected.
+ */
+export const subscribeToEvents = (handlers, { sessionId } = {}) => {
+  if (typeof window === 'undefined' || !window.EventSource) {
+    return null;
+  }
+
+  const baseURL = import.meta.env.VITE_API_URL || '/api';
+  const url = sessionId
+    ? `${baseURL}/events/stream?session_id=${sessionId}`
+    : `${baseURL}/events/stream`;
+
+  const source = new EventSource(url);
+
+  Object.entries(handlers).forEach(([eventType, handler]) => {
+    source.addEventListener(eventType, (event) => {
+      try {
+        handler(event.data ? JSON.parse(event.data) : {});
+      } catch (error) {
+        console.error(`Fehler beim Verarbeiten des Events ${eventType}:`, error);
+      }
+    });
+  });
+
+  return () => source.close();
+};
+
+export default subscribeToEvents;
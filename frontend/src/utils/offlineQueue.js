@@ -0,0 +1,80 @@
+import api from '../api';
+
+const STORAGE_KEY = 'attendanceQueue';
+const MAX_BATCH = 500;
+
+let flushing = null;
+
+/**
+ * Idempotency key for a check-in/check-out. The same key is kept when the
+ * booking ends up in the offline queue, so the backend can drop duplicates.
+ */
+export const newClientKey = () => {
+  if (window.crypto?.randomUUID) {
+    return window.crypto.randomUUID();
+  }
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 12)}`;
+};
+
+const readQueue = () => {
+  try {
+    return JSON.parse(localStorage.getItem(STORAGE_KEY)) || [];
+  } catch (error) {
+    return [];
+  }
+};
+
+const writeQueue = (entries) => {
+  localStorage.setItem(STORAGE_KEY, JSON.stringify(entries));
+};
+
+/**
+ * True if the request failed without an answer from the backend
+ * (network down, backend restarting) - only then is queueing useful.
+ */
+export const isOfflineError = (error) => !error.response;
+
+/**
+ * Store a booking ({ client_key, client_timestamp, action, session_id,
+ * stammrollennummer }) until the backend is reachable again.
+ */
+export const enqueueBooking = (entry) => {
+  writeQueue([...readQueue(), entry]);
+};
+
+export const pendingBookings = () => readQueue().length;
+
+/**
+ * Send queued bookings via /attendance/replay. Sent entries are removed once
+ * the backend has answered; on network errors they stay queued.
+ * Returns the number of bookings that were applied.
+ */
+export const flushBookings = async () => {
+  if (flushing) {
+    return flushing;
+  }
+
+  flushing = (async () => {
+    let applied = 0;
+    try {
+      let queue = readQueue();
+      while (queue.length > 0) {
+        const batch = queue.slice(0, MAX_BATCH);
+        const response = await api.post('/attendance/replay', { entries: batch });
+        applied += response.data.applied;
+
+        // Entries queued while the request was running stay in the queue
+        const sent = new Set(batch.map(entry => entry.client_key));
+        queue = readQueue().filter(entry => !sent.has(entry.client_key));
+        writeQueue(queue);
+      }
+    } catch (error) {
+      console.error('Offline-Buchungen konnten nicht gesendet werden:', error);
+    } finally {
+      flushing = null;
+    }
+    return applied;
+  })();
+
+  return flushing;
+};